@@ -0,0 +1,67 @@
+# Copyright (C) 2018 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Compare python and set based fulltext indexing for every indexed model.
+
+Usage:
+  python bin/benchmark_fulltext_indexing.py [objects_count]
+
+Records of up to objects_count objects (1000 by default) of every model are
+rebuilt with both indexing paths. All changes are rolled back, so the script
+can be run on a database with real data.
+"""
+
+import sys
+import time
+
+import ggrc.app  # noqa pylint: disable=unused-import
+from ggrc import db
+from ggrc.fulltext import get_indexer
+from ggrc.fulltext.mysql import MysqlRecordProperty as Record
+from ggrc.views import get_indexed_models
+from ggrc.views import warmup_indexer_cache
+
+
+def rebuild_records(model, ids, set_based):
+  """Rebuild records and return duration and the set of created records."""
+  indexer = get_indexer()
+  indexer.invalidate_cache()
+  warmup_indexer_cache(indexer)
+  start = time.time()
+  model.bulk_record_update_for(ids, set_based=set_based)
+  duration = time.time() - start
+  records = set(db.session.query(
+      Record.key,
+      Record.property,
+      Record.subproperty,
+      Record.content,
+  ).filter(
+      Record.type == model.__name__,
+      Record.key.in_(ids),
+  ))
+  db.session.rollback()
+  return duration, records
+
+
+def main():
+  """Print timings of both indexing paths for every indexed model."""
+  objects_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+  print "{:<30} {:>8} {:>10} {:>10} {:>6}".format(
+      "Model", "Objects", "Python", "Set based", "Equal")
+  for model_name, model in sorted(get_indexed_models().iteritems()):
+    ids = [id_ for id_, in db.session.query(model.id).limit(objects_count)]
+    if not ids:
+      continue
+    python_time, python_records = rebuild_records(model, ids, False)
+    set_based_time, set_based_records = rebuild_records(model, ids, True)
+    print "{:<30} {:>8} {:>10.4f} {:>10.4f} {:>6}".format(
+        model_name,
+        len(ids),
+        python_time,
+        set_based_time,
+        python_records == set_based_records,
+    )
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,90 @@
+# Copyright (C) 2018 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Compare peak memory of eager and lazy reading of import csv files.
+
+Usage:
+  python bin/benchmark_import_memory.py [size_mb] [eager|lazy]
+
+A csv file of size_mb megabytes (200 by default) with control blocks of
+10000 rows is generated in a temporary directory and its blocks are split
+and extracted the same way ImportConverter does it. Every reading mode is run
+in its own process, because peak memory of a process never decreases.
+"""
+
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from ggrc.converters import import_helper
+
+
+BLOCK_ROWS = 10000
+ROW_TEMPLATE = ",CONTROL-{0},Control title {0},{1},user@example.com\n"
+
+
+def generate_csv(path, size_mb):
+  """Write csv file with control blocks of the given size."""
+  size = size_mb * 1024 * 1024
+  description = "Description " * 20
+  with open(path, "w") as csv_file:
+    row_id = 0
+    while csv_file.tell() < size:
+      csv_file.write("Object type,,,,\n")
+      csv_file.write("Control,Code*,Title*,Description,Admin*\n")
+      for _ in xrange(BLOCK_ROWS):
+        csv_file.write(ROW_TEMPLATE.format(row_id, description))
+        row_id += 1
+      csv_file.write(",,,,\n")
+
+
+def read_blocks(path, mode):
+  """Extract all blocks of the file and return the number of rows."""
+  rows_count = 0
+  with open(path) as csv_file:
+    if mode == "eager":
+      csv_data = import_helper.read_csv_file(csv_file)
+    else:
+      csv_data = import_helper.iter_csv_file(csv_file)
+    for _, data, _ in import_helper.split_blocks(csv_data):
+      _, rows = import_helper.extract_relevant_data(data)
+      rows_count += len(rows)
+  return rows_count
+
+
+def run_mode(path, mode):
+  """Print duration and peak memory of reading the file in a given mode."""
+  start = time.time()
+  rows_count = read_blocks(path, mode)
+  duration = time.time() - start
+  peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+  print "{:<6} {:>10} {:>10.2f} {:>12.1f}".format(
+      mode, rows_count, duration, peak_mb)
+
+
+def main():
+  """Generate the file and measure both reading modes."""
+  size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+  if len(sys.argv) > 2:
+    run_mode(os.environ["GGRC_BENCHMARK_CSV"], sys.argv[2])
+    return
+  tmp_dir = tempfile.mkdtemp()
+  try:
+    path = os.path.join(tmp_dir, "import.csv")
+    generate_csv(path, size_mb)
+    print "{:<6} {:>10} {:>10} {:>12}".format(
+        "Mode", "Rows", "Seconds", "Peak MB")
+    env = dict(os.environ, GGRC_BENCHMARK_CSV=path)
+    for mode in ("eager", "lazy"):
+      subprocess.check_call(
+          [sys.executable, __file__, str(size_mb), mode], env=env)
+  finally:
+    shutil.rmtree(tmp_dir)
+
+
+if __name__ == "__main__":
+  main()
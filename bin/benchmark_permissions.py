@@ -0,0 +1,77 @@
+# Copyright (C) 2018 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Measure is_allowed_read_for checks of DefaultUserPermissions.
+
+Usage:
+  python bin/benchmark_permissions.py [objects_count]
+
+Permissions of a user with access to half of objects_count (10000 by default)
+controls through resources and to the rest through contexts are generated and
+every object is checked with is_allowed_read_for.
+"""
+
+import collections
+import sys
+import time
+
+from flask import g
+
+from ggrc.app import app
+from ggrc.rbac.permissions_provider import DefaultUserPermissions
+
+
+Inflector = collections.namedtuple("Inflector", "model_singular")
+Context = collections.namedtuple("Context", "id")
+Instance = collections.namedtuple("Instance", "_inflector id context")
+
+CONTEXTS_COUNT = 100
+
+
+def generate_permissions(objects_count):
+  """Generate read permissions for objects_count controls."""
+  return {
+      "read": {
+          "Control": {
+              "resources": set(range(0, objects_count, 2)),
+              "contexts": list(range(CONTEXTS_COUNT)),
+              "conditions": {},
+          },
+      },
+  }
+
+
+def generate_instances(objects_count):
+  """Generate control stubs spread across contexts."""
+  inflector = Inflector("Control")
+  return [
+      Instance(inflector, id_, Context(id_ % CONTEXTS_COUNT))
+      for id_ in range(objects_count)
+  ]
+
+
+def main():
+  """Print time of compiling permissions and checking every object."""
+  # pylint: disable=protected-access
+  objects_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+  instances = generate_instances(objects_count)
+  user_permissions = DefaultUserPermissions()
+  with app.test_request_context():
+    g._request_permissions = generate_permissions(objects_count)
+    start = time.time()
+    user_permissions._compiled_permissions()
+    compile_time = time.time() - start
+    start = time.time()
+    allowed = sum(
+        1 for instance in instances
+        if user_permissions.is_allowed_read_for(instance)
+    )
+    check_time = time.time() - start
+  print "Objects: {}, allowed: {}".format(objects_count, allowed)
+  print "Compile permissions: {:.4f}s".format(compile_time)
+  print "is_allowed_read_for: {:.4f}s ({:.2f}us per object)".format(
+      check_time, check_time * 1e6 / objects_count)
+
+
+if __name__ == "__main__":
+  main()
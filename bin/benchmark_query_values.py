@@ -0,0 +1,100 @@
+# Copyright (C) 2018 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Compare loading of /query "values" results by ids and in one statement.
+
+Usage:
+  python bin/benchmark_query_values.py [repeat]
+
+Tree view queries (first page of 10 objects sorted by title and the next page
+sorted by updated_at) for every object type of the tree view are run repeat
+times (10 by default) as a user with system wide read access. SQL statements
+and time of loading objects by ids after fetching ids and of loading them
+directly from the eager query are reported.
+"""
+
+import collections
+import copy
+import sys
+import time
+
+import sqlalchemy as sa
+from flask import g
+
+from ggrc import db
+from ggrc.app import app
+from ggrc.query.default_handler import DefaultHandler
+from ggrc.rbac import SystemWideRoles
+
+
+User = collections.namedtuple("User", "id system_wide_role")
+
+OBJECT_NAMES = ("Control", "Objective", "Risk", "Program", "Audit",
+                "Assessment", "Issue")
+TREE_VIEW_QUERIES = (
+    ("title", [0, 10]),
+    ("updated_at", [10, 20]),
+)
+
+
+class StatementCounter(object):
+  """Count SQL statements executed by the engine."""
+
+  def __init__(self):
+    self.count = 0
+    sa.event.listen(db.engine, "before_cursor_execute", self.increment)
+
+  def increment(self, *_):
+    self.count += 1
+
+
+def make_query(object_name, order_by, limit):
+  """Make tree view object query."""
+  return {
+      "object_name": object_name,
+      "type": "values",
+      "filters": {"expression": {}},
+      "order_by": [{"name": order_by, "desc": False}],
+      "limit": limit,
+  }
+
+
+def run_mode(counter, object_query, by_ids, repeat):
+  """Return statements count and duration of loading objects repeat times."""
+  # pylint: disable=protected-access
+  counter.count = 0
+  start = time.time()
+  for _ in range(repeat):
+    handler = DefaultHandler([copy.deepcopy(object_query)])
+    if by_ids:
+      objects = handler._get_objects_by_ids(handler.query[0])
+    else:
+      objects = handler._get_objects(handler.query[0])
+    db.session.expunge_all()
+  return counter.count / repeat, time.time() - start, len(objects)
+
+
+def main():
+  """Print statements count and time of both loading modes."""
+  # pylint: disable=protected-access
+  repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+  counter = StatementCounter()
+  print "{:<12} {:<11} {:>7} {:>11} {:>11} {:>11} {:>11}".format(
+      "Object", "Order by", "Objects", "Ids SQL", "Ids sec",
+      "Single SQL", "Single sec")
+  with app.test_request_context():
+    g._current_user = User(0, SystemWideRoles.SUPERUSER)
+    for object_name in OBJECT_NAMES:
+      for order_by, limit in TREE_VIEW_QUERIES:
+        object_query = make_query(object_name, order_by, limit)
+        ids_sql, ids_time, objects_count = run_mode(
+            counter, object_query, True, repeat)
+        single_sql, single_time, _ = run_mode(
+            counter, object_query, False, repeat)
+        print "{:<12} {:<11} {:>7} {:>11} {:>11.4f} {:>11} {:>11.4f}".format(
+            object_name, order_by, objects_count, ids_sql, ids_time,
+            single_sql, single_time)
+
+
+if __name__ == "__main__":
+  main()
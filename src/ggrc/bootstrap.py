@@ -74,6 +74,8 @@ def get_db():  # noqa
         del flask.g.user_creator_roles_cache
       from ggrc.models.hooks import acl
       acl.after_commit()
+      from ggrc.fulltext import reindex_queue
+      reindex_queue.schedule_drain()
 
   database.session.post_commit_hooks = post_commit_hooks
   database.session.pre_commit_hooks = pre_commit_hooks
@@ -24,6 +24,7 @@ class CacheManager:
                          before and after flush
     marked_for_<op>: dictionaries used in session event listeners after flush,
                      before and after commit
+    permissions_changed: flag if the commit changes inputs of user permissions
 
   Returns:
     None
@@ -52,6 +53,7 @@ class CacheManager:
     self.marked_for_add = {}
     self.marked_for_update = {}
     self.marked_for_delete = []
+    self.permissions_changed = True
 
   def get_collection(self, category, resource, filter):
     """Get collection from cache.
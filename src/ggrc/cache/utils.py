@@ -4,6 +4,7 @@
 """Common operations on cache managers."""
 
 import logging
+import time
 
 import flask
 
@@ -14,6 +15,22 @@ from ggrc import settings
 
 logger = logging.getLogger(__name__)
 
+# Memcache key of the counter that is changed on every permissions cache drop.
+# It is not listed in permissions:list so it survives the cache drops.
+PERMISSIONS_GENERATION_KEY = 'permissions:generation'
+
+# Types of objects permissions of users are loaded from. Relationships are
+# included because ACL entries are propagated over them.
+PERMISSIONS_INPUT_TYPES = frozenset([
+    "AccessControlList",
+    "AccessControlRole",
+    "Context",
+    "Person",
+    "Relationship",
+    "Role",
+    "UserRole",
+])
+
 
 def get_cache_manager():
   """Returns an instance of CacheManager."""
@@ -117,6 +134,8 @@ def update_memcache_before_commit(context, modified_objects, expiry_time):
     return
 
   context.cache_manager = get_cache_manager()
+  context.cache_manager.permissions_changed = permissions_inputs_changed(
+      modified_objects)
 
   if modified_objects is not None:
     if modified_objects.new:
@@ -189,10 +208,31 @@ def update_memcache_after_commit(context):
     if delete_result is not True:
       logger.error("CACHE: Failed to remove status entries from cache")
 
-  clear_permission_cache()
+  clear_permission_cache(
+      bump_generation=cache_manager.permissions_changed)
   cache_manager.clear_cache()
 
 
+def permissions_inputs_changed(modified_objects):
+  """Check if modified objects can change permissions of users.
+
+  Deleted objects take their ACL entries with them, so any deletion counts
+  as a change.
+
+  Args:
+    modified_objects: objects in cache maintained prior to committing to DB
+  Returns:
+    True if permissions of some users could have changed.
+  """
+  if modified_objects is None or modified_objects.deleted:
+    return True
+  return any(
+      obj.__class__.__name__ in PERMISSIONS_INPUT_TYPES
+      for objects in (modified_objects.new, modified_objects.dirty)
+      for obj in objects
+  )
+
+
 def build_cache_status(data, key, expiry_timeout, status):
   """
   Build the dictionary for storing operational status of cache
@@ -208,8 +248,44 @@ def build_cache_status(data, key, expiry_timeout, status):
   data[key] = {'expiry': expiry_timeout, 'status': status}
 
 
-def clear_permission_cache():
-  """Drop cached permissions for all users."""
+def _initial_permissions_generation():
+  """Get initial value of the permissions generation counter.
+
+  Counter can be evicted from memcache, so it is started from current time to
+  never repeat one of its previous values.
+  """
+  return int(time.time() * 1000)
+
+
+def get_permissions_generation(client):
+  """Get current permissions generation from memcache.
+
+  Args:
+    client: memcache client.
+  Returns:
+    Value of the permissions generation counter. The counter is initialized if
+    it is missing in memcache.
+  """
+  generation = client.get(PERMISSIONS_GENERATION_KEY)
+  if generation is None:
+    client.add(PERMISSIONS_GENERATION_KEY, _initial_permissions_generation())
+    generation = client.get(PERMISSIONS_GENERATION_KEY)
+  return generation
+
+
+def bump_permissions_generation(client):
+  """Invalidate permissions stored in local caches of all instances."""
+  client.incr(PERMISSIONS_GENERATION_KEY,
+              initial_value=_initial_permissions_generation())
+
+
+def clear_permission_cache(bump_generation=True):
+  """Drop cached permissions for all users.
+
+  Args:
+    bump_generation: also drop permissions stored in local caches of all
+                     instances.
+  """
   if not getattr(settings, 'MEMCACHE_MECHANISM', False):
     return
   client = get_cache_manager().cache_object.memcache_client
@@ -218,6 +294,8 @@ def clear_permission_cache():
   # We delete all the cached user permissions as well as
   # the permissions:list value itself
   client.delete_multi(cached_keys_set)
+  if bump_generation:
+    bump_permissions_generation(client)
 
 
 def clear_users_permission_cache(user_ids):
@@ -231,3 +309,4 @@ def clear_users_permission_cache(user_ids):
     if key in cached_keys_set:
       cached_keys_set.remove(key)
   client.set('permissions:list', cached_keys_set)
+  bump_permissions_generation(client)
@@ -3,6 +3,7 @@
 
 """Lists of ggrc contributions."""
 
+from ggrc.fulltext import reindex_queue
 from ggrc.integrations import synchronization_jobs
 from ggrc.models import import_export
 from ggrc.notifications import common
@@ -24,6 +25,7 @@ HOURLY_CRON_JOBS = [
 
 HALF_HOUR_CRON_JOBS = [
     fast_digest.send_notification,
+    reindex_queue.drain,
 ]
 
 NOTIFICATION_LISTENERS = [
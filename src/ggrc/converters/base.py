@@ -7,8 +7,11 @@ from collections import defaultdict
 
 from google.appengine.ext import deferred
 
+from ggrc import db
 from ggrc import login
 from ggrc import settings
+from ggrc.models import all_models
+from ggrc.models import import_export
 from ggrc.utils import benchmark
 from ggrc.utils import structures
 from ggrc.cache.memcache import MemCache
@@ -51,12 +54,81 @@ class ImportConverter(BaseConverter):
       "assessment_template",
   ]
 
-  def __init__(self, dry_run=True, csv_data=None):
+  def __init__(self, dry_run=True, csv_data=None, batch_size=None,
+               ie_job=None):
+    # pylint: disable=too-many-arguments
     self.dry_run = dry_run
     self.csv_data = csv_data or []
+    self.batch_size = batch_size or getattr(
+        settings, "IMPORT_COMMIT_BATCH_SIZE", 1)
+    self.ie_job = ie_job
+    self.revision_ids = []
+    self.attempts = 0
+    self.first_event_id = None
+    self._results_size = None
+    self._unsaved_results_size = None
     self.indexer = get_indexer()
     super(ImportConverter, self).__init__()
 
+  @property
+  def is_checkpointed(self):
+    """Check if import progress is stored on the import job."""
+    return not self.dry_run and self.ie_job is not None
+
+  def save_checkpoint(self, info, rows=None, event=None):
+    """Store import progress on the import job in the current transaction.
+
+    Progress holds only offsets and counters, so it is stored with every
+    commit. Infos of completed blocks and messages of the current block are
+    stored only when some of them were added. The event of the commit is
+    tagged with the import job, so revisions of the job can be found when it
+    is resumed.
+
+    Args:
+      info: info dict of the current block.
+      rows: number of processed rows of the current block or None if the
+        block is completed.
+      event: event with revisions of the current commit.
+    """
+    if not self.is_checkpointed:
+      return
+    if event is not None:
+      event.resource_type = self.ie_job.__class__.__name__
+      event.resource_id = self.ie_job.id
+      if self.first_event_id is None:
+        db.session.flush()
+        self.first_event_id = event.id
+    blocks = self.response_data
+    if rows is None:
+      blocks = blocks + [info]
+      info = None
+    messages = {}
+    counts = None
+    if info is not None:
+      messages = {key: info[key] for key in base_block.INFO_MESSAGE_KEYS}
+      counts = {key: info[key] for key in base_block.INFO_COUNT_KEYS}
+    results = None
+    results_size = (len(blocks),
+                    sorted((key, len(value)) for key, value
+                           in messages.iteritems()))
+    self._unsaved_results_size = None
+    if results_size != self._results_size:
+      results = {"blocks": blocks, "messages": messages}
+      self._unsaved_results_size = results_size
+    import_export.save_checkpoint(self.ie_job.id, {
+        "attempts": self.attempts,
+        "block": len(blocks),
+        "rows": rows or 0,
+        "counts": counts,
+        "event_id": self.first_event_id,
+    }, results)
+
+  def checkpoint_committed(self):
+    """Mark results stored with the last checkpoint as committed."""
+    if self._unsaved_results_size is not None:
+      self._results_size = self._unsaved_results_size
+      self._unsaved_results_size = None
+
   def get_info(self):
     return self.response_data
 
@@ -80,17 +152,53 @@ class ImportConverter(BaseConverter):
       yield block_converter
 
   def import_csv_data(self):
-    revision_ids = []
+    """Import all blocks of the csv file.
 
-    for converter in self.initialize_block_converters():
+    If a previous run of the import job was interrupted, blocks completed by
+    that run are not imported again and the import of the interrupted block
+    continues after its last committed row.
+    """
+    checkpoint, results = {}, {}
+    if self.is_checkpointed:
+      checkpoint, results = import_export.get_checkpoint(self.ie_job)
+    self.attempts = checkpoint.get("attempts", 0)
+    self.first_event_id = checkpoint.get("event_id")
+    completed_blocks = results.get("blocks", [])[:checkpoint.get("block", 0)]
+
+    for index, converter in enumerate(self.initialize_block_converters()):
+      if index < len(completed_blocks):
+        self.response_data.append(completed_blocks[index])
+        continue
+      if index == len(completed_blocks) and checkpoint.get("counts"):
+        converter.resume(checkpoint["rows"], checkpoint["counts"],
+                         results.get("messages", {}))
       if not converter.ignore:
         converter.import_csv_data()
-        revision_ids.extend(converter.revision_ids)
+        self.revision_ids.extend(converter.revision_ids)
       self.response_data.append(converter.get_info())
 
-    self._start_compute_attributes_job(revision_ids)
+    if checkpoint.get("event_id"):
+      self.revision_ids = self._get_job_revision_ids()
+    self._start_compute_attributes_job(self.revision_ids)
     self.drop_cache()
 
+  def _get_job_revision_ids(self):
+    """Get ids of revisions logged by all runs of the import job.
+
+    Revision ids are not stored with the checkpoint, so revisions of the
+    interrupted runs are found by events tagged with the import job since
+    the first commit of the job.
+    """
+    query = db.session.query(all_models.Revision.id).join(
+        all_models.Event,
+        all_models.Event.id == all_models.Revision.event_id,
+    ).filter(
+        all_models.Event.id >= self.first_event_id,
+        all_models.Event.resource_type == self.ie_job.__class__.__name__,
+        all_models.Event.resource_id == self.ie_job.id,
+    ).order_by(all_models.Revision.id)
+    return [revision_id for revision_id, in query]
+
   def _start_compute_attributes_job(self, revision_ids):
     if revision_ids:
       cur_user = login.get_current_user()
@@ -159,16 +267,31 @@ class ExportConverter(BaseConverter):
 
   def export_csv_data(self):
     """Export csv data."""
-    with benchmark("Initialize block converters."):
-      self.initialize_block_converters()
     with benchmark("Build csv data."):
       try:
-        return self.build_csv_from_row_data()
+        return "".join(self.export_csv_stream())
       except ValueError:
         return ""
 
+  def export_csv_stream(self):
+    """Export csv data as an iterator of csv strings.
+
+    Block converters are initialized right away, so object names are available
+    before the data is consumed. Csv data is generated lazily, one chunk of
+    rows at a time, so the whole file is never held in memory.
+    """
+    with benchmark("Initialize block converters."):
+      self.initialize_block_converters()
+    return self.build_csv_from_row_data()
+
   def build_csv_from_row_data(self):
-    """Export each block separated by empty lines."""
+    """Export each block separated by empty lines.
+
+    Yields:
+      csv strings with up to ROW_CHUNK_SIZE rows of a block each.
+    """
+    if not self.block_converters:
+      return
     table_width = max([converter.block_width
                        for converter in self.block_converters])
     table_width += 1  # One line for 'Object line' column
@@ -182,14 +305,16 @@ class ExportConverter(BaseConverter):
       csv_string_builder.append_line(csv_header[0])
       csv_string_builder.append_line(csv_header[1])
 
-      for line in block_converter.generate_row_data():
+      for index, line in enumerate(block_converter.generate_row_data(), 1):
         line.insert(0, "")
         csv_string_builder.append_line(line)
+        if index % base_block.ExportBlockConverter.ROW_CHUNK_SIZE == 0:
+          yield csv_string_builder.flush()
 
       csv_string_builder.append_line([])
       csv_string_builder.append_line([])
 
-    return csv_string_builder.get_csv_string()
+    yield csv_string_builder.flush()
 
   def _get_exportable_queries(self):
     """Get a list of filtered object queries regarding exportable items.
@@ -14,31 +14,44 @@ from collections import Counter
 
 from cached_property import cached_property
 import sqlalchemy as sa
+from sqlalchemy import exc
 from sqlalchemy import or_
 from sqlalchemy import and_
 from flask import _app_ctx_stack
 
 from ggrc import db
 from ggrc import models
+from ggrc import settings
 from ggrc.models import reflection
 from ggrc.rbac import permissions
 from ggrc.utils import benchmark
 from ggrc.utils import structures
 from ggrc.utils import list_chunks
 from ggrc.converters import errors
+from ggrc.converters import get_exportables
 from ggrc.converters import get_shared_unique_rules
 from ggrc.converters import base_row
+from ggrc.converters.handlers import handlers
 from ggrc.converters.import_helper import get_column_order
 from ggrc.converters.import_helper import get_object_column_definitions
 from ggrc.models.mixins import issue_tracker as issue_tracker_mixins
 from ggrc.models.exceptions import ReservedNameError
 from ggrc.services import signals
+from ggrc.services.common import get_modified_objects
+from ggrc.services.common import update_snapshot_index
+from ggrc.cache import utils as cache_utils
+from ggrc.utils.log_event import log_event
 from ggrc_workflows.models.cycle_task_group_object_task import \
     CycleTaskGroupObjectTask
 
 
 logger = getLogger(__name__)
 
+# Keys of counters and of row messages in import block info
+INFO_COUNT_KEYS = ("rows", "created", "updated", "ignored", "deleted",
+                   "deprecated")
+INFO_MESSAGE_KEYS = ("row_warnings", "row_errors")
+
 
 class BlockConverter(object):
   # pylint: disable=too-many-public-methods
@@ -185,10 +198,29 @@ class BlockConverter(object):
         id_column = getattr(model, "email")
       else:
         continue
-      query = db.session.query(model.id, id_column).filter(model.id.in_(ids))
-      id_map[object_type] = dict(query)
+      identifiers = self._get_identifiers_cache(object_type)
+      missing_ids = ids.difference(identifiers)
+      if missing_ids:
+        query = db.session.query(model.id, id_column).filter(
+            model.id.in_(missing_ids))
+        identifiers.update(query)
+      id_map[object_type] = identifiers
     return id_map
 
+  def _get_identifiers_cache(self, object_type):
+    """Get dict with user visible identifiers of objects by their ids.
+
+    Exported objects are not changed, so identifiers of objects mapped to
+    several blocks are shared by all blocks of the export and are fetched
+    only once. Imports get a new dict for every block.
+    """
+    if self.operation != "export":
+      return {}
+    shared_state = self.converter.shared_state
+    if "identifiers" not in shared_state:
+      shared_state["identifiers"] = defaultdict(dict)
+    return shared_state["identifiers"][object_type]
+
   def _create_mapping_cache(self):
     """Create mapping cache for object in the current block."""
 
@@ -367,7 +399,339 @@ class ImportBlockConverter(BlockConverter):
     self.converter = converter
     self.unique_values = self.get_unique_values_dict(self.object_class)
     self.revision_ids = []
+    self.pending_rows = []
+    self.processed_rows = 0
     self._import_info = self._make_empty_info()
+    self._objects_by_slug_cache = None
+    self._options_cache = None
+    self._categories_cache = None
+    self._people_prefetched = False
+    self._existing_unique_values = None
+
+  @property
+  def is_batched(self):
+    """Check if rows of the block are committed in batches.
+
+    Audits are always committed row by row, because snapshots of imported
+    audits are created with their own event.
+    """
+    return (not self.converter.dry_run and
+            self.converter.batch_size > 1 and
+            self.object_class is not models.Audit)
+
+  def add_pending_row(self, row):
+    """Add flushed row to the current batch.
+
+    Rows are stored with their index in the block, so that a row of a failed
+    batch can be committed with a checkpoint at its own position.
+    """
+    self.pending_rows.append((self.processed_rows, row))
+
+  def commit_pending_rows(self):
+    """Commit all flushed rows of the current batch.
+
+    Revisions of all rows are logged with a single event and signals, cache
+    updates and snapshot reindex are handled once for the whole batch.
+    """
+    rows, self.pending_rows = self.pending_rows, []
+    if not rows:
+      return
+    try:
+      modified_objects = get_modified_objects(db.session)
+      import_event = log_event(db.session, None)
+      cache_utils.update_memcache_before_commit(
+          self,
+          modified_objects,
+          self.CACHE_EXPIRY_IMPORT,
+      )
+      for _, row in rows:
+        row.check_before_commit_signals(import_event)
+      self.save_checkpoint(import_event)
+      db.session.commit_hooks_enable_flag.disable()
+      db.session.commit()
+      self.converter.checkpoint_committed()
+      self._store_revision_ids(import_event)
+      cache_utils.update_memcache_after_commit(self)
+      update_snapshot_index(modified_objects)
+    except exc.SQLAlchemyError as err:
+      db.session.rollback()
+      logger.exception("Import of a batch failed with: %s", err.message)
+      self.commit_rows_one_by_one(rows)
+    else:
+      for _, row in rows:
+        row.send_post_commit_signals(event=import_event)
+
+  def commit_rows_one_by_one(self, rows):
+    """Commit rows of a failed batch one by one.
+
+    The rollback of the batch dropped changes of all its rows, so every row is
+    set up, flushed and committed again on its own and only the rows that
+    fail are reported. Counts of the rows are updated with the outcome of
+    their own commit.
+
+    Args:
+      rows: list of tuples of row index in the block and row converter.
+    """
+    processed_rows = self.processed_rows
+    for _, row in rows:
+      self._count_row(self._import_info, row, step=-1)
+    try:
+      for index, row in rows:
+        self.processed_rows = index
+        row.commit_alone()
+        self._update_info(row)
+    finally:
+      self.processed_rows = processed_rows
+
+  def drop_pending_rows(self):
+    """Report rows of the current batch that were not committed."""
+    rows, self.pending_rows = self.pending_rows, []
+    for _, row in rows:
+      self._count_row(self._import_info, row, step=-1)
+      row.add_error(errors.UNKNOWN_ERROR)
+      self._update_info(row)
+
+  def resume(self, rows, counts, messages):
+    """Continue the import of the block interrupted in a previous run.
+
+    Args:
+      rows: number of rows processed before the last commit.
+      counts: block info counters stored with the last commit.
+      messages: row messages of the block stored with the last commit.
+    """
+    self.processed_rows = rows
+    for key in INFO_COUNT_KEYS:
+      self._import_info[key] = counts[key]
+    self.row_errors.extend(messages.get("row_errors", []))
+    self.row_warnings.extend(messages.get("row_warnings", []))
+
+  def save_checkpoint(self, event=None, row=None):
+    """Store progress of the block in the transaction of the current commit.
+
+    Args:
+      event: event with revisions of the current commit.
+      row: row converter that is committed but not counted in block info yet.
+    """
+    if not self.converter.is_checkpointed:
+      return
+    info = self.get_info()
+    rows = self.processed_rows
+    if row is not None:
+      self._count_row(info, row)
+      rows += 1
+    self.converter.save_checkpoint(info, rows, event)
+
+  def _iter_column_values(self, handler_class):
+    """Get values of all columns handled by handler_class or its subclasses.
+
+    Yields:
+      tuples of header key, header dict and list of raw cell values of the
+      column in all rows of the block.
+    """
+    for idx, (key, header) in enumerate(self.headers.iteritems()):
+      if not issubclass(header["handler"], handler_class):
+        continue
+      values = [row[idx] for row in self.rows or [] if len(row) > idx]
+      yield key, header, values
+
+  @staticmethod
+  def _split_lines(values):
+    """Get set of stripped lowercase lines from multi line cell values."""
+    return {
+        line.strip().lower()
+        for value in values
+        for line in value.splitlines()
+        if line.strip()
+    }
+
+  def _create_objects_by_slug_cache(self):
+    """Fetch objects referenced by slugs in all rows of the block.
+
+    Slugs of block objects, their parents and mapped objects are collected in
+    one pass over the block and fetched with one query per model chunk.
+
+    Returns:
+      dict with models as keys and dicts of objects by lowercase slugs as
+      values.
+    """
+    exportables = get_exportables()
+    slugs = defaultdict(set)
+    for key, header, values in self._iter_column_values(
+        handlers.ColumnHandler):
+      handler = header["handler"]
+      if key == "slug":
+        model = self.object_class
+      elif issubclass(handler, handlers.MappingColumnHandler):
+        model = exportables.get(header.get("attr_name", ""))
+      elif issubclass(handler, handlers.ParentColumnHandler):
+        model = handler.parent
+      else:
+        continue
+      if model is None or not hasattr(model, "slug"):
+        continue
+      slugs[model].update(self._split_lines(values))
+
+    cache = {}
+    for model, model_slugs in slugs.iteritems():
+      cache[model] = {}
+      for slugs_chunk in list_chunks(list(model_slugs)):
+        query = model.query.filter(model.slug.in_(slugs_chunk))
+        cache[model].update((obj.slug.lower(), obj) for obj in query)
+    return cache
+
+  def get_object_by_slug(self, model, slug):
+    """Get existing object by slug from the block cache.
+
+    Models that are not referenced by block columns are queried directly.
+    """
+    if self._objects_by_slug_cache is None:
+      with benchmark("Prefetch objects by slug"):
+        self._objects_by_slug_cache = self._create_objects_by_slug_cache()
+    if model not in self._objects_by_slug_cache:
+      return model.query.filter_by(slug=slug).first()
+    return self._objects_by_slug_cache[model].get(slug.strip().lower())
+
+  def _create_options_cache(self):
+    """Fetch options for all option columns of the block.
+
+    Returns:
+      dict of options by (role, lowercase title).
+    """
+    roles = set()
+    for key, _, _ in self._iter_column_values(handlers.OptionColumnHandler):
+      roles.add(key)
+      roles.add("{}_{}".format(self.table_singular, key))
+    if not roles:
+      return {}
+    options = models.Option.query.filter(models.Option.role.in_(roles))
+    return {(option.role, option.title.strip().lower()): option
+            for option in options}
+
+  def get_option(self, roles, title):
+    """Get option with title for any of the roles."""
+    if self._options_cache is None:
+      self._options_cache = self._create_options_cache()
+    for role in roles:
+      option = self._options_cache.get((role, title.strip().lower()))
+      if option:
+        return option
+    return None
+
+  def get_categories(self, category_type, names):
+    """Get categories of category_type with the given names."""
+    if self._categories_cache is None:
+      self._categories_cache = {}
+    if category_type not in self._categories_cache:
+      self._categories_cache[category_type] = models.CategoryBase.query.filter(
+          models.CategoryBase.type == category_type
+      ).all()
+    lower_names = {name.strip().lower() for name in names}
+    return [category for category in self._categories_cache[category_type]
+            if category.name.strip().lower() in lower_names]
+
+  def prefetch_people(self):
+    """Fetch all people referenced by user columns of the block.
+
+    Found people are stored in the converter's new_objects cache which is
+    used by user column handlers. With integration service people can be
+    created on lookup, so they are still looked up one by one.
+    """
+    if self._people_prefetched:
+      return
+    self._people_prefetched = True
+    if settings.INTEGRATION_SERVICE_URL:
+      return
+    from ggrc.utils import user_generator
+    emails = set()
+    for _, _, values in self._iter_column_values(handlers.UserColumnHandler):
+      emails.update(self._split_lines(values))
+    people_cache = self.converter.new_objects[models.Person]
+    emails = [email for email in emails
+              if email not in people_cache and
+              not user_generator.is_external_app_user_email(email)]
+    if not emails:
+      return
+    with benchmark("Prefetch people"):
+      found = {}
+      for emails_chunk in list_chunks(emails):
+        for person in user_generator.find_users(emails_chunk):
+          found[person.email.lower()] = person
+      for email in emails:
+        people_cache[email] = found.get(email)
+
+  @staticmethod
+  def _unique_value_key(value):
+    """Normalize value of unique column for case insensitive comparison."""
+    return unicode(value).strip().lower()
+
+  def _create_existing_unique_values(self):
+    """Load ids of existing objects with values of the block unique columns.
+
+    Values are loaded from tables of all models that share unique values with
+    the block model, with one IN query per column and values chunk.
+
+    Returns:
+      dict with column keys as keys and dicts of sets of object ids by
+      normalized values as values.
+    """
+    sharing_rules = get_shared_unique_rules()
+    classes = sharing_rules.get(self.object_class, (self.object_class,))
+    tables = {model.__table__ for model in classes}
+    existing_values = {}
+    for key, header, values in self._iter_column_values(
+        handlers.ColumnHandler):
+      if not header["unique"]:
+        continue
+      clean_whitespaces = handlers.TextColumnHandler.clean_whitespaces
+      lookup_values = set()
+      for value in values:
+        value = value.strip()
+        if value:
+          lookup_values.add(value)
+          lookup_values.add(clean_whitespaces(value))
+      existing_values[key] = defaultdict(set)
+      for table in tables:
+        if key not in table.c:
+          continue
+        column = table.c[key]
+        for values_chunk in list_chunks(list(lookup_values)):
+          query = db.session.query(table.c.id, column).filter(
+              column.in_(values_chunk))
+          for id_, value in query:
+            existing_values[key][self._unique_value_key(value)].add(id_)
+    return existing_values
+
+  def has_existing_unique_value(self, key, value, obj_id):
+    """Check if an object other than obj_id already has the unique value."""
+    if self._existing_unique_values is None:
+      with benchmark("Load existing unique values"):
+        self._existing_unique_values = self._create_existing_unique_values()
+    if key not in self._existing_unique_values:
+      return False
+    ids = self._existing_unique_values[key].get(
+        self._unique_value_key(value), set())
+    return bool(ids - {obj_id})
+
+  def update_existing_unique_values(self, row):
+    """Move preloaded unique values of the row object to its new values.
+
+    Values released by an imported row are free for the following rows, as
+    they are for the database once the row is committed.
+    """
+    if self._existing_unique_values is None or row.ignore or not row.obj:
+      return
+    obj_id = row.obj.id
+    if obj_id is None:
+      return
+    for key, ids_by_value in self._existing_unique_values.iteritems():
+      old_value = getattr(row.initial_state, key, None)
+      new_value = None if row.is_delete else getattr(row.obj, key, None)
+      if old_value == new_value:
+        continue
+      if old_value:
+        ids_by_value[self._unique_value_key(old_value)].discard(obj_id)
+      if new_value:
+        ids_by_value[self._unique_value_key(new_value)].add(obj_id)
 
   def check_block_restrictions(self):
     """Check some block related restrictions"""
@@ -405,7 +769,8 @@ class ImportBlockConverter(BlockConverter):
     """ Generate a row converter object for every csv row """
     if self.ignore:
       return
-    for i, row in enumerate(self.rows):
+    start = self.processed_rows
+    for i, row in enumerate(self.rows[start:], start):
       line = self.csv_lines[i]
       yield base_row.ImportRowConverter(self, self.object_class, row=row,
                                         headers=self.headers, line=line)
@@ -435,15 +800,26 @@ class ImportBlockConverter(BlockConverter):
         except Exception:  # pylint: disable=broad-except
           row.add_error(errors.UNKNOWN_ERROR)
           logger.exception("Unexpected error on import")
+        self.update_existing_unique_values(row)
         self._update_info(row)
+        self.processed_rows += 1
+        if len(self.pending_rows) >= self.converter.batch_size:
+          self.commit_pending_rows()
         _app_ctx_stack.top.sqlalchemy_queries = []
+      self.commit_pending_rows()
     except Exception:  # pylint: disable=broad-except
       logger.exception("Unexpected error on import")
     finally:
       db.session.commit_hooks_enable_flag.enable()
+      if not self.converter.dry_run:
+        # Changes that are flushed but not committed have no revisions logged
+        self.drop_pending_rows()
+        db.session.rollback()
       is_final_commit_required = not (self.converter.dry_run or self.ignore)
       if is_final_commit_required:
+        self.converter.save_checkpoint(self.get_info())
         db.session.commit()
+        self.converter.checkpoint_committed()
 
   def get_unique_values_dict(self, object_class):
     """Get the varible to storing row numbers for unique values.
@@ -507,18 +883,26 @@ class ImportBlockConverter(BlockConverter):
 
   def _update_info(self, row):
     """Update counts for info response from row metadata."""
-    self._import_info["rows"] += 1
+    self._count_row(self._import_info, row)
+
+  @staticmethod
+  def _count_row(info, row, step=1):
+    """Add row metadata to counts of the info dict.
+
+    Negative step removes a row that was counted before.
+    """
+    info["rows"] += step
     if row.ignore:
-      self._import_info["ignored"] += 1
+      info["ignored"] += step
     elif row.is_delete:
-      self._import_info["deleted"] += 1
+      info["deleted"] += step
     elif row.is_new:
-      self._import_info["created"] += 1
+      info["created"] += step
     else:
-      self._import_info["updated"] += 1
+      info["updated"] += step
 
     if row.is_deprecated:
-      self._import_info["deprecated"] += 1
+      info["deprecated"] += step
 
 
 class ExportBlockConverter(BlockConverter):
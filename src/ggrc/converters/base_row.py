@@ -165,6 +165,8 @@ class ImportRowConverter(RowConverter):
                      column_names=", ".join(missing))
 
   def find_by_key(self, key, value):
+    if key == "slug":
+      return self.block_converter.get_object_by_slug(self.object_class, value)
     return self.object_class.query.filter_by(**{key: value}).first()
 
   def get_value(self, key):
@@ -256,6 +258,42 @@ class ImportRowConverter(RowConverter):
       return
     if self.block_converter.ignore:
       return
+    if self.block_converter.is_batched:
+      self.flush_object_in_savepoint()
+      return
+    self.flush_object()
+    self.setup_secondary_objects()
+    self.commit_object()
+
+  def flush_object_in_savepoint(self):
+    """Flush the row in a savepoint and leave the commit to the block.
+
+    Changes of a row that fails are rolled back to the savepoint, so they do
+    not affect other rows of the same batch. Valid rows are committed by the
+    block converter once the batch is full.
+    """
+    savepoint = db.session.begin_nested()
+    try:
+      self.flush_object()
+      self.setup_secondary_objects()
+    except:  # pylint: disable=bare-except
+      if savepoint.is_active:
+        savepoint.rollback()
+      raise
+    if self.ignore:
+      if savepoint.is_active:
+        savepoint.rollback()
+      return
+    savepoint.commit()
+    self.block_converter.add_pending_row(self)
+
+  def commit_alone(self):
+    """Set up, flush and commit the row on its own.
+
+    Used for rows of a batch that failed to commit. The rollback of the batch
+    dropped the changes of the row, so they are applied again.
+    """
+    self.setup_object()
     self.flush_object()
     self.setup_secondary_objects()
     self.commit_object()
@@ -314,15 +352,11 @@ class ImportRowConverter(RowConverter):
           modified_objects,
           self.block_converter.CACHE_EXPIRY_IMPORT,
       )
-      try:
-        self.send_before_commit_signals(import_event)
-      except StatusValidationError as exp:
-        status_alias = self.headers.get("status", {}).get("display_name")
-        self.add_error(errors.VALIDATION_ERROR,
-                       column_name=status_alias,
-                       message=exp.message)
+      self.check_before_commit_signals(import_event)
+      self.block_converter.save_checkpoint(import_event, row=self)
       db.session.commit_hooks_enable_flag.disable()
       db.session.commit()
+      self.block_converter.converter.checkpoint_committed()
       self.block_converter._store_revision_ids(import_event)
       cache_utils.update_memcache_after_commit(self.block_converter)
       update_snapshot_index(modified_objects)
@@ -372,6 +406,16 @@ class ImportRowConverter(RowConverter):
           self.object_class, obj=self.obj, src={}, service=service_class,
           event=event)
 
+  def check_before_commit_signals(self, event=None):
+    """Send before commit signals and report status validation errors."""
+    try:
+      self.send_before_commit_signals(event)
+    except StatusValidationError as exp:
+      status_alias = self.headers.get("status", {}).get("display_name")
+      self.add_error(errors.VALIDATION_ERROR,
+                     column_name=status_alias,
+                     message=exp.message)
+
   def send_before_commit_signals(self, event=None):
     """Send before commit signals for all objects.
 
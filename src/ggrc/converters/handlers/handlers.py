@@ -8,9 +8,6 @@ from datetime import date
 from datetime import datetime
 from dateutil.parser import parse
 
-from sqlalchemy import and_
-from sqlalchemy import or_
-
 from ggrc import db
 from ggrc.converters import errors
 from ggrc.converters import get_exportables
@@ -72,11 +69,8 @@ class ColumnHandler(object):
     if self.is_duplicate:
       # a hack to avoid two different errors for the same non-unique cell
       return
-    nr_duplicates = self.row_converter.object_class.query.filter(and_(
-        getattr(self.row_converter.object_class, self.key) == self.value,
-        self.row_converter.object_class.id != self.row_converter.obj.id
-    )).count()
-    if nr_duplicates > 0:
+    if self.row_converter.block_converter.has_existing_unique_value(
+        self.key, self.value, self.row_converter.obj.id):
       self.add_error(
           errors.DUPLICATE_VALUE, column_name=self.key, value=self.value
       )
@@ -245,6 +239,7 @@ class UserColumnHandler(ColumnHandler):
 
   def get_person(self, email):
     from ggrc.utils import user_generator
+    self.row_converter.block_converter.prefetch_people()
     new_objects = self.row_converter.block_converter.converter.new_objects
     if email not in new_objects[all_models.Person]:
       try:
@@ -468,8 +463,9 @@ class MappingColumnHandler(ColumnHandler):
     slugs = set([slug.lower() for slug in lines if slug.strip()])
     objects = []
 
+    block_converter = self.row_converter.block_converter
     for slug in slugs:
-      obj = class_.query.filter_by(slug=slug).first()
+      obj = block_converter.get_object_by_slug(class_, slug)
       if obj:
         is_allowed_by_type = self._is_allowed_mapping_by_type(
             source_type=self.row_converter.obj.__class__.__name__,
@@ -605,14 +601,8 @@ class OptionColumnHandler(ColumnHandler):
     prefixed_key = "{}_{}".format(
         self.row_converter.object_class._inflector.table_singular, self.key
     )
-    item = all_models.Option.query.filter(
-        and_(
-            all_models.Option.title == self.raw_value,
-            or_(all_models.Option.role == self.key,
-                all_models.Option.role == prefixed_key)
-        )
-    ).first()
-    return item
+    return self.row_converter.block_converter.get_option(
+        (self.key, prefixed_key), self.raw_value)
 
   def get_value(self):
     option = getattr(self.row_converter.obj, self.key, None)
@@ -637,7 +627,8 @@ class ParentColumnHandler(ColumnHandler):
     slug = self.raw_value
     obj = self.new_objects.get(self.parent, {}).get(slug)
     if obj is None:
-      obj = self.parent.query.filter(self.parent.slug == slug).first()
+      obj = self.row_converter.block_converter.get_object_by_slug(
+          self.parent, slug)
     if obj is None:
       self.add_error(
           errors.UNKNOWN_OBJECT,
@@ -692,7 +683,8 @@ class RequirementDirectiveColumnHandler(MappingColumnHandler):
   def get_directive_from_slug(self, directive_class, slug):
     if slug in self.new_objects[directive_class]:
       return self.new_objects[directive_class][slug]
-    return directive_class.query.filter_by(slug=slug).first()
+    return self.row_converter.block_converter.get_object_by_slug(
+        directive_class, slug)
 
   def parse_item(self):
     """ get a directive from slug """
@@ -855,12 +847,8 @@ class CategoryColumnHandler(ColumnHandler):
     """Parse cell item."""
     names = [v.strip() for v in self.raw_value.split("\n")]
     names = [name for name in names if name != ""]
-    categories = all_models.CategoryBase.query.filter(
-        and_(
-            all_models.CategoryBase.name.in_(names),
-            all_models.CategoryBase.type == self.category_base_type
-        )
-    ).all()
+    categories = self.row_converter.block_converter.get_categories(
+        self.category_base_type, names)
     category_names = set([c.name.strip() for c in categories])
     for name in names:
       if name not in category_names:
@@ -81,14 +81,22 @@ def generate_csv_string(csv_data):
 
 
 def extract_relevant_data(csv_data):
-  """ Split csv data into data and metadata """
-  striped_data = [[unicode.strip(c) for c in line]
-                  for line in csv_data]  # noqa
-  transpose_data = zip(*striped_data[1:])
-  non_empty = [d for d in transpose_data if any(d)]
-  data = zip(*non_empty[1:])
-  column_definitions = list(data.pop(0))
-  data = [list(d) for d in data]
+  """ Split csv data into data and metadata
+
+  The first line and the first non empty column of the block are skipped and
+  so are the columns without any values. Cells are stripped while the result
+  is built, so the block is copied only once.
+  """
+  lines = csv_data[1:]
+  width = min(len(line) for line in lines) if lines else 0
+  columns = [
+      idx for idx in xrange(width)
+      if any(line[idx].strip() for line in lines)
+  ][1:]
+  if not columns:
+    return [], []
+  data = [[line[idx].strip() for idx in columns] for line in lines]
+  column_definitions = data.pop(0)
   return column_definitions, data
 
 
@@ -158,6 +166,15 @@ def read_csv_file(csv_file):
   return [row for row in csv_reader(csv_file)]
 
 
+def iter_csv_file(csv_file):
+  """Lazily read rows of the csv file.
+
+  Unlike read_csv_file, rows are parsed on demand, so converters that handle
+  the file block by block hold only the current block in memory.
+  """
+  return csv_reader(csv_file)
+
+
 def utf_8_encode_array(array):
   """ encode 2D array to utf8 """
   return [[val.encode("utf-8") for val in line] for line in array]
@@ -278,3 +295,10 @@ class CsvStringBuilder(object):
   def get_csv_string(self):
     """Returns CSV string from buffer."""
     return self.output_buffer.getvalue()
+
+  def flush(self):
+    """Returns CSV string from buffer and empties the buffer."""
+    csv_string = self.output_buffer.getvalue()
+    self.output_buffer.seek(0)
+    self.output_buffer.truncate()
+    return csv_string
@@ -9,11 +9,14 @@ from collections import defaultdict
 from collections import OrderedDict
 
 from cached_property import cached_property
+from sqlalchemy import orm
 
 from ggrc import db
 from ggrc import models
 from ggrc import utils
 from ggrc.utils import benchmark
+from ggrc.models.custom_attribute_definition import \
+    get_model_name_inflector_dict
 from ggrc.models.reflection import AttributeInfo
 
 logger = logging.getLogger(__name__)
@@ -26,6 +29,9 @@ class SnapshotBlockConverter(object):
   # export or not
   MAPPINGS_KEY = "mappings"
 
+  # Number of snapshots which revision content is held in memory at once
+  CHUNK_SIZE = 500
+
   DATE_FIELDS = {
       "start_date",
       "end_date",
@@ -63,6 +69,9 @@ class SnapshotBlockConverter(object):
     self.converter = converter
     self.ids = ids
     self.fields = fields or []
+    self._stub_cache = {}
+    self._complete_stub_models = set()
+    self._access_control_map = {}
 
   @property
   def name(self):
@@ -120,37 +129,95 @@ class SnapshotBlockConverter(object):
       content.update(self._generate_mapping_content(snapshot))
     return content
 
-  @cached_property
-  def snapshots(self):
-    """List of all snapshots in the current block.
+  def _load_snapshots(self, ids):
+    """Load snapshots with given ids ordered by id.
 
     The content of the given snapshots also contains the mapped audit field.
     """
-    with benchmark("Gather selected snapshots"):
-      if not self.ids:
-        return []
-      snapshots = models.Snapshot.eager_query().filter(
-          models.Snapshot.id.in_(self.ids)
-      ).all()
+    query = models.Snapshot.query.options(
+        orm.joinedload("revision"),
+    ).filter(
+        models.Snapshot.id.in_(ids)
+    ).order_by(
+        models.Snapshot.id
+    )
+    if self.MAPPINGS_KEY in self.fields:
+      query = query.options(
+          orm.subqueryload("related_sources"),
+          orm.subqueryload("related_destinations"),
+      )
+    snapshots = query.all()
+    for snapshot in snapshots:  # add special snapshot attribute
+      snapshot.content = self._extend_revision_content(snapshot)
+    return snapshots
 
-      for snapshot in snapshots:  # add special snapshot attribute
-        snapshot.content = self._extend_revision_content(snapshot)
-      return snapshots
+  def _iter_snapshot_chunks(self):
+    """Load snapshots of the block in chunks of CHUNK_SIZE.
+
+    Stubs and access control lists are resolved for every chunk with bulk
+    queries, so only revision content of the current chunk is held in memory.
+    """
+    for ids in utils.list_chunks(sorted(self.ids), self.CHUNK_SIZE):
+      with benchmark("Gather snapshots chunk"):
+        snapshots = self._load_snapshots(ids)
+        self._update_stub_cache(snapshots)
+        self._access_control_map = self._get_access_control_map(snapshots)
+      yield snapshots
+
+  def _query_chunks(self, *columns):
+    """Query given snapshot columns for all ids of the block in chunks."""
+    for ids in utils.list_chunks(self.ids, self.CHUNK_SIZE):
+      for row in db.session.query(*columns).filter(
+          models.Snapshot.id.in_(ids)
+      ).distinct():
+        yield row
 
   @cached_property
   def child_type(self):
     """Name of snapshot object types."""
-    child_types = {snapshot.child_type for snapshot in self.snapshots}
+    child_types = {
+        child_type
+        for child_type, in self._query_chunks(models.Snapshot.child_type)
+    }
     assert len(child_types) <= 1
     return child_types.pop() if child_types else ""
 
+  @cached_property
+  def _custom_attribute_definitions(self):
+    """Get json of all custom attribute definitions of snapshotted objects.
+
+    Revision content of a snapshot contains the current global and local
+    custom attribute definitions of the object, so they are queried directly
+    instead of reading them from the content of every revision.
+    """
+    model = models.get_model(self.child_type)
+    if not model or not issubclass(model, models.mixins.CustomAttributable):
+      return []
+    definition_type = get_model_name_inflector_dict()[self.child_type]
+    if not definition_type:
+      return []
+    cad = models.all_models.CustomAttributeDefinition
+    child_ids = sorted({
+        child_id
+        for child_id, in self._query_chunks(models.Snapshot.child_id)
+    })
+    cads = cad.query.filter(
+        cad.definition_type == definition_type,
+        cad.definition_id.is_(None),
+    ).all()
+    for ids in utils.list_chunks(child_ids, self.CHUNK_SIZE):
+      cads.extend(cad.query.filter(
+          cad.definition_type == definition_type,
+          cad.definition_id.in_(ids),
+      ))
+    return [definition.log_json() for definition in cads]
+
   @cached_property
   def _cad_map(self):
     """Get id to cad mapping for all cad ordered by title."""
     cad_map = {}
-    for snap in self.snapshots:
-      for cad in snap.content.get("custom_attribute_definitions", []):
-        cad_map[cad["id"]] = cad
+    for cad in self._custom_attribute_definitions:
+      cad_map[cad["id"]] = cad
     return OrderedDict(
         sorted(cad_map.iteritems(), key=lambda x: x[1]["title"])
     )
@@ -182,7 +249,8 @@ class SnapshotBlockConverter(object):
     orderd_keys = AttributeInfo.get_column_order(name_map.keys())
     return OrderedDict((key, name_map[key]) for key in orderd_keys)
 
-  def _gather_stubs(self):
+  @staticmethod
+  def _gather_stubs(snapshots):
     """Gather all possible stubs from snapshot contents.
 
     Returns:
@@ -199,43 +267,49 @@ class SnapshotBlockConverter(object):
           stubs[value["type"]].add(value["id"])
         for val in value.values():
           walk(val, stubs)
-    for snapshot in self.snapshots:
+    for snapshot in snapshots:
       walk(snapshot.content, stubs)
     return stubs
 
-  @cached_property
-  def _stub_cache(self):
-    """Generate cache for all stubbed values."""
+  def _update_stub_cache(self, snapshots):
+    """Add all stubbed values of given snapshots to the stub cache.
+
+    Only ids missing in the cache are queried. Missing objects are cached with
+    an empty value, so they are not queried again for the next chunks.
+    """
     id_map = {
         "Person": "email",
         "Option": "title",
     }
     id_map.update(self.EXTRA_CACHE_MODELS)
-    stubs = self._gather_stubs()
+    stubs = self._gather_stubs(snapshots)
     stubs.update({model: None for model in self.EXTRA_CACHE_MODELS})
-    cache = {}
     for model_name, ids in stubs.iteritems():
-      with benchmark("Generate snapshot cache for: {}".format(model_name)):
-        model = getattr(models.all_models, model_name, None)
-        attr_name = id_map.get(model_name, "slug")
-        if not hasattr(model, attr_name):
+      if model_name in self._complete_stub_models:
+        continue
+      model = getattr(models.all_models, model_name, None)
+      attr_name = id_map.get(model_name, "slug")
+      if not hasattr(model, attr_name):
+        continue
+      cache = self._stub_cache.setdefault(model_name, {})
+      query = db.session.query(model.id, getattr(model, attr_name))
+      if ids is None:
+        self._complete_stub_models.add(model_name)
+      else:
+        ids = ids.difference(cache)
+        if not ids:
           continue
-        attr = getattr(model, attr_name)
-        query = db.session.query(model.id, attr)
-        if ids:
-          model_count = model.query.count()
-          if len(ids) < model_count / 2:
-            query = query.filter(model.id.in_(ids))
-        cache[model_name] = dict(query)
-    return cache
+        cache.update((id_, u"") for id_ in ids)
+        query = query.filter(model.id.in_(ids))
+      with benchmark("Generate snapshot cache for: {}".format(model_name)):
+        cache.update(query)
 
-  @cached_property
-  def _access_control_map(self):
+  def _get_access_control_map(self, snapshots):
     """Get AC role name to person emails mapping."""
     acr = self._stub_cache.get("AccessControlRole", {})
     people = self._stub_cache.get("Person", {})
     _access_control_map = {}
-    for snap in self.snapshots:
+    for snap in snapshots:
       _access_control_map[snap.content["id"]] = defaultdict(list)
       for acl in snap.content.get("access_control_list", []):
         if acl["ac_role_id"] not in acr:
@@ -342,23 +416,18 @@ class SnapshotBlockConverter(object):
     content = snapshot.content
     return self._obj_attr_line(content) + self._cav_attr_line(content)
 
-  @property
-  def _body_list(self):
-    """Get 2D representation of CSV content."""
-    return [
-        self._content_line_list(snapshot)
-        for snapshot in self.snapshots
-    ] or [[]]
-
   def generate_csv_header(self):
     return self._header_list
 
   def generate_row_data(self):
     """Get 2D list representing the CSV file."""
-    if not self.snapshots:
+    is_empty = True
+    for snapshots in self._iter_snapshot_chunks():
+      for snapshot in snapshots:
+        is_empty = False
+        yield self._content_line_list(snapshot)
+    if is_empty:
       yield []
-    for snapshot in self.snapshots:
-      yield self._content_line_list(snapshot)
 
   @property
   def block_width(self):
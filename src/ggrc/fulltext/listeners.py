@@ -14,6 +14,7 @@ from ggrc import fulltext
 from ggrc import utils
 from ggrc.models import all_models, get_model
 from ggrc.fulltext import mixin
+from ggrc.fulltext import reindex_queue
 from ggrc.utils import benchmark, helpers
 
 ACTIONS = ['after_insert', 'after_delete', 'after_update']
@@ -54,6 +55,10 @@ class ReindexSet(threading.local):
     """Function that clear and push new full text records in DB."""
     with benchmark("push ft records into DB"):
       self.warmup()
+      if reindex_queue.is_deferred():
+        reindex_queue.push(self.model_ids_to_reindex)
+        self.model_ids_to_reindex.clear()
+        return
       for obj in db.session:
         if not isinstance(obj, mixin.Indexed):
           continue
@@ -63,7 +68,8 @@ class ReindexSet(threading.local):
         ids = self.model_ids_to_reindex.pop(model_name)
         chunk_list = utils.list_chunks(list(ids), chunk_size=self.CHUNK_SIZE)
         for ids_chunk in chunk_list:
-          get_model(model_name).bulk_record_update_for(ids_chunk)
+          get_model(model_name).bulk_record_update_for(ids_chunk,
+                                                       use_diff=True)
 
 
 def _runner(mapper, content, target):  # pylint:disable=unused-argument
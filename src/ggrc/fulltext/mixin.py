@@ -1,9 +1,10 @@
 # Copyright (C) 2018 Google Inc.
 # Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
 """Module contains Indexed mixin class"""
+import collections
 import itertools
-from collections import namedtuple
 
+import sqlalchemy as sa
 from sqlalchemy import orm
 
 from ggrc import db
@@ -12,7 +13,12 @@ from ggrc import fulltext
 from ggrc import utils
 
 
-class ReindexRule(namedtuple("ReindexRule", ["model", "rule", "fields"])):
+# Cache of plain column fulltext attributes by model name
+_PLAIN_COLUMN_ATTRS = {}
+
+
+class ReindexRule(collections.namedtuple("ReindexRule",
+                                         ["model", "rule", "fields"])):
   """Class for keeping reindex rules"""
   __slots__ = ()
 
@@ -38,12 +44,86 @@ class Indexed(object):
     return (self.__class__.__name__, self.id)
 
   @classmethod
-  def insert_records(cls, ids):
-    """Calculate and insert records into fulltext_record_properties table."""
+  def get_records_values(cls, ids, skip_properties=()):
+    """Calculate fulltext records values for objects with sent ids."""
     instances = cls.indexed_query().filter(cls.id.in_(ids))
     indexer = fulltext.get_indexer()
-    rows = itertools.chain(*[indexer.records_generator(i) for i in instances])
-    for vals_chunk in utils.iter_chunks(rows, chunk_size=10000):
+    return itertools.chain(*[
+        indexer.records_generator(i, skip_properties) for i in instances
+    ])
+
+  @classmethod
+  def get_plain_column_attrs(cls):
+    """Get fulltext attributes stored in plain string columns of the model.
+
+    Records for such attributes can be built by the database directly. Models
+    with subclasses are skipped as records of their objects may have the type
+    of a subclass.
+
+    Returns:
+      dict with property names as keys and model columns as values.
+    """
+    if cls.__name__ in _PLAIN_COLUMN_ATTRS:
+      return _PLAIN_COLUMN_ATTRS[cls.__name__]
+    from ggrc.models.reflection import AttributeInfo
+    mapper = sa.inspect(cls)
+    plain_attrs = {}
+    if len(mapper.self_and_descendants) == 1:
+      for attr in AttributeInfo.gather_attrs(cls, '_fulltext_attrs'):
+        if not isinstance(attr, basestring) or not mapper.has_property(attr):
+          continue
+        prop = mapper.get_property(attr)
+        if not isinstance(prop, orm.ColumnProperty) or len(prop.columns) != 1:
+          continue
+        column = prop.columns[0]
+        if isinstance(column, sa.Column) and \
+           isinstance(column.type, sa.String):
+          plain_attrs[cls.PROPERTY_TEMPLATE.format(attr)] = getattr(cls, attr)
+    _PLAIN_COLUMN_ATTRS[cls.__name__] = plain_attrs
+    return plain_attrs
+
+  @classmethod
+  def insert_plain_records(cls, ids, plain_attrs):
+    """Insert records of plain column attributes with INSERT ... SELECT."""
+    if not ids or not plain_attrs:
+      return
+    record_type = fulltext.get_indexer().record_type
+    selects = [
+        sa.select([
+            cls.id,
+            sa.literal(cls.__name__),
+            sa.literal(u""),
+            sa.literal(prop),
+            sa.literal(u""),
+            column,
+        ]).where(
+            cls.id.in_(ids)
+        ).where(
+            column.isnot(None)
+        )
+        for prop, column in plain_attrs.iteritems()
+    ]
+    db.session.execute(record_type.__table__.insert().from_select(
+        ["key", "type", "tags", "property", "subproperty", "content"],
+        sa.union_all(*selects),
+    ))
+
+  @classmethod
+  def insert_records(cls, ids, records=None, set_based=False):
+    """Calculate and insert records into fulltext_record_properties table.
+
+    Precalculated records values can be sent to skip their calculation. With
+    set_based flag records of plain column attributes are built by the
+    database and only the rest of properties are calculated in python.
+    """
+    if records is None:
+      skip_properties = ()
+      if set_based:
+        plain_attrs = cls.get_plain_column_attrs()
+        cls.insert_plain_records(ids, plain_attrs)
+        skip_properties = frozenset(plain_attrs)
+      records = cls.get_records_values(ids, skip_properties)
+    for vals_chunk in utils.iter_chunks(iter(records), chunk_size=10000):
       query = """
           INSERT INTO fulltext_record_properties (
             `key`, type, tags, property, subproperty, content
@@ -54,6 +134,91 @@ class Indexed(object):
         return
       db.session.execute(query, values)
 
+  @classmethod
+  def get_existing_records(cls, ids):
+    """Get stored fulltext records for objects with sent ids.
+
+    Returns:
+      dict with (key, property, subproperty) tuples as keys and
+      (tags, content) tuples as values.
+    """
+    record_type = fulltext.get_indexer().record_type
+    query = db.session.query(
+        record_type.key,
+        record_type.property,
+        record_type.subproperty,
+        record_type.tags,
+        record_type.content,
+    ).filter(
+        record_type.type == cls.__name__,
+        record_type.key.in_(ids),
+    )
+    return {
+        (key, prop, subprop): (tags, content)
+        for key, prop, subprop, tags, content in query
+    }
+
+  @classmethod
+  def diff_records(cls, ids):
+    """Get minimal changes required to bring records of objects up to date.
+
+    Returns:
+      tuple of three lists: values to insert, values to update and
+      (key, property, subproperty) tuples of records to delete.
+    """
+    existing = cls.get_existing_records(ids)
+    to_insert, to_update = [], []
+    for value in cls.get_records_values(ids):
+      record_key = (value["key"], value["property"], value["subproperty"])
+      stored = existing.pop(record_key, None)
+      if stored is None:
+        to_insert.append(value)
+      elif stored != (value["tags"], value["content"]):
+        to_update.append(value)
+    return to_insert, to_update, existing.keys()
+
+  @classmethod
+  def update_records(cls, values):
+    """Update content of existing fulltext records."""
+    if not values:
+      return
+    query = """
+        UPDATE fulltext_record_properties
+        SET tags = :tags, content = :content
+        WHERE fulltext_record_properties.type = :type AND
+              fulltext_record_properties.key = :key AND
+              fulltext_record_properties.property = :property AND
+              fulltext_record_properties.subproperty = :subproperty
+    """
+    db.session.execute(query, values)
+
+  @classmethod
+  def delete_records_by_keys(cls, record_keys):
+    """Delete fulltext records by (key, property, subproperty) tuples.
+
+    Keys are grouped by property, so the filter consists of plain IN
+    conditions over object ids that can use the index on key column. A row
+    constructor IN over the tuples can not use it.
+    """
+    if not record_keys:
+      return
+    record_type = fulltext.get_indexer().record_type
+    keys_by_property = collections.defaultdict(set)
+    for key, prop, subprop in record_keys:
+      keys_by_property[(prop, subprop)].add(key)
+    db.session.execute(record_type.__table__.delete().where(
+        record_type.type == cls.__name__
+    ).where(
+        sa.or_(*[
+            sa.and_(
+                record_type.property == prop,
+                record_type.subproperty == subprop,
+                record_type.key.in_(keys),
+            )
+            for (prop, subprop), keys in keys_by_property.iteritems()
+        ]),
+    ))
+
   @classmethod
   def get_delete_query_for(cls, ids):
     """Return delete class record query. If ids are empty, will return None."""
@@ -77,13 +242,26 @@ class Indexed(object):
     db.session.execute(query, {"obj_type": cls.__name__, "obj_ids": ids})
 
   @classmethod
-  def bulk_record_update_for(cls, ids):
-    """Bulky update index records for current class"""
+  def bulk_record_update_for(cls, ids, use_diff=False, set_based=False):
+    """Bulky update index records for current class
+
+    By default all records of the objects are removed and created again. With
+    use_diff flag only changed records are written, which is cheaper for
+    small changes of already indexed objects. With set_based flag records of
+    plain column attributes are created by INSERT ... SELECT statement.
+    """
     if not ids:
       return
 
+    if use_diff:
+      to_insert, to_update, to_delete = cls.diff_records(ids)
+      cls.delete_records_by_keys(to_delete)
+      cls.update_records(to_update)
+      cls.insert_records(ids, to_insert)
+      return
+
     cls.delete_records(ids)
-    cls.insert_records(ids)
+    cls.insert_records(ids, set_based=set_based)
 
   @classmethod
   def indexed_query(cls):
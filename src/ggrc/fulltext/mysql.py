@@ -66,7 +66,7 @@ class MysqlIndexer(SqlIndexer):
 
     type_queries = []
     for model_name in model_names:
-      contexts, resources = permissions.get_context_resource(
+      contexts = permissions.get_contexts(
           model_name=model_name,
           permission_type=permission_type,
       )
@@ -75,10 +75,14 @@ class MysqlIndexer(SqlIndexer):
         # None context means user has full access of permission_type for the
         # given model
         type_queries.append(MysqlRecordProperty.type == model_name)
-      elif resources:
+      else:
         type_queries.append(sa.and_(
             MysqlRecordProperty.type == model_name,
-            MysqlRecordProperty.key.in_(resources),
+            permissions.get_resources_filter(
+                MysqlRecordProperty.key,
+                model_name,
+                permission_type,
+            ),
         ))
 
     if not type_queries:
@@ -0,0 +1,241 @@
+# Copyright (C) 2018 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Durable queue for deferred fulltext indexing.
+
+In deferred mode objects collected by ReindexSet are not reindexed in the
+commit path of the request. They are stored in fulltext_reindex_queue table in
+the same transaction as the changes themselves and records are rebuilt later
+by a background task that drains the queue.
+"""
+
+import logging
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from datetime import timedelta
+
+import flask
+import sqlalchemy as sa
+
+from ggrc import db
+from ggrc import fulltext
+from ggrc import settings
+from ggrc import utils
+from ggrc.models import get_model
+from ggrc.utils import benchmark, helpers
+
+
+logger = logging.getLogger(__name__)
+
+DRAIN_CHUNK_SIZE = 1000
+REINDEX_CHUNK_SIZE = 100
+# Seconds after which items claimed by a drain that did not finish them can
+# be claimed by another drain.
+DRAIN_LEASE = 600
+# Drains scheduled on App Engine during this number of seconds are merged
+# into one task.
+DRAIN_DELAY = 60
+
+
+class ReindexQueueItem(db.Model):
+  """Object waiting for fulltext reindex.
+
+  Items are claimed by a drain before they are handled, so concurrent drains
+  never reindex the same items.
+  """
+  __tablename__ = 'fulltext_reindex_queue'
+
+  id = db.Column(db.Integer, primary_key=True)  # noqa
+  object_type = db.Column(db.String, nullable=False)
+  object_id = db.Column(db.Integer, nullable=False)
+  created_at = db.Column(db.DateTime, nullable=False)
+  claimed_by = db.Column(db.String, nullable=True)
+  claimed_at = db.Column(db.DateTime, nullable=True)
+
+
+def is_deferred():
+  """Check if fulltext records should be built outside of current request.
+
+  Deferred indexing is enabled with FULLTEXT_DEFERRED_INDEXING setting.
+  Endpoints listed in FULLTEXT_SYNC_INDEXING_ENDPOINTS keep synchronous
+  indexing so their clients can read their own writes from the index.
+  """
+  if not getattr(settings, "FULLTEXT_DEFERRED_INDEXING", False):
+    return False
+  if flask.has_request_context():
+    sync_endpoints = getattr(settings, "FULLTEXT_SYNC_INDEXING_ENDPOINTS", [])
+    return flask.request.endpoint not in sync_endpoints
+  return True
+
+
+def push(model_ids):
+  """Store objects that should be reindexed in the queue.
+
+  Args:
+    model_ids: dict with model names as keys and sets of ids as values.
+  """
+  now = datetime.utcnow()
+  values = [
+      {"object_type": model_name, "object_id": id_, "created_at": now}
+      for model_name, ids in model_ids.iteritems()
+      for id_ in ids
+  ]
+  if not values:
+    return
+  db.session.execute(ReindexQueueItem.__table__.insert(), values)
+  if flask.has_request_context():
+    flask.g.fulltext_queue_pushed = True
+
+
+def schedule_drain():
+  """Schedule a background task that drains the queue.
+
+  On App Engine all drains scheduled during DRAIN_DELAY seconds share the
+  name of one task that starts at the end of this period, so at most one
+  drain is pending however many commits pushed items to the queue. Without
+  the task queue the queue is drained once after the request is handled.
+  """
+  if not flask.has_request_context():
+    return
+  if not getattr(flask.g, "fulltext_queue_pushed", False):
+    return
+  flask.g.fulltext_queue_pushed = False
+  if getattr(settings, "APP_ENGINE", False):
+    from ggrc.models import background_task
+    from ggrc.views import drain_fulltext_queue
+    period_end = (int(time.time()) // DRAIN_DELAY + 1) * DRAIN_DELAY
+    background_task.create_lightweight_task(
+        name="drain_fulltext_queue",
+        url=flask.url_for(drain_fulltext_queue.__name__),
+        method="POST",
+        unique_name="drain_fulltext_queue_{}".format(period_end),
+        countdown=max(0, period_end - time.time()),
+    )
+  elif not getattr(flask.g, "fulltext_drain_scheduled", False):
+    flask.g.fulltext_drain_scheduled = True
+    flask.after_this_request(_drain_after_request)
+
+
+def _drain_after_request(response):
+  """Drain the queue after the request that pushed items to it."""
+  drain()
+  return response
+
+
+def get_status():
+  """Get size of the queue and index lag in seconds.
+
+  Index lag is the age of the oldest object waiting for reindex.
+  """
+  size, oldest = db.session.query(
+      sa.func.count(ReindexQueueItem.id),
+      sa.func.min(ReindexQueueItem.created_at),
+  ).one()
+  lag = 0
+  if oldest:
+    lag = int((datetime.utcnow() - oldest).total_seconds())
+  return {"size": size, "lag": lag}
+
+
+def _claim(owner):
+  """Claim a chunk of free or expired queue items for the drain owner.
+
+  The claim is committed right away, so other drains skip claimed items
+  without waiting for the end of the drain.
+  """
+  now = datetime.utcnow()
+  db.session.execute(
+      """
+      UPDATE fulltext_reindex_queue
+      SET claimed_by = :owner, claimed_at = :now
+      WHERE claimed_by IS NULL OR claimed_at < :expired
+      ORDER BY id
+      LIMIT :limit
+      """,
+      {
+          "owner": owner,
+          "now": now,
+          "expired": now - timedelta(seconds=DRAIN_LEASE),
+          "limit": DRAIN_CHUNK_SIZE,
+      },
+  )
+  db.session.plain_commit()
+  return db.session.query(
+      ReindexQueueItem.id,
+      ReindexQueueItem.object_type,
+      ReindexQueueItem.object_id,
+  ).filter(
+      ReindexQueueItem.claimed_by == owner,
+  ).all()
+
+
+def _release_busy(owner, items):
+  """Release claimed items of objects being reindexed by other drains.
+
+  Records of an object are rebuilt by one drain at a time. Released items
+  are left for the next drain.
+
+  Returns:
+    list of items that are not released.
+  """
+  busy = set(db.session.query(
+      ReindexQueueItem.object_type,
+      ReindexQueueItem.object_id,
+  ).filter(
+      ReindexQueueItem.claimed_by != owner,
+      ReindexQueueItem.claimed_at >= (datetime.utcnow() -
+                                      timedelta(seconds=DRAIN_LEASE)),
+  ).distinct())
+  released = [item.id for item in items
+              if (item.object_type, item.object_id) in busy]
+  if not released:
+    return items
+  db.session.execute(ReindexQueueItem.__table__.update().where(
+      ReindexQueueItem.id.in_(released)
+  ).values(
+      claimed_by=None,
+      claimed_at=None,
+  ))
+  return [item for item in items
+          if (item.object_type, item.object_id) not in busy]
+
+
+@helpers.without_sqlalchemy_cache
+def drain():
+  """Reindex objects stored in the queue.
+
+  Queue items are claimed and handled in chunks. Every chunk is removed
+  from the queue in the same transaction as the new records are stored, so
+  items of a failed drain are kept and can be claimed by another drain when
+  their lease expires.
+  """
+  fulltext.get_indexer().invalidate_cache()
+  status = get_status()
+  logger.info("Fulltext queue size: %s, index lag: %s seconds",
+              status["size"], status["lag"])
+  owner = uuid.uuid4().hex
+  with benchmark("Drain fulltext reindex queue"):
+    while True:
+      items = _claim(owner)
+      if not items:
+        break
+      items = _release_busy(owner, items)
+      if not items:
+        db.session.plain_commit()
+        break
+      model_ids = defaultdict(set)
+      for _, object_type, object_id in items:
+        model_ids[object_type].add(object_id)
+      for model_name, ids in model_ids.iteritems():
+        model = get_model(model_name)
+        if model is None:
+          continue
+        for ids_chunk in utils.list_chunks(list(ids),
+                                           chunk_size=REINDEX_CHUNK_SIZE):
+          model.bulk_record_update_for(ids_chunk, set_based=True)
+      db.session.execute(ReindexQueueItem.__table__.delete().where(
+          ReindexQueueItem.claimed_by == owner
+      ))
+      db.session.plain_commit()
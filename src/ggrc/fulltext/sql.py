@@ -36,10 +36,12 @@ class SqlIndexer(object):
   def search(self, terms):
     raise NotImplementedError()
 
-  def records_generator(self, instance):
+  def records_generator(self, instance, skip_properties=()):
     """Record generator method."""
     props = self.get_builder(instance.__class__).get_properties(instance)
     for prop, value in props.iteritems():
+      if prop in skip_properties:
+        continue
       for subproperty, content in value.iteritems():
         if content is not None:
           yield dict(
@@ -29,6 +29,9 @@ API_VERSION = 'v3'
 
 ALLOWED_FILENAME_CHARS = "_ ()-'"
 
+# Size of uploaded parts of streamed files, must be a multiple of 256 Kb
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
 logger = getLogger(__name__)
 
 
@@ -46,8 +49,67 @@ def hande_http_error(ex):
   raise abort(code, description=message)
 
 
-def create_gdrive_file(csv_string, filename):
-  """Post text/csv data to a gdrive file"""
+class MediaStreamUpload(http.MediaUpload):
+  """Resumable upload of data produced by an iterator of strings.
+
+  Size of the data is unknown until the iterator is exhausted, so the upload
+  is finished by the client when a part shorter than chunksize is read. Only
+  the part that is being uploaded is kept in memory.
+  """
+
+  def __init__(self, chunks, mimetype, chunksize=UPLOAD_CHUNK_SIZE):
+    super(MediaStreamUpload, self).__init__()
+    self._chunks = iter(chunks)
+    self._mimetype = mimetype
+    self._chunksize = chunksize
+    self._buffer = ""
+    self._buffer_start = 0
+
+  def chunksize(self):
+    return self._chunksize
+
+  def mimetype(self):
+    return self._mimetype
+
+  def size(self):
+    return None
+
+  def resumable(self):
+    return True
+
+  def has_stream(self):
+    return False
+
+  def getbytes(self, begin, length):
+    """Get bytes from the stream.
+
+    Bytes before begin are confirmed by the server and are dropped from the
+    buffer, so a part can be read again if its upload is retried.
+    """
+    if begin < self._buffer_start:
+      raise ValueError("Uploaded data is not available anymore.")
+    parts = [self._buffer[begin - self._buffer_start:]]
+    size = len(parts[0])
+    while size < length:
+      try:
+        chunk = next(self._chunks)
+      except StopIteration:
+        break
+      parts.append(chunk)
+      size += len(chunk)
+    self._buffer = "".join(parts)
+    self._buffer_start = begin
+    return self._buffer[:length]
+
+
+def create_gdrive_file(csv_data, filename):
+  """Post text/csv data to a gdrive file
+
+  Args:
+    csv_data: csv string or an iterator of csv strings that is uploaded
+        part by part.
+    filename: name of the created file.
+  """
   http_auth = get_http_auth()
   try:
     drive_service = discovery.build(API_SERVICE_NAME, API_VERSION,
@@ -57,9 +119,12 @@ def create_gdrive_file(csv_string, filename):
         'name': filename,
         'mimeType': 'application/vnd.google-apps.spreadsheet'
     }
-    media = http.MediaInMemoryUpload(csv_string,
-                                     mimetype='text/csv',
-                                     resumable=True)
+    if isinstance(csv_data, basestring):
+      media = http.MediaInMemoryUpload(csv_data,
+                                       mimetype='text/csv',
+                                       resumable=True)
+    else:
+      media = MediaStreamUpload(csv_data, mimetype='text/csv')
     result = drive_service.files().create(body=file_metadata,
                                           media_body=media,
                                           fields='id, name, parents').execute()
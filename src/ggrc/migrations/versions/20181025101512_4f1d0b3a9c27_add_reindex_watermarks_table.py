@@ -0,0 +1,36 @@
+# Copyright (C) 2018 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+Add reindex_watermarks table
+
+Create Date: 2018-10-25 10:15:12.412816
+"""
+# disable Invalid constant name pylint warning for mandatory Alembic variables.
+# pylint: disable=invalid-name
+
+import sqlalchemy as sa
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '4f1d0b3a9c27'
+down_revision = 'b9e9cb977292'
+
+
+def upgrade():
+  """Upgrade database schema and/or data, creating a new revision."""
+  op.create_table(
+      "reindex_watermarks",
+      sa.Column("id", sa.Integer(), primary_key=True),
+      sa.Column("name", sa.String(length=250), nullable=False),
+      sa.Column("revision_id", sa.Integer(), nullable=False,
+                server_default="0"),
+      sa.UniqueConstraint("name", name="uq_reindex_watermarks_name"),
+  )
+
+
+def downgrade():
+  """Downgrade database schema and/or data back to the previous revision."""
+  op.drop_table("reindex_watermarks")
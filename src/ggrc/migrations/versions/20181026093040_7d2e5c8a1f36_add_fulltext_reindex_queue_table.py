@@ -0,0 +1,35 @@
+# Copyright (C) 2018 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+Add fulltext_reindex_queue table
+
+Create Date: 2018-10-26 09:30:40.157336
+"""
+# disable Invalid constant name pylint warning for mandatory Alembic variables.
+# pylint: disable=invalid-name
+
+import sqlalchemy as sa
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '7d2e5c8a1f36'
+down_revision = '4f1d0b3a9c27'
+
+
+def upgrade():
+  """Upgrade database schema and/or data, creating a new revision."""
+  op.create_table(
+      "fulltext_reindex_queue",
+      sa.Column("id", sa.Integer(), primary_key=True),
+      sa.Column("object_type", sa.String(length=250), nullable=False),
+      sa.Column("object_id", sa.Integer(), nullable=False),
+      sa.Column("created_at", sa.DateTime(), nullable=False),
+  )
+
+
+def downgrade():
+  """Downgrade database schema and/or data back to the previous revision."""
+  op.drop_table("fulltext_reindex_queue")
@@ -0,0 +1,32 @@
+# Copyright (C) 2018 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+Add checkpoint column to import_exports
+
+Create Date: 2018-10-29 11:45:20.317852
+"""
+# disable Invalid constant name pylint warning for mandatory Alembic variables.
+# pylint: disable=invalid-name
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '9b3e61f0a2d4'
+down_revision = '7d2e5c8a1f36'
+
+
+def upgrade():
+  """Upgrade database schema and/or data, creating a new revision."""
+  op.add_column(
+      'import_exports',
+      sa.Column('checkpoint', mysql.LONGTEXT(), nullable=True),
+  )
+
+
+def downgrade():
+  """Downgrade database schema and/or data back to the previous revision."""
+  op.drop_column('import_exports', 'checkpoint')
@@ -0,0 +1,46 @@
+# Copyright (C) 2018 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+Add claim columns to fulltext_reindex_queue
+
+Create Date: 2018-11-05 10:24:10.482915
+"""
+# disable Invalid constant name pylint warning for mandatory Alembic variables.
+# pylint: disable=invalid-name
+
+import sqlalchemy as sa
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '3c8f2a7d5e14'
+down_revision = '9b3e61f0a2d4'
+
+
+def upgrade():
+  """Upgrade database schema and/or data, creating a new revision."""
+  op.add_column(
+      "fulltext_reindex_queue",
+      sa.Column("claimed_by", sa.String(length=36), nullable=True),
+  )
+  op.add_column(
+      "fulltext_reindex_queue",
+      sa.Column("claimed_at", sa.DateTime(), nullable=True),
+  )
+  op.create_index(
+      "ix_fulltext_reindex_queue_claimed_by",
+      "fulltext_reindex_queue",
+      ["claimed_by"],
+  )
+
+
+def downgrade():
+  """Downgrade database schema and/or data back to the previous revision."""
+  op.drop_index(
+      "ix_fulltext_reindex_queue_claimed_by",
+      table_name="fulltext_reindex_queue",
+  )
+  op.drop_column("fulltext_reindex_queue", "claimed_at")
+  op.drop_column("fulltext_reindex_queue", "claimed_by")
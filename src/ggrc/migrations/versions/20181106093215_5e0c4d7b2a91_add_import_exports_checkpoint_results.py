@@ -0,0 +1,34 @@
+# Copyright (C) 2018 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+Add checkpoint_results column to import_exports
+
+Create Date: 2018-11-06 09:32:15.603417
+"""
+# disable Invalid constant name pylint warning for mandatory Alembic variables.
+# pylint: disable=invalid-name
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '5e0c4d7b2a91'
+down_revision = '3c8f2a7d5e14'
+
+
+def upgrade():
+  """Upgrade database schema and/or data, creating a new revision."""
+  op.add_column(
+      'import_exports',
+      sa.Column('checkpoint_results', mysql.LONGTEXT(), nullable=True),
+  )
+  # Checkpoints of the previous format can't be resumed
+  op.execute("UPDATE import_exports SET checkpoint = NULL")
+
+
+def downgrade():
+  """Downgrade database schema and/or data back to the previous revision."""
+  op.drop_column('import_exports', 'checkpoint_results')
@@ -66,6 +66,9 @@ class BackgroundTask(roleable.Roleable, base.ContextRBAC, Base, Stateful,
 
   _api_attrs = reflection.ApiAttributes('name', 'result')
 
+  # set by tasks finished by the work they schedule, not by queued_task
+  finish_deferred = False
+
   _aliases = {
       "status": {
           "display_name": "State",
@@ -97,6 +100,28 @@ class BackgroundTask(roleable.Roleable, base.ContextRBAC, Base, Stateful,
     db.session.add(self)
     db.session.commit()
 
+  def defer_finish(self):
+    """Leave the task running after its handler returns.
+
+    The task has to be finished by the background work it scheduled.
+    Otherwise it would be marked successful, and its result overwritten,
+    before that work is done.
+    """
+    self.finish_deferred = True
+
+  def set_progress(self, progress):
+    """Store progress of the running task.
+
+    Progress is saved as json content of the task result and is flushed with
+    the next commit of the session, so long running tasks can report their
+    state through the regular task status response. It is replaced by the
+    final result when the task is finished.
+    """
+    self.result = {'content': json.dumps(progress),
+                   'status_code': 200,
+                   'headers': [('Content-Type', 'application/json')]}
+    db.session.add(self)
+
   def make_response(self, default=None):
     """Create task status response."""
     if self.result is None:
@@ -200,12 +225,17 @@ def create_task(name, url, queued_callback=None, parameters=None, method=None,
 
 
 def create_lightweight_task(name, url, queued_callback=None, parameters=None,
-                            method=None):
+                            method=None, unique_name=None, countdown=None):
   """Create background task.
 
   This function create an app engine background task without handling
   related BackgroundTask object.
+
+  If unique_name is given, it is used as the name of app engine task and
+  the task is not added if a task with this name already exists. Countdown
+  is the number of seconds to wait before app engine task is run.
   """
+  # pylint: disable=too-many-arguments
   if not method:
     method = request.method
 
@@ -214,14 +244,21 @@ def create_lightweight_task(name, url, queued_callback=None, parameters=None,
 
   if getattr(settings, 'APP_ENGINE', False):
     from google.appengine.api import taskqueue
-    taskqueue.add(
-        queue_name="ggrc",
-        url=url,
-        name="{}_{}".format(name + str(int(time())), uuid.uuid4()),
-        payload=json.dumps(parameters),
-        method=method,
-        headers=collect_task_headers()
-    )
+    try:
+      taskqueue.add(
+          queue_name="ggrc",
+          url=url,
+          name=unique_name or "{}_{}".format(name + str(int(time())),
+                                             uuid.uuid4()),
+          payload=json.dumps(parameters),
+          method=method,
+          headers=collect_task_headers(),
+          countdown=countdown,
+      )
+    except (taskqueue.TaskAlreadyExistsError, taskqueue.TombstonedTaskError):
+      if unique_name is None:
+        raise
+      logger.info("Task %s is already scheduled", unique_name)
   elif queued_callback:
     queued_callback(**parameters)
   else:
@@ -305,6 +342,7 @@ def queued_task(func):
       # Return 200 so that the task is not retried
       return app.make_response((
           'failure', 200, [('Content-Type', 'text/html')]))
-    task.finish("Success", result)
+    if not task.finish_deferred:
+      task.finish("Success", result)
     return result
   return decorated_view
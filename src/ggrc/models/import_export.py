@@ -17,6 +17,9 @@ from werkzeug.exceptions import BadRequest, Forbidden, NotFound
 
 logger = getLogger(__name__)
 
+# Number of runs after which an interrupted import job is not resumed again
+MAX_IMPORT_ATTEMPTS = 3
+
 
 class ImportExport(Identifiable, db.Model):
   """ImportExport Model."""
@@ -61,6 +64,8 @@ class ImportExport(Identifiable, db.Model):
   title = db.Column(db.Text)
   content = db.Column(mysql.LONGTEXT)
   gdrive_metadata = db.Column('gdrive_metadata', db.Text)
+  checkpoint = db.Column(mysql.LONGTEXT)
+  checkpoint_results = db.Column(mysql.LONGTEXT)
 
   def log_json(self, is_default=False):
     """JSON representation"""
@@ -68,7 +73,8 @@ class ImportExport(Identifiable, db.Model):
       columns = self.DEFAULT_COLUMNS
     else:
       columns = (column.name for column in self.__table__.columns
-                 if column.name not in ('content', 'gdrive_metadata'))
+                 if column.name not in ('content', 'gdrive_metadata',
+                                        'checkpoint', 'checkpoint_results'))
 
     res = {}
     for column in columns:
@@ -134,6 +140,52 @@ def delete_previous_imports():
   db.session.commit()
 
 
+def get_checkpoint(ie_job):
+  """Get progress and results of the previous runs of the import job.
+
+  Returns:
+    tuple of progress dict and results dict.
+  """
+  checkpoint = json.loads(ie_job.checkpoint) if ie_job.checkpoint else {}
+  results = (json.loads(ie_job.checkpoint_results)
+             if ie_job.checkpoint_results else {})
+  return checkpoint, results
+
+
+def save_checkpoint(ie_id, checkpoint, results=None):
+  """Store import progress in the current transaction.
+
+  The checkpoint is written with a plain update statement, so it is committed
+  together with the imported rows without making the job a modified object of
+  the import commit. Results are written only if they are given.
+  """
+  values = {"checkpoint": json.dumps(checkpoint)}
+  if results is not None:
+    values["checkpoint_results"] = json.dumps(results)
+  db.session.execute(ImportExport.__table__.update().where(
+      ImportExport.id == ie_id
+  ).values(**values))
+
+
+def start_import_attempt(ie_job):
+  """Count a new run of the import job and commit it.
+
+  Returns:
+    number of runs of the import job including the current one.
+  """
+  checkpoint, _ = get_checkpoint(ie_job)
+  checkpoint["attempts"] = checkpoint.get("attempts", 0) + 1
+  ie_job.checkpoint = json.dumps(checkpoint)
+  db.session.commit()
+  return checkpoint["attempts"]
+
+
+def clear_checkpoint(ie_job):
+  """Remove progress of the finished import job."""
+  ie_job.checkpoint = None
+  ie_job.checkpoint_results = None
+
+
 def get(ie_id):
   """Get import_exports entry by id if entry belongs to current user"""
   ie_job = ImportExport.query.get(ie_id)
@@ -3,7 +3,10 @@
 
 """Models for maintenance."""
 
+import datetime
+
 from ggrc import db
+from ggrc import settings
 from ggrc.models.mixins.base import Identifiable
 
 
@@ -43,3 +46,50 @@ class ReindexLog(Identifiable, db.Model):
 
   is_reindex_complete = db.Column(db.Boolean, nullable=False, default=True)
   log = db.Column(db.String)
+
+
+class ReindexWatermark(Identifiable, db.Model):
+  """Model holds the last revision processed by incremental reindex.
+
+  Every row is identified by the name of the index it belongs to, so
+  independent indexes can keep their own position in revisions log.
+  """
+  __tablename__ = 'reindex_watermarks'
+
+  name = db.Column(db.String, nullable=False)
+  revision_id = db.Column(db.Integer, nullable=False, default=0)
+
+  @staticmethod
+  def _extra_table_args(_):
+    return (
+        db.UniqueConstraint('name', name='uq_reindex_watermarks_name'),
+    )
+
+  @classmethod
+  def get_or_create(cls, name):
+    """Get watermark with sent name, create an empty one if it is missing."""
+    watermark = cls.query.filter_by(name=name).first()
+    if watermark is None:
+      watermark = cls(name=name, revision_id=0)
+      db.session.add(watermark)
+    return watermark
+
+  @staticmethod
+  def get_safe_revision_id():
+    """Get id of the latest revision a watermark can be moved to.
+
+    Revision ids are taken when revisions are flushed, but revisions become
+    visible only when their transaction commits, so a revision with a lower
+    id can appear after a higher one. Revisions created within
+    REINDEX_WATERMARK_MARGIN seconds are left for the next run, so a watermark
+    does not pass revisions of transactions that are still in flight.
+    """
+    from ggrc.models.revision import Revision
+    margin = datetime.timedelta(
+        seconds=getattr(settings, "REINDEX_WATERMARK_MARGIN", 300))
+    safe_time = datetime.datetime.utcnow() - margin
+    return db.session.query(Revision.id).filter(
+        Revision.created_at <= safe_time,
+    ).order_by(
+        Revision.id.desc(),
+    ).limit(1).scalar() or 0
@@ -10,8 +10,6 @@ This class is used to build SqlAlchemy queries and fetch the result ids.
 import collections
 import datetime
 
-import sqlalchemy as sa
-
 from ggrc import db
 from ggrc import models
 from ggrc.models import inflector
@@ -43,6 +41,11 @@ class QueryHelper(object):
         }
       ]
       limit: [from, to] - limit the result list to a slice result[from, to]
+      cursor: continuation token of the previous page, null for the first
+              page; if present, "page_size" objects following the cursor
+              are returned instead of applying "limit"
+      page_size: the number of objects in a page requested with "cursor"
+      with_total: optional; count all filtered objects in "cursor" requests
       filters: {
         relevant_filters:
           these filters will return all ids of the "search class name" object
@@ -82,6 +85,8 @@ class QueryHelper(object):
 
   def __init__(self, query):
     self.query = self._clean_query(query)
+    # results of filter subexpressions shared by all object queries
+    self.memo = {}
 
   def _get_snapshot_child_type(self, object_query):
     """Return child_type for snapshot from a query"""
@@ -221,25 +226,64 @@ class QueryHelper(object):
     if permission_type == "update" and permissions.has_system_wide_update():
       return None
 
-    contexts, resources = permissions.get_context_resource(
+    contexts = permissions.get_contexts(
         model_name=model.__name__, permission_type=permission_type
     )
     if contexts is None:
       return None
 
-    return model.id.in_(resources) if resources else sa.sql.false()
+    return permissions.get_resources_filter(
+        model.id, model.__name__, permission_type
+    )
+
+  @staticmethod
+  def _get_rows_query(object_class, columns=None):
+    """Get the eager query of the model or a query of the given columns."""
+    if columns:
+      return db.session.query(*columns)
+    return object_class.eager_query()
+
+  def _get_objects(self, object_query, columns=None):
+    """Get a list of objects described in the filters.
+
+    Filters, ordering and limit are applied directly to the eager query of
+    the model, so objects are loaded with one statement instead of fetching
+    their ids first. Cursor pages are found by seeking on id query columns
+    and are still loaded by ids.
+
+    If columns are given, rows of these columns are loaded instead of
+    objects. The columns must contain the model id labeled "id".
+    """
+    if "cursor" in object_query:
+      return self._get_objects_by_ids(object_query, columns)
+
+    object_class = self._get_object_class(object_query)
+    if object_class is None:
+      return []
+    tgt_class = self._get_target_class(object_query, object_class)
+    filters = self._get_filters(object_query, object_class, tgt_class)
+    query = self._get_rows_query(object_class, columns).filter(*filters)
+    with benchmark("Get objects: _get_objects > _apply_order_and_limit"):
+      objects = self._apply_order_and_limit(
+          query,
+          db.session.query(object_class.id).filter(*filters),
+          object_class,
+          tgt_class,
+          object_query,
+      )
+    return objects
 
-  def _get_objects(self, object_query):
-    """Get a set of objects described in the filters."""
+  def _get_objects_by_ids(self, object_query, columns=None):
+    """Get a list of objects or rows of columns with ids from the filters."""
 
     with benchmark("Get ids: _get_objects -> _get_ids"):
       ids = self._get_ids(object_query)
     if not ids:
-      return set()
+      return []
 
     object_name = object_query["object_name"]
     object_class = inflector.get_model(object_name)
-    query = object_class.eager_query()
+    query = self._get_rows_query(object_class, columns)
     query = query.filter(object_class.id.in_(ids))
 
     with benchmark("Get objects by ids: _get_objects -> obj in query"):
@@ -250,40 +294,58 @@ class QueryHelper(object):
 
     return objects
 
-  def _get_ids(self, object_query):
-    """Get a set of ids of objects described in the filters."""
-
-    object_name = object_query["object_name"]
-    expression = object_query.get("filters", {}).get("expression")
+  @staticmethod
+  def _get_object_class(object_query):
+    """Get model of objects described in the filters.
 
-    if expression is None:
-      return set()
-    object_class = inflector.get_model(object_name)
-    if object_class is None:
-      return set()
-    query = db.session.query(object_class.id)
+    Returns:
+      model or None if the query has no filters or the model is unknown.
+    """
+    if object_query.get("filters", {}).get("expression") is None:
+      return None
+    return inflector.get_model(object_query["object_name"])
 
-    tgt_class = object_class
-    if object_name == "Snapshot":
+  def _get_target_class(self, object_query, object_class):
+    """Get the snapshotted model for snapshot queries, else object_class."""
+    if object_query["object_name"] == "Snapshot":
       child_type = self._get_snapshot_child_type(object_query)
-      tgt_class = getattr(models.all_models, child_type, object_class)
+      return getattr(models.all_models, child_type, object_class)
+    return object_class
 
+  def _get_filters(self, object_query, object_class, tgt_class):
+    """Get a list of filter clauses for objects described in the query."""
+    filters = []
     requested_permissions = object_query.get("permissions", "read")
-    with benchmark("Get permissions: _get_ids > _get_type_query"):
+    with benchmark("Get permissions: _get_filters > _get_type_query"):
       type_query = self._get_type_query(object_class, requested_permissions)
       if type_query is not None:
-        query = query.filter(type_query)
-    with benchmark("Parse filter query: _get_ids > _build_expression"):
+        filters.append(type_query)
+    with benchmark("Parse filter query: _get_filters > _build_expression"):
       filter_expression = custom_operators.build_expression(
-          expression,
+          object_query["filters"]["expression"],
           object_class,
           tgt_class,
-          self.query
+          self.query,
+          self.memo,
       )
       if filter_expression is not None:
-        query = query.filter(filter_expression)
+        filters.append(filter_expression)
+    return filters
+
+  @staticmethod
+  def _apply_order_and_limit(query, count_query, object_class, tgt_class,
+                             object_query):
+    """Sort and limit the query and store the total count of its rows.
+
+    Args:
+      query: a query for requested rows;
+      count_query: an id query with the same filters used for the count.
+
+    Returns:
+      list of rows of the requested page.
+    """
     if object_query.get("order_by"):
-      with benchmark("Sorting: _get_ids > order_by"):
+      with benchmark("Sorting: _apply_order_and_limit > order_by"):
         query = pagination.apply_order_by(
             object_class,
             query,
@@ -293,14 +355,54 @@ class QueryHelper(object):
     with benchmark("Apply limit"):
       limit = object_query.get("limit")
       if limit:
-        limit_query = pagination.apply_limit(query, limit)
-        total = pagination.get_total_count(query)
-        ids = [obj.id for obj in limit_query]
+        rows = pagination.apply_limit(query, limit).all()
+        total = pagination.get_page_total_count(count_query, limit,
+                                                len(rows))
       else:
-        ids = [obj.id for obj in query]
-        total = len(ids)
+        rows = query.all()
+        total = len(rows)
       object_query["total"] = total
+    return rows
+
+  def _get_ids(self, object_query):
+    """Get a set of ids of objects described in the filters."""
+
+    object_class = self._get_object_class(object_query)
+    if object_class is None:
+      return set()
+    tgt_class = self._get_target_class(object_query, object_class)
+    filters = self._get_filters(object_query, object_class, tgt_class)
+    query = db.session.query(object_class.id).filter(*filters)
+    if "cursor" in object_query:
+      return self._get_ids_page(query, object_class, tgt_class, object_query)
+    rows = self._apply_order_and_limit(
+        query,
+        query,
+        object_class,
+        tgt_class,
+        object_query,
+    )
+    return [row.id for row in rows]
 
+  @staticmethod
+  def _get_ids_page(query, object_class, tgt_class, object_query):
+    """Get ids of a page of objects following the cursor of the query.
+
+    The total count is a separate query over all filtered objects, so it is
+    computed only if "with_total" is set in the object query.
+    """
+    with benchmark("Apply cursor: _get_ids > apply_cursor"):
+      ids, next_cursor = pagination.apply_cursor(
+          object_class,
+          query,
+          object_query.get("order_by"),
+          tgt_class,
+          object_query["cursor"],
+          object_query.get("page_size"),
+      )
+      object_query["next_cursor"] = next_cursor
+    if object_query.get("with_total"):
+      object_query["total"] = pagination.get_total_count(query)
     return ids
 
   @staticmethod
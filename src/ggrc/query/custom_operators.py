@@ -4,8 +4,9 @@
 """This module contains custom operators for query helper"""
 
 # pylint: disable=unused-argument
-import operator
 import functools
+import json
+import operator
 
 import sqlalchemy
 from sqlalchemy.orm import aliased
@@ -328,8 +329,21 @@ def related_evidence(exp, object_class, target_class, query):
   return object_class.id.in_(result)
 
 
-def build_expression(exp, object_class, target_class, query):
-  """Make an SQLAlchemy filtering expression from exp expression tree."""
+def _memo_key(exp, object_class, target_class):
+  """Get a key of the expression normalized for memoization."""
+  return (
+      object_class.__name__,
+      target_class.__name__,
+      json.dumps(exp, sort_keys=True, default=unicode),
+  )
+
+
+def build_expression(exp, object_class, target_class, query, memo=None):
+  """Make an SQLAlchemy filtering expression from exp expression tree.
+
+  If memo dict is given, results of operators that run their own queries
+  are stored in it, so identical subexpressions are evaluated only once.
+  """
   if not exp:
     # empty expression doesn't required filter
     return
@@ -338,24 +352,32 @@ def build_expression(exp, object_class, target_class, query):
   if not exp:
     # empty expression after autocast is invalid and should raise an exception
     raise BadQueryException("Invalid filter data")
-  operation = OPS.get(exp.get("op", {}).get("name")) or unknown
-  return operation(exp, object_class, target_class, query)
+  operation_name = exp.get("op", {}).get("name")
+  operation = OPS.get(operation_name) or unknown
+  if operation_name in LOGICAL_OPS:
+    return operation(exp, object_class, target_class, query, memo)
+  if memo is None or operation_name not in MEMOIZED_OPS:
+    return operation(exp, object_class, target_class, query)
+  key = _memo_key(exp, object_class, target_class)
+  if key not in memo:
+    memo[key] = operation(exp, object_class, target_class, query)
+  return memo[key]
 
 
 @validate("left", "right")
-def and_operation(exp, object_class, target_class, query):
+def and_operation(exp, object_class, target_class, query, memo=None):
   """Operator generate sqlalchemy for and operation"""
   return sqlalchemy.and_(
-      build_expression(exp["left"], object_class, target_class, query),
-      build_expression(exp["right"], object_class, target_class, query))
+      build_expression(exp["left"], object_class, target_class, query, memo),
+      build_expression(exp["right"], object_class, target_class, query, memo))
 
 
 @validate("left", "right")
-def or_operation(exp, object_class, target_class, query):
+def or_operation(exp, object_class, target_class, query, memo=None):
   """Operator generate sqlalchemy for or operation"""
   return sqlalchemy.or_(
-      build_expression(exp["left"], object_class, target_class, query),
-      build_expression(exp["right"], object_class, target_class, query))
+      build_expression(exp["left"], object_class, target_class, query, memo),
+      build_expression(exp["right"], object_class, target_class, query, memo))
 
 
 @validate("left", "right")
@@ -492,3 +514,14 @@ OPS = {
     "is": is_filter,
     "cascade_unmappable": cascade_unmappable,
 }
+
+LOGICAL_OPS = {"AND", "OR"}
+
+# operators that fetch ids of matching objects with their own queries
+MEMOIZED_OPS = {
+    "relevant",
+    "similar",
+    "owned",
+    "related_people",
+    "cascade_unmappable",
+}
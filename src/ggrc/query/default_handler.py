@@ -3,9 +3,18 @@
 
 """This module contains special query helper class for query API."""
 
+import collections
+
+from sqlalchemy.orm.attributes import InstrumentedAttribute
+from sqlalchemy.orm.properties import ColumnProperty
+
+from ggrc import db
 from ggrc.builder import json
+from ggrc.query import pagination
+from ggrc.query import utils
 from ggrc.query.builder import QueryHelper
 from ggrc.models import inflector
+from ggrc.models.reflection import AttributeInfo
 from ggrc.utils import benchmark
 
 
@@ -32,6 +41,9 @@ class DefaultHandler(QueryHelper):
       ids: [ ids of filtered objects ] (present if type is "ids")
       count: the number of objects filtered, after "limit" is applied
       total: the number of objects filtered, before "limit" is applied
+             (present in "cursor" queries only if "with_total" is set)
+      next_cursor: continuation token of the next page or null for the last
+                   page (present if "cursor" is set)
   """
 
   def get_results(self):
@@ -40,6 +52,9 @@ class DefaultHandler(QueryHelper):
     Updates self.query items with their results. The type of results required
     is read from "type" parameter of every object_query in self.query.
 
+    Plain "count" queries are evaluated together with one statement before
+    the other object queries.
+
     Returns:
       list of dicts: same query as the input with requested results that match
                      the filter.
@@ -49,28 +64,95 @@ class DefaultHandler(QueryHelper):
       if query_type not in {"values", "ids", "count"}:
         raise NotImplementedError("Only 'values', 'ids' and 'count' queries "
                                   "are supported now")
-      model = inflector.get_model(object_query["object_name"])
-      if query_type == "values":
-        with benchmark("Get result set: get_results > _get_objects"):
-          objects = self._get_objects(object_query)
-        object_query["count"] = len(objects)
-        with benchmark("get_results > _get_last_modified"):
-          object_query["last_modified"] = self._get_last_modified(model,
-                                                                  objects)
-        with benchmark("serialization: get_results > _transform_to_json"):
-          object_query["values"] = self._transform_to_json(
-              objects,
-              object_query.get("fields"),
-          )
-      else:
-        with benchmark("Get result set: get_results -> _get_ids"):
-          ids = self._get_ids(object_query)
-        object_query["count"] = len(ids)
-        object_query["last_modified"] = None  # synonymous to now()
-        if query_type == "ids":
-          object_query["ids"] = ids
+    with benchmark("Get counts: get_results > _set_batched_counts"):
+      counted = self._set_batched_counts()
+    for index, object_query in enumerate(self.query):
+      if index in counted:
+        continue
+      with benchmark(u"Object query {} {}: get_results".format(
+          index, object_query["object_name"])):
+        self._set_results(object_query)
     return self.query
 
+  def _set_results(self, object_query):
+    """Get results of the type requested in the object query."""
+    query_type = object_query.get("type", "values")
+    model = inflector.get_model(object_query["object_name"])
+    if query_type == "values":
+      fields = object_query.get("fields")
+      columns = self._get_field_columns(model, fields)
+      with benchmark("Get result set: get_results > _get_objects"):
+        objects = self._get_objects(object_query, columns)
+      object_query["count"] = len(objects)
+      with benchmark("get_results > _get_last_modified"):
+        object_query["last_modified"] = self._get_last_modified(model,
+                                                                objects)
+      with benchmark("serialization: get_results > _transform_to_json"):
+        if columns:
+          object_query["values"] = self._project_rows(objects, fields)
+        else:
+          object_query["values"] = self._transform_to_json(objects, fields)
+    else:
+      with benchmark("Get result set: get_results -> _get_ids"):
+        ids = self._get_ids(object_query)
+      object_query["count"] = len(ids)
+      object_query["last_modified"] = None  # synonymous to now()
+      if query_type == "ids":
+        object_query["ids"] = ids
+
+  def _is_batched_count(self, object_query):
+    """Check if the count of the object query can be batched.
+
+    Counts of ordered and cursor queries, queries without filters and
+    queries depending on results of previous queries are evaluated one by
+    one.
+    """
+    return (
+        object_query.get("type") == "count" and
+        "cursor" not in object_query and
+        not object_query.get("order_by") and
+        self._get_object_class(object_query) is not None and
+        not self._uses_previous(object_query["filters"]["expression"])
+    )
+
+  @classmethod
+  def _uses_previous(cls, exp):
+    """Check if the expression refers to results of a previous query."""
+    if not isinstance(exp, dict):
+      return False
+    if exp.get("object_name") == "__previous__":
+      return True
+    return (cls._uses_previous(exp.get("left")) or
+            cls._uses_previous(exp.get("right")))
+
+  def _set_batched_counts(self):
+    """Count objects of all batched count queries with one statement.
+
+    Returns:
+      set of indexes of object queries with counts set.
+    """
+    indexes = []
+    queries = []
+    for index, object_query in enumerate(self.query):
+      if not self._is_batched_count(object_query):
+        continue
+      object_class = self._get_object_class(object_query)
+      tgt_class = self._get_target_class(object_query, object_class)
+      filters = self._get_filters(object_query, object_class, tgt_class)
+      indexes.append(index)
+      queries.append(db.session.query(object_class.id).filter(*filters))
+    totals = pagination.get_total_counts(queries)
+    for index, total in zip(indexes, totals):
+      object_query = self.query[index]
+      limit = object_query.get("limit")
+      if limit:
+        object_query["count"] = pagination.get_limit_count(limit, total)
+      else:
+        object_query["count"] = total
+      object_query["total"] = total
+      object_query["last_modified"] = None  # synonymous to now()
+    return set(indexes)
+
   @staticmethod
   def _transform_to_json(objects, fields=None):
     """Make a JSON representation of objects from the list."""
@@ -81,6 +163,49 @@ class DefaultHandler(QueryHelper):
                       for o in objects_json]
     return objects_json
 
+  @staticmethod
+  def _is_column(attr):
+    """Check if the model attribute is mapped to a column."""
+    return (isinstance(attr, InstrumentedAttribute) and
+            isinstance(attr.property, ColumnProperty))
+
+  @classmethod
+  def _get_field_columns(cls, model, fields):
+    """Get columns of a flat projection of objects to the fields.
+
+    A projection is flat if all fields are published column attributes of
+    the model without custom publish logic or "type". Such fields are loaded
+    and returned as they are, without loading and publishing whole objects.
+
+    Returns:
+      list of labeled columns to load or None if the fields can not be
+      projected.
+    """
+    if not fields or model is None:
+      return None
+    publish_attrs = set(AttributeInfo.gather_publish_attrs(model))
+    custom_publish = AttributeInfo.gather_attr_dicts(model, "_custom_publish")
+    columns = collections.OrderedDict([("id", model.id)])
+    for field in fields:
+      if field not in publish_attrs or field in custom_publish:
+        return None
+      attr = getattr(model, field, None)
+      if cls._is_column(attr):
+        columns[field] = attr
+      elif field == "type":
+        columns[field] = utils.get_type_select_column(model)
+      else:
+        return None
+    updated_at = getattr(model, "updated_at", None)
+    if "updated_at" not in columns and cls._is_column(updated_at):
+      columns["updated_at"] = updated_at
+    return [column.label(name) for name, column in columns.iteritems()]
+
+  @staticmethod
+  def _project_rows(rows, fields):
+    """Make a JSON representation of rows of a flat projection."""
+    return [{field: getattr(row, field) for field in fields} for row in rows]
+
   @staticmethod
   def _get_last_modified(model, objects):
     """Get the time of last update of an object in the list."""
@@ -9,6 +9,7 @@ from ggrc import models
 from ggrc import db
 from ggrc.fulltext.mysql import MysqlRecordProperty as Record
 from ggrc.query import custom_operators
+from ggrc.query import utils
 from ggrc.query.exceptions import BadQueryException
 from ggrc.utils import benchmark
 
@@ -61,6 +62,52 @@ def get_total_count(query):
   return total
 
 
+def get_total_counts(queries):
+  """Get counts of all objects in several queries with one statement.
+
+  Args:
+    queries: a list of unsorted filter queries.
+
+  Returns:
+    a list of counts in the order of queries.
+  """
+  if not queries:
+    return []
+  count_statements = [
+      query.statement.with_only_columns([
+          sa.literal(position).label("position"),
+          sa.func.count().label("total"),
+      ])
+      for position, query in enumerate(queries)
+  ]
+  with benchmark("Get total counts: get_total_counts > union_all"):
+    totals = dict(db.session.execute(sa.union_all(*count_statements)))
+  return [totals[position] for position in range(len(queries))]
+
+
+def get_limit_count(limit, total):
+  """Get the number of objects in the page of limit out of total objects."""
+  page_size, first = _get_limit(limit)
+  return max(0, min(page_size, total - first))
+
+
+def get_page_total_count(query, limit, page_count):
+  """Get count of all objects in the query for a page of the limit.
+
+  The total is known without counting if the page is not full, unless it is
+  an empty page after the end of the results.
+
+  Args:
+    query: unsorted filter query;
+    limit: a tuple of indexes of the page in format (from, to);
+    page_count: the number of objects in the page.
+  """
+  page_size, first = _get_limit(limit)
+  if page_count < page_size and (page_count or not first):
+    return first + page_count
+  return get_total_count(query)
+
+
 def _joins_and_order(counter, clause, model, tgt_class):
   """Get join operations and ordering field from item of order_by list.
 
@@ -69,10 +116,11 @@ def _joins_and_order(counter, clause, model, tgt_class):
               "desc": reverse sort on this field if True}
 
   Returns:
-    ([joins], order) - a tuple of joins required for this ordering to work
-                        and ordering clause itself; join is None if no join
-                        required or [(aliased entity, relationship field)]
-                        if joins required.
+    ([joins], order, desc) - a tuple of joins required for this ordering to
+                             work, ordering column and reverse sort flag;
+                             join is None if no join required or
+                             [(aliased entity, relationship field)] if joins
+                             required.
   """
 
   def by_fulltext():
@@ -116,10 +164,33 @@ def _joins_and_order(counter, clause, model, tgt_class):
     # Snapshot or non object attributes are treated as custom attributes
     joins, order = by_fulltext()
 
-  if clause.get("desc", False):
-    order = order.desc()
+  return joins, order, clause.get("desc", False)
+
+
+def get_order_columns(model, query, order_by, tgt_class):
+  """Add joins required for ordering and get the ordering columns.
+
+  Args are the same as in apply_order_by.
+
+  Returns:
+    the query with joins and a list of (column, desc) tuples.
+  """
+  if not order_by:
+    return query, []
+  join_pairs = [
+      _joins_and_order(counter, clause, model, tgt_class)
+      for counter, clause in enumerate(order_by)
+  ]
+  join_lists, orders, descs = zip(*join_pairs)
+  join_lists = [join_list for join_list in join_lists if join_list is not None]
+  for join_list in join_lists:
+    query = query.outerjoin(*join_list)
+  return query, zip(orders, descs)
+
 
-  return joins, order
+def _order_clauses(order_columns):
+  """Get order_by clauses for a list of (column, desc) tuples."""
+  return [column.desc() if desc else column for column, desc in order_columns]
 
 
 def apply_order_by(model, query, order_by, tgt_class):
@@ -146,13 +217,46 @@ def apply_order_by(model, query, order_by, tgt_class):
     the query with sorting parameters.
   """
 
-  join_pairs = [
-      _joins_and_order(counter, clause, model, tgt_class)
-      for counter, clause in enumerate(order_by)
-  ]
-  join_lists, orders = zip(*join_pairs)
-  join_lists = [join_list for join_list in join_lists if join_list is not None]
-  for join_list in join_lists:
-    query = query.outerjoin(*join_list)
+  query, order_columns = get_order_columns(model, query, order_by, tgt_class)
+  return query.order_by(*_order_clauses(order_columns))
+
+
+def apply_cursor(model, query, order_by, tgt_class, cursor, page_size):
+  """Get a page of ids following the row of the cursor.
+
+  Unlike apply_limit with an offset, the page is found by seeking on the
+  ordering columns and id, so deep pages are as fast as the first one.
 
-  return query.order_by(*orders)
+  Args:
+    model, query, order_by, tgt_class: the same as in apply_order_by, query
+        must select the model id only;
+    cursor: continuation token of the previous page or None for the first
+        page;
+    page_size: the number of ids in the page.
+
+  Returns:
+    ids of the page and continuation token of the next page or None if
+    this is the last page.
+  """
+  try:
+    page_size = int(page_size)
+  except (ValueError, TypeError):
+    raise BadQueryException("Invalid page size. Integer expected.")
+  if page_size <= 0:
+    raise BadQueryException("Page size should be a positive number.")
+  query, order_columns = get_order_columns(model, query, order_by, tgt_class)
+  order_columns.append((model.id, False))
+  if cursor is not None:
+    values = utils.decode_cursor(cursor, len(order_columns))
+    query = query.filter(utils.keyset_filter(order_columns, values))
+  with benchmark("Apply cursor: apply_cursor > query_page"):
+    rows = query.add_columns(
+        *[column for column, _ in order_columns]
+    ).order_by(
+        *_order_clauses(order_columns)
+    ).limit(page_size + 1).all()
+  next_cursor = None
+  if len(rows) > page_size:
+    rows = rows[:page_size]
+    next_cursor = utils.encode_cursor(rows[-1][1:])
+  return [row[0] for row in rows], next_cursor
@@ -3,8 +3,15 @@
 
 """Utils module for query generation."""
 
+import base64
+import datetime
+import decimal
+import json
+
 import sqlalchemy as sa
 
+from ggrc.query.exceptions import BadQueryException
+
 
 def get_type_select_column(model):
   """Get column name,taking into account polymorphic types."""
@@ -20,3 +27,80 @@ def get_type_select_column(model):
             for val, m in mapper.polymorphic_map.items()
         })
   return type_column
+
+
+def _cursor_value(value):
+  """Get json serializable value of a sorting column for a cursor.
+
+  Dates are stored in the format MySQL uses for date and datetime literals.
+  """
+  if isinstance(value, (datetime.date, decimal.Decimal)):
+    return unicode(value)
+  return value
+
+
+def encode_cursor(values):
+  """Get opaque continuation token for values of sorting columns of a row."""
+  return base64.urlsafe_b64encode(
+      json.dumps([_cursor_value(value) for value in values])
+  )
+
+
+def decode_cursor(cursor, size):
+  """Get values of sorting columns stored in a continuation token.
+
+  Args:
+    cursor: continuation token created by encode_cursor.
+    size: the number of sorting columns.
+  Returns:
+    list of values of sorting columns.
+  Raises:
+    BadQueryException if the cursor is invalid or it does not contain a value
+    for every sorting column.
+  """
+  try:
+    values = json.loads(base64.urlsafe_b64decode(str(cursor)))
+  except (TypeError, ValueError):
+    raise BadQueryException("Invalid cursor.")
+  if not isinstance(values, list) or len(values) != size:
+    raise BadQueryException("Cursor does not match sorting of the query.")
+  return values
+
+
+def _follows(column, desc, value):
+  """Get condition for values following value in sorting by column.
+
+  MySQL puts NULL values before all other values in ascending order.
+  """
+  if value is None:
+    return sa.false() if desc else column.isnot(None)
+  if desc:
+    return sa.or_(column < value, column.is_(None))
+  return column > value
+
+
+def _equals(column, value):
+  """Get condition for values equal to value including NULL."""
+  if value is None:
+    return column.is_(None)
+  return column == value
+
+
+def keyset_filter(order_columns, values):
+  """Get filter for rows following the row with values in sort order.
+
+  Args:
+    order_columns: list of (column, desc) tuples the query is sorted by, the
+        last column must be unique.
+    values: values of order_columns for the last row of the previous page.
+  Returns:
+    filter expression seeking to the next page.
+  """
+  conditions = []
+  equal_prefix = []
+  for (column, desc), value in zip(order_columns, values):
+    conditions.append(sa.and_(*(equal_prefix + [
+        _follows(column, desc, value)
+    ])))
+    equal_prefix.append(_equals(column, value))
+  return sa.or_(*conditions)
@@ -148,6 +148,27 @@ def delete_resources_for(resource_type):
   return permissions_for(get_user()).delete_resources_for(resource_type)
 
 
+def get_contexts(model_name, permission_type='read'):
+  """Get allowed contexts."""
+  contexts_map = {
+      "create": create_contexts_for,
+      "read": read_contexts_for,
+      "update": update_contexts_for,
+      "delete": delete_contexts_for,
+  }
+  return contexts_map[permission_type](model_name)
+
+
+def get_resources_filter(id_column, model_name, permission_type='read'):
+  """Get filter expression for ids of resources allowed for the user.
+
+  Unlike resources lists returned by get_context_resource the filter can be
+  built by the permissions provider without loading all allowed ids.
+  """
+  return permissions_for(get_user()).resources_filter_for(
+      permission_type, model_name, id_column)
+
+
 def is_admin():
   """Whether the current user has ADMIN permission."""
   return permissions_for(get_user()).is_admin()
@@ -3,6 +3,7 @@
 
 from collections import namedtuple
 
+import sqlalchemy as sa
 from flask import g
 from flask.ext.login import current_user
 
@@ -210,15 +211,82 @@ _CONDITIONS_MAP = {
 }
 
 
+# super user, context_id 0 indicates all contexts
+ADMIN_PERMISSION = Permission(
+    '__GGRC_ADMIN__',
+    '__GGRC_ALL__',
+    None,
+    0,
+)
+
+_EMPTY_SET = frozenset()
+
+
+class CompiledPermissions(object):
+  """Permissions dict compiled for constant time lookups.
+
+  Permissions are loaded as nested dicts of lists, see
+  ggrc_basic_permissions.load_permissions_for. Here contexts and resources of
+  every (action, resource_type) pair are indexed as frozensets and conditions
+  are grouped by context, so that checks of single objects do not walk the
+  nested structure.
+  """
+
+  def __init__(self, permissions):
+    self.source = permissions
+    self.granted = set()
+    self.contexts = {}
+    self.resources = {}
+    self.conditions = {}
+    for action, resource_permissions in (permissions or {}).iteritems():
+      if not isinstance(resource_permissions, dict):
+        continue
+      for resource_type, permission in resource_permissions.iteritems():
+        key = (action, resource_type)
+        if permission:
+          self.granted.add(key)
+        self.contexts[key] = frozenset(permission.get('contexts', ()))
+        self.resources[key] = frozenset(permission.get('resources', ()))
+        self.conditions[key] = {
+            context_id: tuple(
+                (str(condition['condition']), condition.get('terms', {}))
+                for condition in conditions
+            )
+            for context_id, conditions in permission.get(
+                'conditions', {}).iteritems()
+        }
+    self.is_admin = self.match(ADMIN_PERMISSION)
+
+  def contexts_for(self, action, resource_type):
+    """Get set of context ids where the action is allowed."""
+    return self.contexts.get((action, resource_type), _EMPTY_SET)
+
+  def resources_for(self, action, resource_type):
+    """Get set of resource ids for which the action is allowed."""
+    return self.resources.get((action, resource_type), _EMPTY_SET)
+
+  def conditions_for(self, action, resource_type, context_id):
+    """Get conditions of the action in the given context."""
+    return self.conditions.get(
+        (action, resource_type), {}).get(context_id, ())
+
+  def match(self, permission):
+    """Check if the user has the given permission"""
+    contexts = self.contexts_for(permission.action, permission.resource_type)
+    if None in contexts:
+      return True
+    return (
+        permission.resource_id in self.resources_for(
+            permission.action, permission.resource_type) or
+        permission.context_id in contexts or
+        permission.context_id in self.contexts_for(
+            permission.action, ADMIN_PERMISSION.resource_type)
+    )
+
+
 class DefaultUserPermissions(object):
   """Common logic for user permissions."""
-  # super user, context_id 0 indicates all contexts
-  ADMIN_PERMISSION = Permission(
-      '__GGRC_ADMIN__',
-      '__GGRC_ALL__',
-      None,
-      0,
-  )
+  ADMIN_PERMISSION = ADMIN_PERMISSION
 
   def _admin_permission_for_context(self, context_id):
     """Create an admin permission object for the given context"""
@@ -228,44 +296,37 @@ class DefaultUserPermissions(object):
         None,
         context_id)
 
-  def _permission_match(self, permission, permissions):
+  @staticmethod
+  def _permission_match(permission, permissions):
     """Check if the user has the given permission"""
-
-    if None in \
-        permissions\
-            .get(permission.action, {})\
-            .get(permission.resource_type, {})\
-            .get('contexts', []):
-      return True
-    return \
-        permission.resource_id in permissions\
-        .get(permission.action, {})\
-        .get(permission.resource_type, {})\
-        .get('resources', [])\
-        or permission.context_id in \
-        permissions\
-        .get(permission.action, {})\
-        .get(permission.resource_type, {})\
-        .get('contexts', [])\
-        or permission.context_id in \
-        permissions\
-        .get(permission.action, {})\
-        .get(self.ADMIN_PERMISSION.resource_type, {})\
-        .get('contexts', [])
+    return permissions.match(permission)
 
   @staticmethod
   def _permissions():
     """Returns request permission from the global scope"""
     return getattr(g, '_request_permissions', {})
 
-  def _is_allowed(self, permission):
+  def _compiled_permissions(self):
+    """Get request permissions compiled for lookups.
+
+    Compiled permissions are stored in the global scope and are rebuilt only
+    if request permissions are replaced.
+    """
     permissions = self._permissions()
+    compiled = getattr(g, '_compiled_permissions', None)
+    if compiled is None or compiled.source is not permissions:
+      compiled = CompiledPermissions(permissions)
+      setattr(g, '_compiled_permissions', compiled)
+    return compiled
+
+  def _is_allowed(self, permission):
+    permissions = self._compiled_permissions()
     if permission.context_id \
        and self._is_allowed(permission._replace(context_id=None)):
       return True
     if self._permission_match(permission, permissions):
       return True
-    if self._permission_match(self.ADMIN_PERMISSION, permissions):
+    if permissions.is_admin:
       return True
     return self._permission_match(
         self._admin_permission_for_context(permission.context_id),
@@ -274,55 +335,40 @@ class DefaultUserPermissions(object):
   @staticmethod
   def _check_conditions(instance, action, conditions):
     """Check if any condition is valid for the instance."""
-    for condition in conditions:
-      func = _CONDITIONS_MAP[str(condition['condition'])]
-      terms = condition.setdefault('terms', {})
+    for condition, terms in conditions:
+      func = _CONDITIONS_MAP[condition]
       if func(instance, _current_action=action, **terms):
         return True
     return False
 
   def _is_allowed_for(self, instance, action):
-    permissions = self._permissions()
+    permissions = self._compiled_permissions()
     # Check for admin permission
-    if self._permission_match(self.ADMIN_PERMISSION, permissions):
-      conditions = permissions[self.ADMIN_PERMISSION.action]\
-          .get(self.ADMIN_PERMISSION.resource_type)\
-          .get("conditions", {})\
-          .get(None, [])
+    if permissions.is_admin:
+      conditions = permissions.conditions_for(
+          self.ADMIN_PERMISSION.action,
+          self.ADMIN_PERMISSION.resource_type,
+          None,
+      )
       if not conditions:
         return True
       return self._check_conditions(instance, action, conditions)
-    if (not permissions.get(action) or
-       not permissions[action].get(instance._inflector.model_singular)):
+    resource_type = instance._inflector.model_singular
+    if (action, resource_type) not in permissions.granted:
       return False
-    resources = self._permissions()\
-        .setdefault(action, {})\
-        .setdefault(instance._inflector.model_singular, {})\
-        .setdefault('resources', [])
-    contexts = self._permissions()\
-        .setdefault(action, {})\
-        .setdefault(instance._inflector.model_singular, {})\
-        .setdefault('contexts', [])
+    if instance.id in permissions.resources_for(action, resource_type):
+      return True
     # We can't use instance.context_id, because it requires the
     # object <-> context mapping to be created,
     # which isn't the case when creating objects
     context_id = None
     if hasattr(instance, 'context') and hasattr(instance.context, 'id'):
       context_id = instance.context.id
-    if instance.id in resources:
-      return True
-    no_context_conditions = self._permissions()\
-        .setdefault(action, {})\
-        .setdefault(instance._inflector.model_singular, {})\
-        .setdefault('conditions', {})\
-        .setdefault(None, [])
-
-    context_conditions = self._permissions()\
-        .setdefault(action, {})\
-        .setdefault(instance._inflector.model_singular, {})\
-        .setdefault('conditions', {})\
-        .setdefault(context_id, [])
-    conditions = no_context_conditions + context_conditions
+    conditions = (
+        permissions.conditions_for(action, resource_type, None) +
+        permissions.conditions_for(action, resource_type, context_id)
+    )
+    contexts = permissions.contexts_for(action, resource_type)
     # Check any conditions applied per resource
     if (None in contexts or context_id in contexts) and not conditions:
       return True
@@ -371,9 +417,9 @@ class DefaultUserPermissions(object):
   def _get_resources_for(self, action, resource_type):
     """Get resources resources (object ids) for a given action and
     resource_type"""
-    permissions = self._permissions()
+    permissions = self._compiled_permissions()
 
-    if self._permission_match(self.ADMIN_PERMISSION, permissions):
+    if permissions.is_admin:
       return None
 
     # Get the list of resources for a given resource type and any
@@ -382,19 +428,15 @@ class DefaultUserPermissions(object):
 
     ret = []
     for resource_type in resource_types:
-      ret.extend(
-          permissions
-          .get(action, {})
-          .get(resource_type, {})
-          .get('resources', set()))
+      ret.extend(permissions.resources_for(action, resource_type))
     return ret
 
   def _get_contexts_for(self, action, resource_type):
     # FIXME: (Security) When applicable, we should explicitly assert that no
     #   permissions are expected (e.g. that every user has ADMIN_PERMISSION).
-    permissions = self._permissions()
+    permissions = self._compiled_permissions()
 
-    if self._permission_match(self.ADMIN_PERMISSION, permissions):
+    if permissions.is_admin:
       return None
 
     # Get the list of contexts for a given resource type and any
@@ -403,16 +445,13 @@ class DefaultUserPermissions(object):
 
     ret = []
     for resource_type in resource_types:
-      ret.extend(permissions.get(action, {})
-                            .get(resource_type, {})
-                            .get('contexts', []))
+      ret.extend(permissions.contexts_for(action, resource_type))
 
     # Extend with the list of all contexts for which the user is an ADMIN
-    admin_list = list(
-        permissions.get(self.ADMIN_PERMISSION.action, {})
-        .get(self.ADMIN_PERMISSION.resource_type, {})
-        .get('contexts', ()))
-    ret.extend(admin_list)
+    ret.extend(permissions.contexts_for(
+        self.ADMIN_PERMISSION.action,
+        self.ADMIN_PERMISSION.resource_type,
+    ))
     if None in ret:
       return None
     return ret
@@ -433,6 +472,19 @@ class DefaultUserPermissions(object):
     """All contexts in which the user has delete permission."""
     return self._get_contexts_for('delete', resource_type)
 
+  def resources_filter_for(self, action, resource_type, id_column):
+    """Get filter expression for ids of resources available for action.
+
+    Args:
+      action: name of the action, one of create, read, update or delete.
+      resource_type: name of the resource model.
+      id_column: column that holds ids of the filtered resources.
+    Returns:
+      sqlalchemy filter expression.
+    """
+    resources = self._get_resources_for(action, resource_type)
+    return id_column.in_(resources) if resources else sa.false()
+
   def create_resources_for(self, resource_type):
     """All resources in which the user has create permission."""
     return self._get_resources_for('create', resource_type)
@@ -42,6 +42,7 @@ from ggrc.services.attribute_query import AttributeQueryBuilder
 from ggrc.services import signals
 from ggrc.models.background_task import BackgroundTask, create_task
 from ggrc.query import utils as query_utils
+from ggrc.query.exceptions import BadQueryException
 from ggrc import settings
 from ggrc.cache import utils as cache_utils
 from ggrc.utils import errors as ggrc_errors
@@ -180,6 +181,32 @@ class ModelView(View):
     return self.filter_query_by_request(
         query, filter_by_contexts=filter_by_contexts)
 
+  def get_order_columns(self):
+    """Get a list of (column, desc) tuples collection is sorted by.
+
+    The list ends with the id column, so it defines a unique order of
+    objects.
+    """
+    order_columns = []
+    if '__sort' in request.args:
+      sort_attrs = request.args['__sort'].split(",")
+      sort_desc = request.args.get('__sort_desc', False)
+      for sort_attr in sort_attrs:
+        attr_desc = sort_desc
+        if sort_attr.startswith('-'):
+          attr_desc = not sort_desc
+          sort_attr = sort_attr[1:]
+        order_property = getattr(self.model, sort_attr, None)
+        if order_property and hasattr(order_property, 'desc'):
+          order_columns.append((order_property, attr_desc))
+        else:
+          # Possibly throw an exception instead,
+          # if sorting by invalid attribute?
+          pass
+    order_columns.append((self.modified_attr, True))
+    order_columns.append((self.model.id, True))
+    return order_columns
+
   def get_resource_match_query(self, model, obj_id):
     columns = self.get_match_columns(model)
     query = db.session.query(*columns).filter(
@@ -273,27 +300,10 @@ class ModelView(View):
             search_query, models, get_current_user_id())
       search_subquery = search_query.subquery()
       query = query.filter(self.model.id.in_(search_subquery))
-    order_properties = []
-    if '__sort' in request.args:
-      sort_attrs = request.args['__sort'].split(",")
-      sort_desc = request.args.get('__sort_desc', False)
-      for sort_attr in sort_attrs:
-        attr_desc = sort_desc
-        if sort_attr.startswith('-'):
-          attr_desc = not sort_desc
-          sort_attr = sort_attr[1:]
-        order_property = getattr(self.model, sort_attr, None)
-        if order_property and hasattr(order_property, 'desc'):
-          if attr_desc:
-            order_property = order_property.desc()
-          order_properties.append(order_property)
-        else:
-          # Possibly throw an exception instead,
-          # if sorting by invalid attribute?
-          pass
-    order_properties.append(self.modified_attr.desc())
-    order_properties.append(self.model.id.desc())
-    query = query.order_by(*order_properties)
+    query = query.order_by(*[
+        column.desc() if desc else column
+        for column, desc in self.get_order_columns()
+    ])
     if '__limit' in request.args:
       try:
         limit = int(request.args['__limit'])
@@ -701,6 +711,8 @@ class Resource(ModelView):
     page_size = min(
         int(request.args.get('__page_size', self.DEFAULT_PAGE_SIZE)),
         self.MAX_PAGE_SIZE)
+    if '__cursor' in request.args:
+      return self.apply_cursor_paging(matches_query, page_size)
     if '__page_only' in request.args:
       page_number = int(request.args.get('__page', 0))
       matches = []
@@ -722,23 +734,39 @@ class Resource(ModelView):
     }
     return matches, collection_extras
 
-  def get_matched_resources(self, matches):
-    cache_objs = {}
-    if self.has_cache():
-      self.request.cache_manager = cache_utils.get_cache_manager()
-      with benchmark("Query cache for resources"):
-        cache_objs = self.get_resources_from_cache(matches)
-      database_matches = [m for m in matches if m not in cache_objs]
-    else:
-      database_matches = matches
+  def apply_cursor_paging(self, matches_query, page_size):
+    """Get a page of matches following the row of __cursor argument.
 
-    database_objs = {}
-    if database_matches:
-      database_objs = self.get_resources_from_database(matches)
-      if self.has_cache():
-        with benchmark("Add resources to cache"):
-          self.add_resources_to_cache(database_objs)
-    return cache_objs, database_objs
+    The page is found by seeking on the sorting columns instead of an offset
+    and an empty __cursor requests the first page. The paging object contains
+    a link to the next page and the total count only if __total argument is
+    set.
+    """
+    paging_obj = {}
+    if '__total' in request.args:
+      paging_obj['total'] = matches_query.order_by(None).count()
+    order_columns = self.get_order_columns()
+    cursor = request.args['__cursor']
+    if cursor:
+      try:
+        values = query_utils.decode_cursor(cursor, len(order_columns))
+      except BadQueryException as error:
+        raise BadRequest(error.message)
+      matches_query = matches_query.filter(
+          query_utils.keyset_filter(order_columns, values))
+    matches = matches_query.limit(page_size + 1).all()
+    if len(matches) > page_size:
+      matches = matches[:page_size]
+      last_row = db.session.query(
+          *[column for column, _ in order_columns]
+      ).filter(
+          self.model.id == matches[-1][0],
+      ).one()
+      args = dict([(k, unicode(v)) for k, v in request.args.items()])
+      args['__cursor'] = query_utils.encode_cursor(last_row)
+      paging_obj['next'] = self.url_for() + '?' + urlencode(
+          utils.encoded_dict(args))
+    return matches, {'paging': paging_obj}
 
   def collection_get(self):
     with benchmark("dispatch_request > collection_get > Check headers"):
@@ -762,7 +790,8 @@ class Resource(ModelView):
       matches_query = self.get_collection_matches(
           self.model, filter_by_contexts)
     with benchmark("dispatch_request > collection_get > Query Data"):
-      if '__page' in request.args or '__page_only' in request.args:
+      if any(arg in request.args
+             for arg in ('__page', '__page_only', '__cursor')):
         with benchmark("Query matches with paging"):
           matches, extras = self.apply_paging(matches_query)
       else:
@@ -770,7 +799,6 @@ class Resource(ModelView):
           matches = matches_query.all()
           extras = {}
     with benchmark("dispatch_request > collection_get > Matched resources"):
-      cache_op = None
       if '__stubs_only' in request.args:
         objs = [{
             'id': m[0],
@@ -780,16 +808,13 @@ class Resource(ModelView):
         } for m in matches]
 
       else:
-        cache_objs, database_objs = self.get_matched_resources(matches)
         objs = {}
-        objs.update(cache_objs)
-        objs.update(database_objs)
+        if matches:
+          objs = self.get_resources_from_database(matches)
 
         objs = [objs[m] for m in matches if m in objs]
         with benchmark("Filter resources based on permissions"):
           objs = filter_resource(objs)
-
-        cache_op = 'Hit' if cache_objs else 'Miss'
     with benchmark("dispatch_request > collection_get > Create Response"):
       # Return custom fields specified via `__fields=id,title,description` etc.
       # TODO this can be optimized by filter_resource() not retrieving
@@ -808,39 +833,7 @@ class Resource(ModelView):
 
       with benchmark("Make response"):
         return self.json_success_response(
-            collection, self.collection_last_modified(), cache_op=cache_op)
-
-  def get_resources_from_cache(self, matches):
-    """Get resources from cache for specified matches"""
-    resources = {}
-    # Disable caching for background tasks
-    # Setting background task status circumvents our memcache
-    # invalidation logic so we have to disabling memcache.
-    if self.model.__name__ == 'BackgroundTask':
-      return resources
-    # Skip right to memcache
-    memcache_client = self.request.cache_manager.cache_object.memcache_client
-    for match in matches:
-      key = cache_utils.get_cache_key(None, id_=match[0], type_=match[1])
-      val = memcache_client.get(key)
-      if val:
-        val = json.loads(val)
-      else:
-        val = {}
-      if "selfLink" in val:
-        resources[match] = val
-    return resources
-
-  def add_resources_to_cache(self, match_obj_pairs):
-    """Add resources to cache if they are not blocked by DeleteOp entries"""
-    # Skip right to memcache
-    cache_manager = self.request.cache_manager
-    memcache_client = cache_manager.cache_object.memcache_client
-    for match, obj in match_obj_pairs.items():
-      if obj.__class__.__name__ in cache_manager.supported_classes:
-        memcache_client.add(
-            cache_utils.get_cache_key(None, id_=match[0], type_=match[1]),
-            as_json(obj))
+            collection, self.collection_last_modified())
 
   def invalidate_cache_to(self, obj):
     """Invalidate api cache for sent object."""
@@ -17,6 +17,8 @@ from ggrc import models
 from ggrc.utils import benchmark
 from ggrc.rbac import permissions
 from ggrc.services import common
+from ggrc.snapshotter.datastructures import Stub
+from ggrc.snapshotter.helpers import get_outdated_snapshots
 
 
 class AuditResource(common.ExtendedResource):
@@ -31,6 +33,7 @@ class AuditResource(common.ExtendedResource):
     command_map = {
         None: super(AuditResource, self).get,
         "summary": self.summary_query,
+        "outdated_snapshots": self.outdated_snapshots_query,
     }
     command = kwargs.pop("command", None)
     if command not in command_map:
@@ -126,3 +129,28 @@ class AuditResource(common.ExtendedResource):
       statuses_json.sort(key=lambda k: (k["name"], k["verified"]))
       response_object = {"statuses": statuses_json, "total": total}
       return self.json_success_response(response_object, )
+
+  def outdated_snapshots_query(self, id):
+    """Get counts and ids of audit snapshots that can be updated.
+
+    The response is used by "Update objects to latest version" dialog and
+    contains snapshots that would be updated by snapshots upsert operation.
+    """
+    # id name is used as a kw argument and can't be changed here
+    # pylint: disable=invalid-name,redefined-builtin
+    with benchmark("check audit permissions"):
+      audit = models.Audit.query.get(id)
+      if not permissions.is_allowed_read_for(audit):
+        raise Forbidden()
+    with benchmark("Get outdated snapshots"):
+      outdated = get_outdated_snapshots(Stub(audit.type, audit.id))
+    with benchmark("Make response"):
+      snapshots_json = {
+          child_type: {"count": len(ids), "ids": ids}
+          for child_type, ids in outdated.iteritems()
+      }
+      response_object = {
+          "snapshots": snapshots_json,
+          "total": sum(len(ids) for ids in outdated.itervalues()),
+      }
+      return self.json_success_response(response_object, )
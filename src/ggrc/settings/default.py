@@ -89,6 +89,19 @@ SECRET_KEY = os.environ.get('GGRC_SECRET_KEY', 'Replace-with-something-secret')
 
 MEMCACHE_MECHANISM = True
 
+# Number of imported rows committed in one transaction, 1 commits every row
+IMPORT_COMMIT_BATCH_SIZE = int(
+    os.environ.get('GGRC_IMPORT_COMMIT_BATCH_SIZE', '1'))
+
+# Age in seconds of the newest revision handled by incremental reindex. Older
+# transactions are expected to be committed by then.
+REINDEX_WATERMARK_MARGIN = int(
+    os.environ.get('GGRC_REINDEX_WATERMARK_MARGIN', '300'))
+
+# Max number of users whose permissions are cached in memory of every instance
+PERMISSION_LOCAL_CACHE_SIZE = int(
+    os.environ.get('GGRC_PERMISSION_LOCAL_CACHE_SIZE', '1000'))
+
 # AppEngine Email
 APPENGINE_EMAIL = os.environ.get('APPENGINE_EMAIL', '')
 
@@ -190,6 +203,18 @@ ALLOWED_QUERYAPI_APP_IDS = os.environ.get(
     "",
 ).split()
 
+# Flag defining whether fulltext records are built by a background task
+# instead of the commit of the request that changed objects.
+FULLTEXT_DEFERRED_INDEXING = bool(
+    os.environ.get("GGRC_FULLTEXT_DEFERRED_INDEXING")
+)
+
+# Endpoints that keep synchronous fulltext indexing in deferred mode.
+FULLTEXT_SYNC_INDEXING_ENDPOINTS = os.environ.get(
+    "GGRC_FULLTEXT_SYNC_INDEXING_ENDPOINTS",
+    "",
+).split()
+
 # Flag to enable or disable What's New pop-up
 ENABLE_RELEASE_NOTES = True
 
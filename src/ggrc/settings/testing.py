@@ -16,5 +16,6 @@ FULLTEXT_INDEXER = 'ggrc.fulltext.mysql.MysqlIndexer'
 LOGIN_MANAGER = 'ggrc.login.noop'
 # SQLALCHEMY_ECHO = True
 MEMCACHE_MECHANISM = False
+REINDEX_WATERMARK_MARGIN = 0
 EXTERNAL_APP_USER = 'External App <external_app@example.com>'
 ENABLE_RELEASE_NOTES = False
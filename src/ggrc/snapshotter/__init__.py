@@ -8,6 +8,7 @@ snapshot object represent a join between parent object (Audit),
 child object (e.g. Control, Regulation, ...) and a particular revision.
 """
 
+import collections
 from logging import getLogger
 
 import sqlalchemy as sa
@@ -16,6 +17,7 @@ from sqlalchemy.sql.expression import bindparam
 
 from ggrc import db
 from ggrc import models
+from ggrc import utils
 from ggrc.models.hooks import acl
 from ggrc.login import get_current_user_id
 from ggrc.models import all_models
@@ -26,9 +28,10 @@ from ggrc.snapshotter.datastructures import Pair
 from ggrc.snapshotter.datastructures import Stub
 from ggrc.snapshotter.datastructures import OperationResponse
 from ggrc.snapshotter.helpers import create_snapshot_dict
-from ggrc.snapshotter.helpers import create_snapshot_revision_dict
 from ggrc.snapshotter.helpers import get_revisions
-from ggrc.snapshotter.helpers import get_snapshots
+from ggrc.snapshotter.helpers import pairs_filter
+from ggrc.snapshotter.helpers import snapshot_revision_content
+from ggrc.snapshotter.helpers import stubs_filter
 from ggrc.snapshotter.indexer import reindex_pairs
 
 from ggrc.snapshotter.rules import get_rules
@@ -39,6 +42,9 @@ logger = getLogger(__name__)
 class SnapshotGenerator(object):
   """Geneate snapshots per rules of all connected objects"""
 
+  # Number of rows written to the database with a single statement
+  WRITE_CHUNK_SIZE = 1000
+
   def __init__(self, dry_run):
     self.rules = get_rules()
 
@@ -75,11 +81,9 @@ class SnapshotGenerator(object):
   def _fetch_neighborhood(self, parent_object, objects):
     """Fetch relationships for objects and parent."""
     with benchmark("Snapshot._fetch_object_neighborhood"):
-      query_pairs = set()
-
-      for obj in objects:
-        for snd_obj in self.rules.rules[parent_object.type]["snd"]:
-          query_pairs.add((obj.type, obj.id, snd_obj))
+      snd_types = self.rules.rules[parent_object.type]["snd"]
+      if not objects or not snd_types:
+        return set()
 
       columns = db.session.query(
           models.Relationship.source_type,
@@ -88,16 +92,22 @@ class SnapshotGenerator(object):
           models.Relationship.destination_id)
 
       relationships = columns.filter(
-          tuple_(
+          stubs_filter(
               models.Relationship.destination_type,
               models.Relationship.destination_id,
-              models.Relationship.source_type,
-          ).in_(query_pairs)).union(
-          columns.filter(tuple_(
-              models.Relationship.source_type,
-              models.Relationship.source_id,
-              models.Relationship.destination_type,
-          ).in_(query_pairs)))
+              objects,
+          ),
+          models.Relationship.source_type.in_(list(snd_types)),
+      ).union(
+          columns.filter(
+              stubs_filter(
+                  models.Relationship.source_type,
+                  models.Relationship.source_id,
+                  objects,
+              ),
+              models.Relationship.destination_type.in_(list(snd_types)),
+          )
+      )
 
       neighborhood = set()
       for (stype, sid, dtype, did) in relationships:
@@ -169,7 +179,6 @@ class SnapshotGenerator(object):
       snapshot_cache = dict()
       modified_snapshot_keys = set()
       data_payload_update = list()
-      revision_payload = list()
       response_data = dict()
 
       if self.dry_run and event is None:
@@ -182,17 +191,16 @@ class SnapshotGenerator(object):
           for_update = {elem for elem in for_update if _filter(elem)}
 
       with benchmark("Snapshot._update.get existing snapshots"):
-        existing_snapshots = db.session.query(
-            models.Snapshot.id,
-            models.Snapshot.revision_id,
-            models.Snapshot.parent_type,
-            models.Snapshot.parent_id,
-            models.Snapshot.child_type,
-            models.Snapshot.child_id,
-        ).filter(tuple_(
-            models.Snapshot.parent_type, models.Snapshot.parent_id,
-            models.Snapshot.child_type, models.Snapshot.child_id
-        ).in_({pair.to_4tuple() for pair in for_update}))
+        existing_snapshots = []
+        if for_update:
+          existing_snapshots = db.session.query(
+              models.Snapshot.id,
+              models.Snapshot.revision_id,
+              models.Snapshot.parent_type,
+              models.Snapshot.parent_id,
+              models.Snapshot.child_type,
+              models.Snapshot.child_id,
+          ).filter(pairs_filter(for_update))
 
         for esnap in existing_snapshots:
           sid, rev_id, pair_tuple = esnap[0], esnap[1], esnap[2:]
@@ -240,19 +248,16 @@ class SnapshotGenerator(object):
             modified_by_id=bindparam("_modified_by_id"))
         self._execute(update_sql, data_payload_update)
 
-      with benchmark("Snapshot._update.retrieve inserted snapshots"):
-        snapshots = get_snapshots(modified_snapshot_keys)
-
-      with benchmark("Snapshot._update.create snapshots revision payload"):
-        for snapshot in snapshots:
-          parent = Stub(snapshot.parent_type, snapshot.parent_id)
-          context_id = self.context_cache[parent]
-          data = create_snapshot_revision_dict("modified", event_id, snapshot,
-                                               user_id, context_id)
-          revision_payload += [data]
-
       with benchmark("Insert Snapshot entries into Revision"):
-        self._execute(models.Revision.__table__.insert(), revision_payload)
+        if not self.dry_run:
+          ids_by_parent = collections.defaultdict(list)
+          for key in modified_snapshot_keys:
+            ids_by_parent[key.parent].append(snapshot_cache[key][0])
+          for parent, ids in ids_by_parent.iteritems():
+            for chunk in utils.list_chunks(ids, self.WRITE_CHUNK_SIZE):
+              self._insert_snapshot_revisions(
+                  "modified", event_id, user_id, parent,
+                  models.Snapshot.id.in_(chunk))
       return OperationResponse("update", True, for_update, response_data)
 
   def analyze(self):
@@ -321,13 +326,140 @@ class SnapshotGenerator(object):
   def _execute(self, operation, data):
     """Execute bulk operation on data if not in dry mode
 
+    Data is written in chunks of WRITE_CHUNK_SIZE rows, so statements for
+    large scopes do not exceed the maximum packet size of the database.
+
     Args:
       operation: sqlalchemy operation
       data: a list of dictionaries with keys representing column names and
         values to insert with operation
     """
-    if data and not self.dry_run:
-      db.session.execute(operation, data)
+    if self.dry_run:
+      return
+    for chunk in utils.list_chunks(data, self.WRITE_CHUNK_SIZE):
+      db.session.execute(operation, chunk)
+
+  def _insert_snapshots(self, pairs, user_id):
+    """Insert snapshots of pairs that point to latest revisions of children.
+
+    Latest revision ids are selected by the database within the insert
+    statement, one INSERT ... SELECT per parent and chunk of its children.
+
+    Args:
+      pairs: set of (parent, child) pairs to create snapshots for.
+      user_id: id of the user creating the snapshots.
+    """
+    snapshot_table = models.Snapshot.__table__
+    revision_table = models.Revision.__table__
+    children_by_parent = collections.defaultdict(list)
+    for parent, child in pairs:
+      children_by_parent[parent].append(child)
+
+    for parent, children in children_by_parent.iteritems():
+      for chunk in utils.list_chunks(children, self.WRITE_CHUNK_SIZE):
+        select_statement = sa.select([
+            sa.literal(parent.type),
+            sa.literal(parent.id),
+            revision_table.c.resource_type,
+            revision_table.c.resource_id,
+            sa.func.max(revision_table.c.id),
+            sa.literal(user_id),
+            sa.literal(self.context_cache[parent]),
+            sa.func.now(),
+            sa.func.now(),
+        ]).where(
+            stubs_filter(
+                revision_table.c.resource_type,
+                revision_table.c.resource_id,
+                chunk,
+            )
+        ).group_by(
+            revision_table.c.resource_type,
+            revision_table.c.resource_id,
+        )
+        db.session.execute(snapshot_table.insert().from_select(
+            [
+                snapshot_table.c.parent_type,
+                snapshot_table.c.parent_id,
+                snapshot_table.c.child_type,
+                snapshot_table.c.child_id,
+                snapshot_table.c.revision_id,
+                snapshot_table.c.modified_by_id,
+                snapshot_table.c.context_id,
+                snapshot_table.c.created_at,
+                snapshot_table.c.updated_at,
+            ],
+            select_statement
+        ))
+
+  def _get_inserted_revisions(self, last_snapshot_id):
+    """Get revision ids of snapshots inserted after the given snapshot id.
+
+    Returns:
+      dict with pairs as keys and snapshot revision ids as values.
+    """
+    query = db.session.query(
+        models.Snapshot.parent_type,
+        models.Snapshot.parent_id,
+        models.Snapshot.child_type,
+        models.Snapshot.child_id,
+        models.Snapshot.revision_id,
+    ).filter(
+        models.Snapshot.id > last_snapshot_id,
+        tuple_(
+            models.Snapshot.parent_type, models.Snapshot.parent_id
+        ).in_(self.parents),
+    )
+    return {Pair.from_4tuple(row[:4]): row[4] for row in query}
+
+  def _insert_snapshot_revisions(self, action, event_id, user_id, parent,
+                                 condition):
+    """Insert revisions of the parent's snapshots matching the condition.
+
+    Revision content is built from the snapshot rows by the database, with
+    one INSERT ... SELECT statement.
+
+    Args:
+      action: revision action, "created" or "modified".
+      event_id: id of the event the revisions belong to.
+      user_id: id of the user that modified the snapshots.
+      parent: Stub of the parent object of the snapshots.
+      condition: filter expression selecting snapshots of the parent.
+    """
+    snapshot_table = models.Snapshot.__table__
+    revision_table = models.Revision.__table__
+    context_id = self.context_cache[parent]
+    select_statement = sa.select([
+        snapshot_table.c.id,
+        sa.literal(models.Snapshot.__name__),
+        sa.literal(event_id),
+        sa.literal(action),
+        snapshot_revision_content(user_id, context_id),
+        sa.literal(user_id),
+        sa.literal(context_id),
+        sa.func.now(),
+        sa.func.now(),
+    ]).where(
+        sa.and_(
+            snapshot_table.c.parent_type == parent.type,
+            snapshot_table.c.parent_id == parent.id,
+            condition,
+        )
+    )
+    db.session.execute(revision_table.insert().from_select(
+        [
+            revision_table.c.resource_id,
+            revision_table.c.resource_type,
+            revision_table.c.event_id,
+            revision_table.c.action,
+            revision_table.c.content,
+            revision_table.c.modified_by_id,
+            revision_table.c.context_id,
+            revision_table.c.created_at,
+            revision_table.c.updated_at,
+        ],
+        select_statement
+    ))
 
   def create(self, event, revisions, _filter=None):
     """Create snapshots of parent object's neighborhood per provided rules
@@ -359,9 +491,7 @@ class SnapshotGenerator(object):
     with benchmark("Snapshot._create"):
       with benchmark("Snapshot._create init"):
         user_id = get_current_user_id()
-        missed_keys = set()
         data_payload = list()
-        revision_payload = list()
         response_data = dict()
 
         if self.dry_run and event is None:
@@ -373,46 +503,48 @@ class SnapshotGenerator(object):
         if _filter:
           for_create = {elem for elem in for_create if _filter(elem)}
 
-      with benchmark("Snapshot._create._get_revisions"):
-        revision_id_cache = get_revisions(for_create, revisions)
+      last_snapshot_id = db.session.query(
+          sa.func.max(models.Snapshot.id)).scalar() or 0
+
+      if self.dry_run or revisions:
+        with benchmark("Snapshot._create._get_revisions"):
+          revision_id_cache = get_revisions(for_create, revisions)
+
+        with benchmark("Snapshot._create.create payload"):
+          for pair in for_create:
+            if pair in revision_id_cache:
+              revision_id = revision_id_cache[pair]
+              context_id = self.context_cache[pair.parent]
+              data = create_snapshot_dict(pair, revision_id, user_id,
+                                          context_id)
+              data_payload += [data]
+
+        with benchmark("Snapshot._create.write to database"):
+          self._execute(
+              models.Snapshot.__table__.insert(),
+              data_payload
+          )
+      else:
+        with benchmark("Snapshot._create.write to database"):
+          self._insert_snapshots(for_create, user_id)
 
-      response_data["revisions"] = revision_id_cache
+        with benchmark("Snapshot._create.retrieve inserted snapshots"):
+          revision_id_cache = self._get_inserted_revisions(last_snapshot_id)
 
-      with benchmark("Snapshot._create.create payload"):
-        for pair in for_create:
-          if pair in revision_id_cache:
-            revision_id = revision_id_cache[pair]
-            context_id = self.context_cache[pair.parent]
-            data = create_snapshot_dict(pair, revision_id, user_id, context_id)
-            data_payload += [data]
-          else:
-            missed_keys.add(pair)
+      response_data["revisions"] = revision_id_cache
 
+      missed_keys = for_create - set(revision_id_cache)
       if missed_keys:
         logger.warning(
             "Tried to create snapshots for the following objects but "
             "found no revisions: %s", missed_keys)
 
-      with benchmark("Snapshot._create.write to database"):
-        self._execute(
-            models.Snapshot.__table__.insert(),
-            data_payload
-        )
-
-      with benchmark("Snapshot._create.retrieve inserted snapshots"):
-        snapshots = get_snapshots(for_create)
-
-      with benchmark("Snapshot._create.create revision payload"):
-        with benchmark("Snapshot._create.create snapshots revision payload"):
-          for snapshot in snapshots:
-            parent = Stub(snapshot.parent_type, snapshot.parent_id)
-            context_id = self.context_cache[parent]
-            data = create_snapshot_revision_dict("created", event_id, snapshot,
-                                                 user_id, context_id)
-            revision_payload += [data]
-
       with benchmark("Snapshot._create.write revisions to database"):
-        self._execute(models.Revision.__table__.insert(), revision_payload)
+        if not self.dry_run:
+          for parent in {pair.parent for pair in for_create}:
+            self._insert_snapshot_revisions(
+                "created", event_id, user_id, parent,
+                models.Snapshot.id > last_snapshot_id)
       return OperationResponse("create", True, for_create, response_data)
 
   def _copy_snapshot_relationships(self):
@@ -6,10 +6,12 @@
 import collections
 from logging import getLogger
 
-from sqlalchemy.sql.expression import tuple_, func
+import sqlalchemy as sa
+from sqlalchemy.sql.expression import func
 
 from ggrc import db
 from ggrc import models
+from ggrc import utils
 from ggrc.snapshotter.datastructures import Stub
 from ggrc.snapshotter.datastructures import Pair
 from ggrc.utils import benchmark
@@ -17,6 +19,41 @@ from ggrc.utils import benchmark
 logger = getLogger(__name__)
 
 
+def stubs_filter(type_column, id_column, stubs):
+  """Get filter expression matching any of the given stubs.
+
+  Stubs are grouped by type, so the filter consists of plain IN conditions
+  over ids that can use indexes on type and id columns. A row constructor IN
+  over (type, id) tuples can not use them.
+  """
+  ids_by_type = collections.defaultdict(set)
+  for stub in stubs:
+    ids_by_type[stub.type].add(stub.id)
+  return sa.or_(*[
+      sa.and_(type_column == type_, id_column.in_(ids))
+      for type_, ids in ids_by_type.iteritems()
+  ])
+
+
+def pairs_filter(pairs):
+  """Get filter expression matching snapshots of any of the given pairs."""
+  children_by_parent = collections.defaultdict(set)
+  for parent, child in pairs:
+    children_by_parent[parent].add(child)
+  return sa.or_(*[
+      sa.and_(
+          models.Snapshot.parent_type == parent.type,
+          models.Snapshot.parent_id == parent.id,
+          stubs_filter(
+              models.Snapshot.child_type,
+              models.Snapshot.child_id,
+              children,
+          ),
+      )
+      for parent, children in children_by_parent.iteritems()
+  ])
+
+
 def get_revision_query_for(statement, filters):
   return db.session.query(
       func.max(models.Revision.id),
@@ -41,11 +78,10 @@ def get_revisions_query(child_stubs, revisions, filters=None):
     ))
   if child_stubs:
     queries.append(get_revision_query_for(
-        tuple_(
+        stubs_filter(
             models.Revision.resource_type,
             models.Revision.resource_id,
-        ).in_(
-            child_stubs
+            child_stubs,
         ),
         filters,
     ))
@@ -97,38 +133,6 @@ def get_revisions(pairs, revisions, filters=None):
     return revision_id_cache
 
 
-def get_snapshots(objects=None, ids=None):
-  with benchmark("snapshotter.helpers.get_snapshots"):
-    if objects and ids:
-      raise Exception(
-          "Insert only iterable of (parent, child) tuples or set of IDS")
-    columns = db.session.query(
-        models.Snapshot.id,
-        models.Snapshot.context_id,
-        models.Snapshot.created_at,
-        models.Snapshot.updated_at,
-        models.Snapshot.parent_type,
-        models.Snapshot.parent_id,
-        models.Snapshot.child_type,
-        models.Snapshot.child_id,
-        models.Snapshot.revision_id,
-        models.Snapshot.modified_by_id,
-    )
-    if objects:
-      return columns.filter(
-          tuple_(
-              models.Snapshot.parent_type,
-              models.Snapshot.parent_id,
-              models.Snapshot.child_type,
-              models.Snapshot.child_id
-          ).in_({(parent.type, parent.id, child.type, child.id)
-                 for parent, child in objects}))
-    if ids:
-      return columns.filter(
-          models.Snapshot.id.in_(ids))
-    return set()
-
-
 def create_json_stub(model_, context_id, object_id):
   from ggrc.models import all_models
   return {  # pylint: disable=protected-access
@@ -155,31 +159,82 @@ def create_snapshot_dict(pair, revision_id, user_id, context_id):
   }
 
 
-def create_snapshot_revision_dict(action, event_id, snapshot,
-                                  user_id, context_id):
-  """Create dictionary representation of snapshot revision"""
-  revision_content = snapshot._asdict()
-  metadata = {
-      "display_name": "Snapshot:{} of {}:{} in {}:{}".format(
-          snapshot.id,
-          snapshot.child_type,
-          snapshot.child_id,
-          snapshot.parent_type,
-          snapshot.parent_id
-      ),
-      "modified_by": create_json_stub("Person", context_id, user_id),
-  }
-  revision_content.update(metadata)
+def _json_datetime(column):
+  """Get SQL expression formatting a datetime column the way GrcEncoder does"""
+  return func.IF(
+      func.TIME(column) == "00:00:00",
+      func.DATE_FORMAT(column, "%Y-%m-%d"),
+      func.DATE_FORMAT(column, "%Y-%m-%dT%H:%i:%s"),
+  )
 
-  return {
-      "action": action,
-      "event_id": event_id,
-      "content": revision_content,
-      "modified_by_id": user_id,
-      "resource_id": snapshot[0],
-      "resource_type": "Snapshot",
-      "context_id": context_id
-  }
+
+def snapshot_revision_content(user_id, context_id):
+  """Get SQL expression building revision content of a snapshot row.
+
+  The expression renders the same JSON as serializing the snapshot columns
+  with its display name and modified_by stub, so snapshot revisions can be
+  written with INSERT ... SELECT without reading snapshots back.
+  """
+  snapshot = models.Snapshot.__table__.c
+  modified_by = utils.as_json(create_json_stub("Person", context_id, user_id))
+  return func.CONCAT(
+      '{"id": ', snapshot.id,
+      ', "context_id": ', func.IFNULL(snapshot.context_id, "null"),
+      ', "created_at": "', _json_datetime(snapshot.created_at),
+      '", "updated_at": "', _json_datetime(snapshot.updated_at),
+      '", "parent_type": "', snapshot.parent_type,
+      '", "parent_id": ', snapshot.parent_id,
+      ', "child_type": "', snapshot.child_type,
+      '", "child_id": ', snapshot.child_id,
+      ', "revision_id": ', snapshot.revision_id,
+      ', "modified_by_id": ', func.IFNULL(snapshot.modified_by_id, "null"),
+      ', "display_name": "Snapshot:', snapshot.id,
+      ' of ', snapshot.child_type, ':', snapshot.child_id,
+      ' in ', snapshot.parent_type, ':', snapshot.parent_id,
+      '", "modified_by": ', modified_by, '}',
+  )
+
+
+def get_outdated_snapshots(parent):
+  """Get ids of snapshots of the parent that point to outdated revisions.
+
+  A snapshot is outdated if it does not point to the latest created or
+  modified revision of its child, the same rule is used by snapshot update.
+  All snapshots are compared to the latest revisions with one aggregated
+  query, without loading any revision content.
+
+  Args:
+    parent: Stub of the parent object.
+  Returns:
+    Dict with child types as keys and sorted lists of snapshot ids as values.
+  """
+  with benchmark("snapshotter.helpers.get_outdated_snapshots"):
+    query = db.session.query(
+        models.Snapshot.child_type,
+        models.Snapshot.id,
+    ).join(
+        models.Revision,
+        sa.and_(
+            models.Revision.resource_type == models.Snapshot.child_type,
+            models.Revision.resource_id == models.Snapshot.child_id,
+        )
+    ).filter(
+        models.Snapshot.parent_type == parent.type,
+        models.Snapshot.parent_id == parent.id,
+        models.Revision.action.in_(["created", "modified"]),
+    ).group_by(
+        models.Snapshot.id,
+        models.Snapshot.child_type,
+        models.Snapshot.revision_id,
+    ).having(
+        func.max(models.Revision.id) != models.Snapshot.revision_id,
+    )
+    outdated = collections.defaultdict(list)
+    for child_type, snapshot_id in query:
+      outdated[child_type].append(snapshot_id)
+    for ids in outdated.itervalues():
+      ids.sort()
+    return dict(outdated)
 
 
 def create_dry_run_response(pairs, old_revisions, new_revisions):
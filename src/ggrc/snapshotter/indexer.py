@@ -8,24 +8,28 @@ from collections import defaultdict
 from functools import partial
 import itertools
 
-from sqlalchemy.sql.expression import tuple_
 from sqlalchemy import orm
 
 from ggrc import db
 from ggrc import models
 from ggrc.models import all_models
+from ggrc.models import maintenance
 from ggrc.fulltext.mysql import MysqlRecordProperty as Record
 from ggrc.fulltext import get_indexer
 from ggrc.models.reflection import AttributeInfo
-from ggrc.utils import generate_query_chunks, helpers
+from ggrc.utils import generate_query_chunks, helpers, list_chunks
 
 from ggrc.snapshotter.rules import Types
 from ggrc.snapshotter.datastructures import Pair
+from ggrc.snapshotter.helpers import pairs_filter
 from ggrc.fulltext.attributes import FullTextAttr
 
 
 logger = logging.getLogger(__name__)
 
+SNAPSHOT_WATERMARK = "snapshot"
+REINDEX_CHUNK_SIZE = 1000
+
 
 def _get_class_properties():
   """Get indexable properties for all models
@@ -127,9 +131,15 @@ def get_options():
   return options_dict
 
 
+def get_last_revision_id():
+  """Get id of the latest revision safe for the snapshot watermark."""
+  return maintenance.ReindexWatermark.get_safe_revision_id()
+
+
 @helpers.without_sqlalchemy_cache
 def reindex():
   """Reindex all snapshots."""
+  last_revision_id = get_last_revision_id()
   columns = db.session.query(
       models.Snapshot.parent_type,
       models.Snapshot.parent_id,
@@ -138,18 +148,30 @@ def reindex():
   )
   all_count = columns.count()
   handled = 0
+  cad_dict = _get_custom_attribute_dict()
+  options = get_options()
   for query_chunk in generate_query_chunks(columns):
     handled += query_chunk.count()
     logger.info("Snapshot: %s/%s", handled, all_count)
     pairs = {Pair.from_4tuple(p) for p in query_chunk}
-    reindex_pairs(pairs)
+    reindex_pairs(pairs, cad_dict, options)
     db.session.commit()
 
+  # Snapshots changed during the full reindex will be handled by the next
+  # incremental run.
+  watermark = maintenance.ReindexWatermark.get_or_create(SNAPSHOT_WATERMARK)
+  watermark.revision_id = max(watermark.revision_id, last_revision_id)
+  db.session.plain_commit()
+
 
-def reindex_snapshots(snapshot_ids):
+def reindex_snapshots(snapshot_ids, cad_dict=None, options=None):
   """Reindex selected snapshots"""
   if not snapshot_ids:
     return
+  if cad_dict is None:
+    cad_dict = _get_custom_attribute_dict()
+  if options is None:
+    options = get_options()
   columns = db.session.query(
       models.Snapshot.parent_type,
       models.Snapshot.parent_id,
@@ -158,10 +180,100 @@ def reindex_snapshots(snapshot_ids):
   ).filter(models.Snapshot.id.in_(snapshot_ids))
   for query_chunk in generate_query_chunks(columns):
     pairs = {Pair.from_4tuple(p) for p in query_chunk}
-    reindex_pairs(pairs)
+    reindex_pairs(pairs, cad_dict, options)
     db.session.commit()
 
 
+def _get_chunk_boundary(first_id, last_id):
+  """Get the last revision id of the next chunk of changed snapshots.
+
+  Snapshots are changed by revisions they point to and by their own
+  revisions. Each of both lists is limited to REINDEX_CHUNK_SIZE revisions
+  starting after first_id, so the chunk is never larger than two limits plus
+  snapshots sharing the boundary revision.
+  """
+  snapshot_boundary = db.session.query(
+      models.Snapshot.revision_id,
+  ).filter(
+      models.Snapshot.revision_id > first_id,
+      models.Snapshot.revision_id <= last_id,
+  ).order_by(
+      models.Snapshot.revision_id,
+  ).offset(REINDEX_CHUNK_SIZE - 1).limit(1).scalar()
+  revision_boundary = db.session.query(
+      models.Revision.id,
+  ).filter(
+      models.Revision.resource_type == models.Snapshot.__name__,
+      models.Revision.id > first_id,
+      models.Revision.id <= last_id,
+  ).order_by(
+      models.Revision.id,
+  ).offset(REINDEX_CHUNK_SIZE - 1).limit(1).scalar()
+  return min(snapshot_boundary or last_id, revision_boundary or last_id)
+
+
+def _get_changed_snapshot_ids(first_id, last_id):
+  """Get ids of snapshots changed by revisions in (first_id, last_id]."""
+  snapshot_ids = {id_ for id_, in db.session.query(
+      models.Snapshot.id,
+  ).filter(
+      models.Snapshot.revision_id > first_id,
+      models.Snapshot.revision_id <= last_id,
+  )}
+  snapshot_ids.update(id_ for id_, in db.session.query(
+      models.Revision.resource_id,
+  ).filter(
+      models.Revision.resource_type == models.Snapshot.__name__,
+      models.Revision.id > first_id,
+      models.Revision.id <= last_id,
+  ))
+  return snapshot_ids
+
+
+@helpers.without_sqlalchemy_cache
+def reindex_incremental(task=None):
+  """Reindex snapshots changed since the previous run.
+
+  A snapshot is reindexed if its revision_id or its own revision is newer
+  than the revision stored in the snapshot watermark. Revisions are handled
+  in chunks and the watermark is moved forward after every committed chunk,
+  so a crashed task resumes from the last processed chunk. Custom attribute
+  definitions and options are loaded once and shared by all chunks.
+
+  Returns:
+    dict with progress of the reindex.
+  """
+  watermark = maintenance.ReindexWatermark.get_or_create(SNAPSHOT_WATERMARK)
+  last_revision_id = get_last_revision_id()
+  logger.info("Updating snapshot index for revisions %s - %s",
+              watermark.revision_id, last_revision_id)
+  cad_dict = _get_custom_attribute_dict()
+  options = get_options()
+  handled = 0
+  progress = {
+      "handled_snapshots": handled,
+      "revision_id": watermark.revision_id,
+      "last_revision_id": last_revision_id,
+  }
+  while watermark.revision_id < last_revision_id:
+    boundary = _get_chunk_boundary(watermark.revision_id, last_revision_id)
+    snapshot_ids = _get_changed_snapshot_ids(watermark.revision_id, boundary)
+    for ids_chunk in list_chunks(sorted(snapshot_ids)):
+      reindex_snapshots(ids_chunk, cad_dict, options)
+    handled += len(snapshot_ids)
+    watermark.revision_id = boundary
+    logger.info("Snapshot: %s, revision: %s / %s",
+                handled, boundary, last_revision_id)
+    progress.update({
+        "handled_snapshots": handled,
+        "revision_id": boundary,
+    })
+    if task:
+      task.set_progress(progress)
+    db.session.plain_commit()
+  return progress
+
+
 def delete_records(snapshot_ids):
   """Delete all records for some snapshots.
   Args:
@@ -347,26 +459,24 @@ def get_list_record_value(prop, rec, val):
   return itertools.chain(*results)
 
 
-def reindex_pairs(pairs):
+def reindex_pairs(pairs, cad_dict=None, options=None):
   """Reindex selected snapshots.
 
   Args:
     pairs: A list of parent-child pairs that uniquely represent snapshot
     object whose properties should be reindexed.
+    cad_dict: Custom attribute definitions grouped by model name, they are
+        loaded from the database if not sent.
+    options: Titles of options by ids, they are loaded from the database if
+        not sent.
   """
   if not pairs:
     return
   snapshots = dict()
-  options = get_options()
+  if options is None:
+    options = get_options()
   snapshot_query = models.Snapshot.query.filter(
-      tuple_(
-          models.Snapshot.parent_type,
-          models.Snapshot.parent_id,
-          models.Snapshot.child_type,
-          models.Snapshot.child_id,
-      ).in_(
-          {pair.to_4tuple() for pair in pairs}
-      )
+      pairs_filter(pairs)
   ).options(
       orm.subqueryload("revision").load_only(
           "id",
@@ -383,7 +493,8 @@ def reindex_pairs(pairs):
           "revision_id",
       )
   )
-  cad_dict = _get_custom_attribute_dict()
+  if cad_dict is None:
+    cad_dict = _get_custom_attribute_dict()
   for snapshot in snapshot_query:
     revision = snapshot.revision
     snapshots[snapshot.id] = {
@@ -4,6 +4,7 @@
 """Collection if ggrc specific structures."""
 
 import collections
+import threading
 
 
 class CaseInsensitiveDict(collections.MutableMapping):
@@ -110,3 +111,64 @@ class EmptyList(list):
   def append(self, item):
     """Append new item to list."""
     pass
+
+
+class LRUCache(object):
+  """Thread safe dict-like cache with limited number of entries.
+
+  The least recently used entry is dropped when the cache is full. Numbers of
+  hits and misses are counted to monitor effectiveness of the cache.
+  """
+
+  def __init__(self, max_size):
+    self.max_size = max_size
+    self.hits = 0
+    self.misses = 0
+    self._store = collections.OrderedDict()
+    self._lock = threading.Lock()
+
+  def get(self, key, default=None):
+    """Get value for key and mark it as the most recently used one."""
+    with self._lock:
+      if key not in self._store:
+        self.misses += 1
+        return default
+      self.hits += 1
+      value = self._store.pop(key)
+      self._store[key] = value
+      return value
+
+  def set(self, key, value):
+    """Store value and drop the least recently used entries if needed."""
+    with self._lock:
+      self._store.pop(key, None)
+      self._store[key] = value
+      while len(self._store) > self.max_size:
+        self._store.popitem(last=False)
+
+  def pop(self, key, default=None):
+    """Remove entry for key and return its value."""
+    with self._lock:
+      return self._store.pop(key, default)
+
+  def clear(self):
+    """Remove all entries from the cache."""
+    with self._lock:
+      self._store.clear()
+
+  def stats(self):
+    """Get size of the cache and numbers of hits and misses."""
+    with self._lock:
+      return {
+          "size": len(self._store),
+          "hits": self.hits,
+          "misses": self.misses,
+      }
+
+  def __len__(self):
+    with self._lock:
+      return len(self._store)
+
+  def __contains__(self, key):
+    with self._lock:
+      return key in self._store
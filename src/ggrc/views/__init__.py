@@ -6,6 +6,7 @@ Handle non-RESTful views, e.g. routes which return HTML rather than JSON
 """
 
 import collections
+import datetime
 import json
 import logging
 
@@ -28,6 +29,7 @@ from ggrc.builder.json import publish_representation
 from ggrc.converters import get_importables, get_exportables
 from ggrc.extensions import get_extension_modules
 from ggrc.fulltext import get_indexer, mixin
+from ggrc.fulltext import reindex_queue
 from ggrc.integrations import issues
 from ggrc.integrations import integrations_errors
 from ggrc.login import get_current_user
@@ -35,6 +37,7 @@ from ggrc.login import login_required
 from ggrc.login import admin_required
 from ggrc.models import all_models
 from ggrc.models import background_task
+from ggrc.models import maintenance
 from ggrc.models.background_task import create_task
 from ggrc.models.background_task import make_task_response
 from ggrc.models.background_task import queued_task
@@ -61,6 +64,11 @@ from ggrc.cache.utils import clear_permission_cache
 
 logger = logging.getLogger(__name__)
 REINDEX_CHUNK_SIZE = 100
+REINDEX_REVISIONS_CHUNK_SIZE = 1000
+REINDEX_SHARD_SIZE = 5000
+# Seconds after which a sharded reindex with unfinished shards is failed
+REINDEX_SHARDS_TIMEOUT = 6 * 60 * 60
+FULLTEXT_WATERMARK = "fulltext"
 
 
 # Needs to be secured as we are removing @login_required
@@ -82,30 +90,91 @@ def create_missing_revisions(_):
 
 @app.route("/_background_tasks/reindex_snapshots", methods=["POST"])
 @queued_task
-def reindex_snapshots(_):
+def reindex_snapshots(task):
   """Web hook to update the full text search index."""
   logger.info("Updating index for: %s", "Snapshot")
   with benchmark("Create records for %s" % "Snapshot"):
+    if (getattr(task, "parameters", None) or {}).get("incremental"):
+      return app.make_response((
+          json.dumps(snapshot_indexer.reindex_incremental(task)),
+          200,
+          [("Content-Type", "application/json")],
+      ))
     snapshot_indexer.reindex()
   return app.make_response(("success", 200, [("Content-Type", "text/html")]))
 
 
 @app.route("/_background_tasks/reindex", methods=["POST"])
 @queued_task
-def reindex(_):
+def reindex(task):
   """Web hook to update the full text search index."""
+  parameters = getattr(task, "parameters", None) or {}
+  if parameters.get("sharded"):
+    return do_sharded_reindex(task)
+  if parameters.get("incremental"):
+    # Progress is the result of the task, so finish does not drop it
+    return app.make_response((
+        json.dumps(do_incremental_reindex(task)),
+        200,
+        [("Content-Type", "application/json")],
+    ))
   do_reindex()
   return app.make_response(("success", 200, [("Content-Type", "text/html")]))
 
 
 @app.route("/_background_tasks/full_reindex", methods=["POST"])
 @queued_task
-def full_reindex(_):
+def full_reindex(task):
   """Web hook to update the full text search index for all models."""
+  if (getattr(task, "parameters", None) or {}).get("sharded"):
+    return do_sharded_reindex(task, with_reindex_snapshots=True)
   do_full_reindex()
   return app.make_response(("success", 200, [("Content-Type", "text/html")]))
 
 
+@app.route("/_background_tasks/reindex_shard", methods=["POST"])
+def reindex_shard(*_, **kwargs):
+  """Web hook to update the full text search index for a range of ids.
+
+  The ggrc queue does not retry failed tasks, so a failed shard fails the
+  scheduling task right away.
+  """
+  task_id = utils.get_task_attr("task_id", kwargs)
+  model_name = utils.get_task_attr("model", kwargs)
+  first_id = utils.get_task_attr("first_id", kwargs)
+  with benchmark("Run reindex_shard background task"):
+    try:
+      do_reindex_shard(
+          model_name=model_name,
+          first_id=first_id,
+          last_id=utils.get_task_attr("last_id", kwargs),
+      )
+    except:  # pylint: disable=bare-except
+      logger.exception("Reindex shard %s %s failed", model_name, first_id)
+      db.session.rollback()
+      fail_reindex_shard(task_id, model_name, first_id)
+      # Return 200 so that the task is not retried
+      return app.make_response((
+          "failure", 200, [("Content-Type", "text/html")]))
+    track_reindex_shard(task_id, model_name, first_id)
+    return app.make_response(("success", 200, [("Content-Type", "text/html")]))
+
+
+@app.route("/_background_tasks/check_reindex_shards", methods=["POST"])
+def check_reindex_shards(*_, **kwargs):
+  """Web hook to fail a sharded reindex whose shards did not finish in time."""
+  with benchmark("Run check_reindex_shards background task"):
+    fail_timed_out_reindex(utils.get_task_attr("task_id", kwargs))
+    return app.make_response(("success", 200, [("Content-Type", "text/html")]))
+
+
+@app.route("/_background_tasks/drain_fulltext_queue", methods=["POST"])
+def drain_fulltext_queue(*_, **__):
+  """Web hook to build fulltext records for objects in reindex queue."""
+  reindex_queue.drain()
+  return app.make_response(("success", 200, [("Content-Type", "text/html")]))
+
+
 @app.route("/_background_tasks/compute_attributes", methods=["POST"])
 def compute_attributes(*_, **kwargs):
   """Web hook to update the full text search index."""
@@ -262,15 +331,16 @@ def generate_wf_tasks_notifications(_):
   return app.make_response(("success", 200, [("Content-Type", "text/html")]))
 
 
-@helpers.without_sqlalchemy_cache
-def do_reindex(with_reindex_snapshots=False):
-  """Update the full text search index."""
-
-  indexer = get_indexer()
-  indexed_models = {
+def get_indexed_models():
+  """Get models that should be handled by global reindex."""
+  return {
       m.__name__: m for m in all_models.all_models
       if issubclass(m, mixin.Indexed) and m.REQUIRED_GLOBAL_REINDEX
   }
+
+
+def warmup_indexer_cache(indexer):
+  """Fill indexer cache with data shared by all indexed models."""
   people_query = db.session.query(all_models.Person.id,
                                   all_models.Person.name,
                                   all_models.Person.email)
@@ -279,6 +349,21 @@ def do_reindex(with_reindex_snapshots=False):
       all_models.AccessControlRole.id,
       all_models.AccessControlRole.name,
   ))
+
+
+def get_last_revision_id():
+  """Get id of the latest revision safe for the fulltext watermark."""
+  return maintenance.ReindexWatermark.get_safe_revision_id()
+
+
+@helpers.without_sqlalchemy_cache
+def do_reindex(with_reindex_snapshots=False):
+  """Update the full text search index."""
+
+  indexer = get_indexer()
+  indexed_models = get_indexed_models()
+  last_revision_id = get_last_revision_id()
+  warmup_indexer_cache(indexer)
   for model_name in sorted(indexed_models.keys()):
     logger.info("Updating index for: %s", model_name)
     with benchmark("Create records for %s" % model_name):
@@ -289,7 +374,7 @@ def do_reindex(with_reindex_snapshots=False):
       for ids_chunk in utils.list_chunks(ids, chunk_size=REINDEX_CHUNK_SIZE):
         handled_ids += len(ids_chunk)
         logger.info("%s: %s / %s", model.__name__, handled_ids, ids_count)
-        model.bulk_record_update_for(ids_chunk)
+        model.bulk_record_update_for(ids_chunk, set_based=True)
         db.session.plain_commit()
 
   if with_reindex_snapshots:
@@ -297,9 +382,265 @@ def do_reindex(with_reindex_snapshots=False):
     with benchmark("Create records for %s" % "Snapshot"):
       snapshot_indexer.reindex()
 
+  # Objects changed during the full reindex will be handled by the next
+  # incremental run.
+  move_fulltext_watermark(last_revision_id)
+  db.session.plain_commit()
+
   indexer.invalidate_cache()
 
 
+def _get_changed_objects(revisions_chunk, indexed_models):
+  """Get ids of indexed objects touched by revisions grouped by type."""
+  ids_by_type = collections.defaultdict(set)
+  for row in revisions_chunk:
+    for obj_type, obj_id in ((row.resource_type, row.resource_id),
+                             (row.source_type, row.source_id),
+                             (row.destination_type, row.destination_id)):
+      if obj_type in indexed_models and obj_id:
+        ids_by_type[obj_type].add(obj_id)
+  return ids_by_type
+
+
+@helpers.without_sqlalchemy_cache
+def do_incremental_reindex(task=None):
+  """Update the full text search index for recently changed objects.
+
+  Objects are collected from revisions created after the last processed
+  revision stored in the watermark. Revisions are handled in chunks and the
+  watermark is moved forward after every committed chunk, so a crashed task
+  resumes from the last processed chunk instead of starting over.
+
+  Returns:
+    dict with progress of the reindex.
+  """
+  indexer = get_indexer()
+  indexed_models = get_indexed_models()
+  watermark = maintenance.ReindexWatermark.get_or_create(FULLTEXT_WATERMARK)
+  last_revision_id = get_last_revision_id()
+  revisions_query = db.session.query(
+      Revision.id,
+      Revision.resource_type,
+      Revision.resource_id,
+      Revision.source_type,
+      Revision.source_id,
+      Revision.destination_type,
+      Revision.destination_id,
+  ).filter(
+      Revision.id <= last_revision_id,
+  ).order_by(
+      Revision.id,
+  )
+  revisions_count = revisions_query.filter(
+      Revision.id > watermark.revision_id,
+  ).count()
+  handled_revisions = 0
+  progress = {
+      "handled_revisions": handled_revisions,
+      "revisions_count": revisions_count,
+      "revision_id": watermark.revision_id,
+  }
+  logger.info("Updating index for %s revisions starting from %s",
+              revisions_count, watermark.revision_id)
+  warmup_indexer_cache(indexer)
+  with benchmark("Create records for changed objects"):
+    while True:
+      revisions_chunk = revisions_query.filter(
+          Revision.id > watermark.revision_id,
+      ).limit(REINDEX_REVISIONS_CHUNK_SIZE).all()
+      if not revisions_chunk:
+        break
+      ids_by_type = _get_changed_objects(revisions_chunk, indexed_models)
+      for model_name, ids in ids_by_type.iteritems():
+        model = indexed_models[model_name]
+        for ids_chunk in utils.list_chunks(list(ids),
+                                           chunk_size=REINDEX_CHUNK_SIZE):
+          model.bulk_record_update_for(ids_chunk, set_based=True)
+      handled_revisions += len(revisions_chunk)
+      watermark.revision_id = revisions_chunk[-1].id
+      logger.info("Revisions: %s / %s", handled_revisions, revisions_count)
+      progress.update({
+          "handled_revisions": handled_revisions,
+          "revision_id": watermark.revision_id,
+      })
+      if task:
+        task.set_progress(progress)
+      db.session.plain_commit()
+
+  indexer.invalidate_cache()
+  return progress
+
+
+def get_reindex_shards(with_reindex_snapshots=False):
+  """Split ids of indexed objects into ranges reindexed by separate tasks."""
+  shard_models = get_indexed_models()
+  if with_reindex_snapshots:
+    shard_models[all_models.Snapshot.__name__] = all_models.Snapshot
+  shards = []
+  for model_name in sorted(shard_models.keys()):
+    model = shard_models[model_name]
+    ids = [id_ for id_, in db.session.query(model.id).order_by(model.id)]
+    for ids_chunk in utils.list_chunks(ids, chunk_size=REINDEX_SHARD_SIZE):
+      shards.append({
+          "model": model_name,
+          "first_id": ids_chunk[0],
+          "last_id": ids_chunk[-1],
+      })
+  return shards
+
+
+def do_sharded_reindex(task, with_reindex_snapshots=False):
+  """Split reindex into shards and schedule a background task for each.
+
+  Shards are handled independently by task queue workers, every finished
+  shard is counted in the progress of the scheduling task. The task stays
+  running until the last shard finishes it, a shard fails or the shards do
+  not finish within REINDEX_SHARDS_TIMEOUT.
+  """
+  shards = get_reindex_shards(with_reindex_snapshots)
+  progress = {
+      "shards_count": len(shards),
+      "handled_shards": 0,
+      "handled_keys": [],
+      "revision_id": get_last_revision_id(),
+  }
+  task.set_progress(progress)
+  if not shards:
+    move_fulltext_watermark(progress["revision_id"])
+  else:
+    task.defer_finish()
+  db.session.plain_commit()
+  logger.info("Scheduling %s reindex shards", len(shards))
+  for shard in shards:
+    shard["task_id"] = task.id
+    background_task.create_lightweight_task(
+        name="reindex_shard",
+        url=url_for(reindex_shard.__name__),
+        parameters=shard,
+        method="POST",
+        queued_callback=reindex_shard,
+    )
+  if shards:
+    background_task.create_lightweight_task(
+        name="check_reindex_shards",
+        url=url_for(check_reindex_shards.__name__),
+        parameters={"task_id": task.id},
+        method="POST",
+        queued_callback=check_reindex_shards,
+        countdown=REINDEX_SHARDS_TIMEOUT,
+    )
+  if with_reindex_snapshots:
+    start_compute_attributes(revision_ids="all_latest")
+  return app.make_response((
+      json.dumps(task.get_content()),
+      200,
+      [("Content-Type", "application/json")],
+  ))
+
+
+@helpers.without_sqlalchemy_cache
+def do_reindex_shard(model_name, first_id, last_id):
+  """Update the full text search index for objects in the range of ids."""
+  if model_name == all_models.Snapshot.__name__:
+    model = all_models.Snapshot
+  else:
+    model = get_indexed_models()[model_name]
+  ids = [id_ for id_, in db.session.query(model.id).filter(
+      model.id >= first_id,
+      model.id <= last_id,
+  )]
+  logger.info("Updating index for %s: %s - %s", model_name, first_id, last_id)
+  with benchmark("Create records for %s shard" % model_name):
+    if model is all_models.Snapshot:
+      snapshot_indexer.reindex_snapshots(ids)
+      return
+    indexer = get_indexer()
+    warmup_indexer_cache(indexer)
+    for ids_chunk in utils.list_chunks(ids, chunk_size=REINDEX_CHUNK_SIZE):
+      model.bulk_record_update_for(ids_chunk, set_based=True)
+      db.session.plain_commit()
+    indexer.invalidate_cache()
+
+
+def get_reindex_shard_key(model_name, first_id):
+  """Get key of the shard stored in the progress of the scheduling task."""
+  return "{}:{}".format(model_name, first_id)
+
+
+def _lock_reindex_task(task_id):
+  """Get the scheduling task of sharded reindex with its row locked."""
+  return models.BackgroundTask.query.filter_by(
+      id=task_id,
+  ).with_for_update().first()
+
+
+def track_reindex_shard(task_id, model_name, first_id):
+  """Count handled shard in the progress of the scheduling task.
+
+  The task row is locked while its progress is updated, so concurrently
+  finished shards are counted correctly. The scheduling task does not write
+  its row after the shards are scheduled. Keys of handled shards are stored,
+  so a shard handled again is counted once. When the last shard is handled
+  the fulltext watermark is moved to the revision from the start of reindex
+  and the task is finished.
+  """
+  task = _lock_reindex_task(task_id)
+  if task is None:
+    return
+  progress = task.get_content()
+  handled_keys = set(progress.get("handled_keys", []))
+  handled_keys.add(get_reindex_shard_key(model_name, first_id))
+  progress["handled_keys"] = sorted(handled_keys)
+  progress["handled_shards"] = len(handled_keys)
+  task.set_progress(progress)
+  if (task.status == "Running" and
+          progress["handled_shards"] >= progress.get("shards_count", 0)):
+    move_fulltext_watermark(progress.get("revision_id", 0))
+    task.status = "Success"
+  db.session.plain_commit()
+
+
+def fail_reindex_shard(task_id, model_name, first_id):
+  """Fail the scheduling task of sharded reindex because of a failed shard.
+
+  The fulltext watermark is not moved, so the next incremental reindex
+  handles all revisions since the previous one.
+  """
+  task = _lock_reindex_task(task_id)
+  if task is None:
+    return
+  progress = task.get_content()
+  progress.setdefault("failed_keys", []).append(
+      get_reindex_shard_key(model_name, first_id))
+  task.set_progress(progress)
+  if task.status == "Running":
+    task.status = "Failure"
+  db.session.plain_commit()
+
+
+def fail_timed_out_reindex(task_id):
+  """Fail sharded reindex running longer than REINDEX_SHARDS_TIMEOUT.
+
+  Shards lost by the task queue never finish the scheduling task, so it is
+  failed once the timeout has passed.
+  """
+  task = _lock_reindex_task(task_id)
+  if task is None:
+    return
+  timeout = datetime.timedelta(seconds=REINDEX_SHARDS_TIMEOUT)
+  if (task.status == "Running" and
+          task.created_at <= datetime.datetime.utcnow() - timeout):
+    logger.warning("Sharded reindex task %s timed out", task_id)
+    task.status = "Failure"
+  db.session.plain_commit()
+
+
+def move_fulltext_watermark(revision_id):
+  """Move fulltext watermark forward to the revision id."""
+  watermark = maintenance.ReindexWatermark.get_or_create(FULLTEXT_WATERMARK)
+  watermark.revision_id = max(watermark.revision_id, revision_id)
+
+
 @helpers.without_sqlalchemy_cache
 def do_full_reindex():
   """Update the full text search index for all models."""
@@ -551,16 +892,25 @@ def object_browser():
   )
 
 
+def _get_flag_arg(name):
+  """Check if boolean flag is set in request arguments."""
+  return request.args.get(name, "").lower() in ("1", "true")
+
+
 @app.route("/admin/reindex_snapshots", methods=["POST"])
 @login_required
 @admin_required
 def admin_reindex_snapshots():
   """Calls a webhook that reindexes indexable objects
+
+  If "incremental" request argument is set only snapshots changed since the
+  previous run are reindexed.
   """
   task_queue = create_task(
       name="reindex_snapshots",
       url=url_for(reindex_snapshots.__name__),
       queued_callback=reindex_snapshots,
+      parameters={"incremental": _get_flag_arg("incremental")},
   )
   return task_queue.make_response(
       app.make_response(("scheduled %s" % task_queue.name, 200,
@@ -572,11 +922,19 @@ def admin_reindex_snapshots():
 @admin_required
 def admin_reindex():
   """Calls a webhook that reindexes indexable objects
+
+  If "incremental" request argument is set only objects changed since the
+  previous run are reindexed. If "sharded" argument is set, objects are
+  split into id ranges reindexed by separate background tasks.
   """
   task_queue = create_task(
       name="reindex",
       url=url_for(reindex.__name__),
-      queued_callback=reindex
+      queued_callback=reindex,
+      parameters={
+          "incremental": _get_flag_arg("incremental"),
+          "sharded": _get_flag_arg("sharded"),
+      },
   )
   return task_queue.make_response(
       app.make_response(("scheduled %s" % task_queue.name, 200,
@@ -588,17 +946,33 @@ def admin_reindex():
 @admin_required
 def admin_full_reindex():
   """Calls a webhook that reindexes all indexable objects
+
+  If "sharded" request argument is set, objects are split into id ranges
+  reindexed by separate background tasks.
   """
   task_queue = create_task(
       name="full_reindex",
       url=url_for(full_reindex.__name__),
-      queued_callback=full_reindex
+      queued_callback=full_reindex,
+      parameters={"sharded": _get_flag_arg("sharded")},
   )
   return task_queue.make_response(
       app.make_response(("scheduled %s" % task_queue.name, 200,
                          [('Content-Type', 'text/html')])))
 
 
+@app.route("/admin/fulltext_queue_status", methods=["GET"])
+@login_required
+@admin_required
+def admin_fulltext_queue_status():
+  """Get size of deferred fulltext reindex queue and index lag."""
+  return app.make_response((
+      json.dumps(reindex_queue.get_status()),
+      200,
+      [("Content-Type", "application/json")],
+  ))
+
+
 @app.route("/admin/compute_attributes", methods=["POST"])
 @login_required
 @admin_required
@@ -22,6 +22,7 @@ from flask import request
 from flask import json
 from flask import render_template
 from flask import g
+from flask import stream_with_context
 from werkzeug.exceptions import (
     BadRequest, InternalServerError, Unauthorized, Forbidden, NotFound
 )
@@ -31,7 +32,7 @@ from ggrc.app import app
 from ggrc.converters import get_exportables
 from ggrc.converters.base import ImportConverter, ExportConverter
 from ggrc.converters.import_helper import count_objects, \
-    read_csv_file, get_export_filename, get_object_column_definitions
+    iter_csv_file, get_export_filename, get_object_column_definitions
 from ggrc.gdrive import file_actions as fa
 from ggrc.models import import_export, person
 from ggrc.notifications import job_emails
@@ -81,7 +82,11 @@ def parse_export_request():
 
 
 def export_file(export_to, filename, csv_string=None):
-  """Export file to csv file or gdrive file"""
+  """Export file to csv file or gdrive file
+
+  csv_string can also be an iterator of csv strings. In that case the file is
+  streamed to the client or uploaded to gdrive part by part.
+  """
   if export_to == "gdrive":
     gfile = fa.create_gdrive_file(csv_string, filename)
     headers = [('Content-Type', 'application/json'), ]
@@ -91,10 +96,36 @@ def export_file(export_to, filename, csv_string=None):
         ("Content-Type", "text/csv"),
         ("Content-Disposition", "attachment"),
     ]
+    if not isinstance(csv_string, basestring):
+      return current_app.response_class(
+          stream_with_context(start_csv_stream(csv_string)), 200, headers)
     return current_app.make_response((csv_string, 200, headers))
   raise BadRequest(app_errors.BAD_PARAMS)
 
 
+def start_csv_stream(csv_chunks):
+  """Generate the first chunk of csv data before the response is started.
+
+  Errors raised while the export data is queried are raised here and reported
+  with an error status. Errors raised after the response has been started
+  can't change its status, so they are logged and the stream is aborted
+  instead of being finished as a complete file.
+  """
+  csv_chunks = iter(csv_chunks)
+  first_chunk = next(csv_chunks, "")
+
+  def stream():
+    """Yield generated first chunk and the rest of csv data."""
+    yield first_chunk
+    try:
+      for chunk in csv_chunks:
+        yield chunk
+    except Exception:
+      logger.exception("CSV export failed after the response was started.")
+      raise
+  return stream()
+
+
 def handle_export_request_error(handle_function):
   """Decorator for handle exceptions during exporting"""
   @wraps(handle_function)
@@ -130,11 +161,11 @@ def handle_export_request():
     exportable_objects = data.get("exportable_objects", [])
     export_to = data.get("export_to")
     current_time = data.get("current_time")
-  with benchmark("Generate CSV string"):
-    csv_string, object_names = make_export(objects, exportable_objects)
+  with benchmark("Initialize CSV stream"):
+    csv_chunks, object_names = make_export_stream(objects, exportable_objects)
   with benchmark("Make response."):
     filename = "{}_{}.csv".format(object_names, current_time)
-    return export_file(export_to, filename, csv_string)
+    return export_file(export_to, filename, csv_chunks)
 
 
 def get_csv_template(objects):
@@ -163,15 +194,21 @@ def handle_export_csv_template_request():
 
 def make_export(objects, exportable_objects=None):
   """Make export"""
+  csv_chunks, object_names = make_export_stream(objects, exportable_objects)
+  return "".join(csv_chunks), object_names
+
+
+def make_export_stream(objects, exportable_objects=None):
+  """Make export that yields csv data chunk by chunk"""
   query_helper = QueryHelper(objects)
   ids_by_type = query_helper.get_ids()
   converter = ExportConverter(
       ids_by_type=ids_by_type,
       exportable_queries=exportable_objects
   )
-  csv_data = converter.export_csv_data()
+  csv_chunks = converter.export_csv_stream()
   object_names = "_".join(converter.get_object_names())
-  return csv_data, object_names
+  return csv_chunks, object_names
 
 
 def check_import_file():
@@ -214,10 +251,11 @@ def make_response(data):
   return current_app.make_response((response_json, 200, headers))
 
 
-def make_import(csv_data, dry_run):
+def make_import(csv_data, dry_run, ie_job=None):
   """Make import"""
   try:
-    converter = ImportConverter(dry_run=dry_run, csv_data=csv_data)
+    converter = ImportConverter(dry_run=dry_run, csv_data=csv_data,
+                                ie_job=ie_job)
     converter.import_csv_data()
     return converter.get_info()
   except Exception as e:  # pylint: disable=broad-except
@@ -273,12 +311,14 @@ def run_import_phases(ie_id, user_id, url_root):  # noqa: ignore=C901
       user = person.Person.query.get(user_id)
       setattr(g, '_current_user', user)
       ie_job = import_export.get(ie_id)
-      check_for_previous_run()
+      if ie_job.status != ie_job.IN_PROGRESS_STATUS:
+        # Import continues from the checkpoint of the previous run
+        check_for_previous_run()
 
-      csv_data = read_csv_file(StringIO(ie_job.content.encode("utf-8")))
+      content = ie_job.content.encode("utf-8")
 
       if ie_job.status == "Analysis":
-        info = make_import(csv_data, True)
+        info = make_import(iter_csv_file(StringIO(content)), True)
         db.session.rollback()
         db.session.refresh(ie_job)
         if ie_job.status == "Stopped":
@@ -303,8 +343,20 @@ def run_import_phases(ie_id, user_id, url_root):  # noqa: ignore=C901
         db.session.commit()
 
       if ie_job.status == "In Progress":
-        info = make_import(csv_data, False)
+        attempts = import_export.start_import_attempt(ie_job)
+        if attempts > import_export.MAX_IMPORT_ATTEMPTS:
+          logger.error("Import job %s was not finished in %s attempts.",
+                       ie_id, attempts - 1)
+          ie_job.status = "Failed"
+          ie_job.end_at = datetime.utcnow()
+          import_export.clear_checkpoint(ie_job)
+          db.session.commit()
+          job_emails.send_email(job_emails.IMPORT_FAILED, user.email,
+                                url_root, ie_job.title)
+          return
+        info = make_import(iter_csv_file(StringIO(content)), False, ie_job)
         ie_job.results = json.dumps(info)
+        import_export.clear_checkpoint(ie_job)
         for block_info in info:
           if block_info["block_errors"] or block_info["row_errors"]:
             ie_job.status = "Analysis Failed"
@@ -3,9 +3,12 @@
 
 """RBAC module"""
 
+import collections
 import cPickle
 import datetime
 import itertools
+import logging
+import threading
 import zlib
 
 import flask
@@ -24,10 +27,12 @@ from ggrc.models.audit import Audit
 from ggrc.models.program import Program
 from ggrc.rbac import permissions as rbac_permissions
 from ggrc.rbac.permissions_provider import DefaultUserPermissions
+from ggrc.rbac.permissions_provider import get_contributing_resource_types
 from ggrc.cache import utils as cache_utils
 from ggrc.services import signals
 from ggrc.services.registry import service
 from ggrc.utils import benchmark
+from ggrc.utils import structures
 from ggrc_basic_permissions.contributed_roles import BasicRoleDeclarations
 from ggrc_basic_permissions.converters.handlers import COLUMN_HANDLERS
 from ggrc_basic_permissions.models import Role
@@ -42,8 +47,26 @@ blueprint = flask.Blueprint(
     static_url_path='/static/ggrc_basic_permissions',
 )
 
+logger = logging.getLogger(__name__)
+
 PERMISSION_CACHE_TIMEOUT = 3600  # 60 minutes
 
+# In-process cache of permissions in front of memcache. Entries are stored
+# with the permissions generation they were loaded in and are valid only while
+# the generation in memcache is unchanged.
+LOCAL_PERMISSIONS_CACHE = structures.LRUCache(
+    getattr(settings, "PERMISSION_LOCAL_CACHE_SIZE", 1000)
+)
+
+# Numbers of memcache hits and misses for permissions missing in local cache.
+# The counter is shared by all request threads of the instance and must be
+# accessed only under MEMCACHE_PERMISSIONS_STATS_LOCK.
+MEMCACHE_PERMISSIONS_STATS = collections.Counter()
+MEMCACHE_PERMISSIONS_STATS_LOCK = threading.Lock()
+
+# Actions that can be granted to a person by access control roles
+ACL_ACTIONS = ("read", "update", "delete")
+
 
 def get_public_config(_):
   """Expose additional permissions-dependent config to client.
@@ -97,6 +120,22 @@ class UserPermissions(DefaultUserPermissions):
   def get_email_for(self, user):
     return user.email if hasattr(user, 'email') else 'ANONYMOUS'
 
+  def resources_filter_for(self, action, resource_type, id_column):
+    """Get filter for resources available through access control list.
+
+    Access control list stores an entry for every object available to the
+    user, including entries propagated from parent objects, so allowed ids
+    are selected by the database instead of being expanded into a list.
+    """
+    user = get_current_user(use_external_user=False)
+    if action not in ACL_ACTIONS or user is None or user.is_anonymous():
+      return super(UserPermissions, self).resources_filter_for(
+          action, resource_type, id_column)
+    resource_types = get_contributing_resource_types(resource_type)
+    return id_column.in_(
+        get_acl_resources_query(user.id, action, resource_types).subquery()
+    )
+
   def load_permissions(self):
     """Load permissions for the currently logged in user"""
     user = get_current_user(use_external_user=False)
@@ -173,6 +212,48 @@ def query_memcache(key):
   return cache, None
 
 
+def query_local_cache(user_id):
+  """Check if permissions are available in local cache of the process
+
+  Args:
+      user_id (int): id of the user whose permissions are requested
+  Returns:
+      generation (int): current permissions generation or None if caching
+                        is not available
+      permissions_cache (dict): dict with all permissions or None if there
+                                was a cache miss
+  """
+  if not getattr(settings, 'MEMCACHE_MECHANISM', False):
+    return None, None
+
+  cache = cache_utils.get_cache_manager().cache_object.memcache_client
+  generation = cache_utils.get_permissions_generation(cache)
+  cached = LOCAL_PERMISSIONS_CACHE.get(user_id)
+  if cached is None:
+    return generation, None
+  cached_generation, permissions_cache = cached
+  if cached_generation != generation:
+    LOCAL_PERMISSIONS_CACHE.pop(user_id)
+    return generation, None
+  return generation, permissions_cache
+
+
+def get_permissions_cache_stats():
+  """Get hits and misses of local and memcache permissions caches."""
+  with MEMCACHE_PERMISSIONS_STATS_LOCK:
+    memcache_stats = dict(MEMCACHE_PERMISSIONS_STATS)
+  return {
+      "local": LOCAL_PERMISSIONS_CACHE.stats(),
+      "memcache": memcache_stats,
+  }
+
+
+def count_memcache_permissions_query(hit):
+  """Count hit or miss of permissions in memcache."""
+  with MEMCACHE_PERMISSIONS_STATS_LOCK:
+    MEMCACHE_PERMISSIONS_STATS["hits" if hit else "misses"] += 1
+
+
 def load_default_permissions(permissions):
   """Load default permissions for all users
 
@@ -347,6 +428,27 @@ def _get_acl_filter():
   ]
 
 
+def get_acl_resources_query(user_id, action, resource_types):
+  """Get query for ids of objects available for action through ACL.
+
+  The query selects the same objects as load_access_control_list stores in
+  resources of permissions dict.
+  """
+  acl = all_models.AccessControlList
+  acr = all_models.AccessControlRole
+  return db.session.query(
+      acl.object_id,
+  ).join(
+      acr,
+      acl.ac_role_id == acr.id,
+  ).filter(
+      acl.person_id == user_id,
+      acl.object_type.in_(resource_types),
+      acl.object_type != all_models.Relationship.__name__,
+      getattr(acr, action) == sa.true(),
+  )
+
+
 def load_access_control_list(user, permissions):
   """Load permissions from access_control_list"""
   acl = all_models.AccessControlList
@@ -409,6 +511,21 @@ def store_results_into_memcache(permissions, cache, key):
     cache.set(key, compressed_permissions, PERMISSION_CACHE_TIMEOUT)
 
 
+def store_results_into_local_cache(permissions, generation, user_id):
+  """Store permissions into local cache of the process
+
+  Args:
+      permissions (dict): dict with all permissions of the user
+      generation (int): permissions generation the permissions were loaded in
+      user_id (int): id of the user whose permissions are stored
+  Returns:
+      None
+  """
+  if generation is None:
+    return
+  LOCAL_PERMISSIONS_CACHE.set(user_id, (generation, permissions))
+
+
 def load_permissions_for(user):
   """Permissions is dictionary that can be exported to json to share with
   clients. Structure is:
@@ -430,9 +547,19 @@ def load_permissions_for(user):
   permissions = {}
   key = 'permissions:{}'.format(user.id)
 
+  with benchmark("load_permissions > query local cache"):
+    generation, result = query_local_cache(user.id)
+    if result:
+      return result
+
   with benchmark("load_permissions > query memcache"):
     cache, result = query_memcache(key)
+    if cache is not None:
+      count_memcache_permissions_query(bool(result))
+      logger.debug("Permissions cache stats: %s",
+                   get_permissions_cache_stats())
     if result:
+      store_results_into_local_cache(result, generation, user.id)
       return result
 
   with benchmark("load_permissions > load default permissions"):
@@ -459,6 +586,7 @@ def load_permissions_for(user):
     # the permissions information for any subsequent request.
     with benchmark("load_permissions > store results into memcache"):
       store_results_into_memcache(permissions, cache, key)
+    store_results_into_local_cache(permissions, generation, user.id)
 
   return permissions
 
@@ -4,9 +4,11 @@ from os.path import abspath, dirname, join
 
 import collections
 import ddt
+import mock
 from flask.json import dumps
 
 from ggrc.converters import get_importables
+from ggrc.converters.base import ExportConverter
 from ggrc.models import inflector, all_models
 from ggrc.models.mixins import ScopeObject
 from ggrc.models.reflection import AttributeInfo
@@ -406,6 +408,98 @@ class TestExportMultipleObjects(TestCase):
         self.assertNotIn(programs[i], response.data)
         self.assertNotIn(regulations[i], response.data)
 
+  @mock.patch("ggrc.converters.base_block.ExportBlockConverter."
+              "ROW_CHUNK_SIZE", 2)
+  def test_export_csv_stream(self):
+    """Test that csv data is streamed in chunks of rows."""
+    with factories.single_commit():
+      programs = [factories.ProgramFactory() for _ in range(5)]
+    ids_by_type = [{
+        "object_name": "Program",
+        "ids": [program.id for program in programs],
+        "fields": ["slug", "title"],
+    }]
+
+    chunks = list(ExportConverter(ids_by_type).export_csv_stream())
+
+    self.assertEqual(len(chunks), 3)
+    self.assertEqual("".join(chunks),
+                     ExportConverter(ids_by_type).export_csv_data())
+    response = self.export_csv([{
+        "object_name": "Program",
+        "filters": {"expression": {}},
+        "fields": ["slug", "title"],
+    }])
+    self.assert200(response)
+    for program in programs:
+      self.assertIn(program.title, response.data)
+
+  def test_shared_identifiers(self):
+    """Test that identifiers of mapped objects are shared by blocks."""
+    with factories.single_commit():
+      program = factories.ProgramFactory()
+      regulation = factories.RegulationFactory()
+      control = factories.ControlFactory()
+      factories.RelationshipFactory(source=program, destination=control)
+      factories.RelationshipFactory(source=control, destination=regulation)
+    control_slug = control.slug
+    converter = ExportConverter([{
+        "object_name": "Program",
+        "ids": [program.id],
+        "fields": ["slug", "map:control"],
+    }, {
+        "object_name": "Regulation",
+        "ids": [regulation.id],
+        "fields": ["slug", "map:control"],
+    }])
+
+    csv_data = converter.export_csv_data()
+
+    self.assertEqual(csv_data.count(control_slug), 2)
+    self.assertEqual(
+        converter.shared_state["identifiers"]["Control"],
+        {control.id: control_slug},
+    )
+
+  def test_export_csv_stream_error(self):
+    """Test that errors of first csv chunk are raised before response."""
+    with factories.single_commit():
+      factories.ProgramFactory()
+
+    def build_csv(_):
+      raise ValueError("export failed")
+      yield ""  # pylint: disable=unreachable
+
+    with mock.patch("ggrc.converters.base.ExportConverter."
+                    "build_csv_from_row_data", build_csv):
+      with self.assertRaises(ValueError):
+        self.export_csv([{
+            "object_name": "Program",
+            "filters": {"expression": {}},
+            "fields": ["slug", "title"],
+        }])
+
+  def test_export_csv_stream_late_error(self):
+    """Test that errors after the first csv chunk abort the stream."""
+    with factories.single_commit():
+      factories.ProgramFactory()
+
+    def build_csv(_):
+      yield "first chunk"
+      raise ValueError("export failed")
+
+    with mock.patch("ggrc.converters.base.ExportConverter."
+                    "build_csv_from_row_data", build_csv):
+      with mock.patch("ggrc.views.converters.logger") as logger:
+        response = self.export_csv([{
+            "object_name": "Program",
+            "filters": {"expression": {}},
+            "fields": ["slug", "title"],
+        }])
+        with self.assertRaises(ValueError):
+          response.get_data()
+    logger.exception.assert_called_once()
+
   def test_exportable_items(self):
     """Test multi export with exportable items."""
     with factories.single_commit():
@@ -6,9 +6,14 @@
 """Test request import and updates."""
 
 import collections
+
+import mock
+from sqlalchemy import exc
+
 from ggrc import db
 from ggrc.models import all_models
 from ggrc.converters import errors
+from ggrc.utils import log_event
 
 from integration.ggrc import TestCase
 from integration.ggrc.models import factories
@@ -38,6 +43,84 @@ class TestControlsImport(TestCase):
     self.assertEqual(control.documents_reference_url[0].link,
                      "https://img_123.jpg")
 
+  @mock.patch("ggrc.settings.IMPORT_COMMIT_BATCH_SIZE", 2, create=True)
+  def test_batched_import(self):
+    """Controls are committed in batches with one event per batch."""
+    events_count = all_models.Event.query.count()
+    import_data = [
+        collections.OrderedDict([
+            ("object_type", "Control"),
+            ("Code*", "control-{}".format(index)),
+            ("Title", "Control {}".format(index)),
+            ("Admin", "user@example.com"),
+            ("Assertions*", "Privacy"),
+        ])
+        for index in range(5)
+    ]
+    response = self.import_data(*import_data)
+
+    self._check_csv_response(response, {})
+    self.assertEqual(response[0]["created"], 5)
+    self.assertEqual(all_models.Control.query.count(), 5)
+    self.assertEqual(all_models.Event.query.count() - events_count, 3)
+
+  def test_prefetched_lookups(self):
+    """Mapped objects and categories are resolved for all rows."""
+    market = factories.MarketFactory()
+    market_id = market.id
+    import_data = [
+        collections.OrderedDict([
+            ("object_type", "Control"),
+            ("Code*", "control-{}".format(index)),
+            ("Title", "Control {}".format(index)),
+            ("Admin", "user@example.com"),
+            ("Assertions*", "Privacy"),
+            ("map:market", market.slug.lower()),
+        ])
+        for index in range(3)
+    ]
+    response = self.import_data(*import_data)
+
+    self._check_csv_response(response, {})
+    for control in all_models.Control.query:
+      self.assertEqual([assertion.name for assertion in control.assertions],
+                       ["Privacy"])
+      related = all_models.Relationship.find_related(
+          control, all_models.Market.query.get(market_id))
+      self.assertIsNotNone(related)
+
+  @mock.patch("ggrc.settings.IMPORT_COMMIT_BATCH_SIZE", 2, create=True)
+  def test_failed_batch_import(self):
+    """Rows of a failed batch are committed one by one."""
+    events_count = all_models.Event.query.count()
+    import_data = [
+        collections.OrderedDict([
+            ("object_type", "Control"),
+            ("Code*", "control-{}".format(index)),
+            ("Title", "Control {}".format(index)),
+            ("Admin", "user@example.com"),
+            ("Assertions*", "Privacy"),
+        ])
+        for index in range(5)
+    ]
+    failed_batches = []
+
+    def log_batch_event(session, obj):
+      """Fail the first batch before it is committed."""
+      if not failed_batches:
+        failed_batches.append(obj)
+        raise exc.SQLAlchemyError("Batch commit failed")
+      return log_event.log_event(session, obj)
+
+    with mock.patch("ggrc.converters.base_block.log_event",
+                    side_effect=log_batch_event):
+      response = self.import_data(*import_data)
+
+    self._check_csv_response(response, {})
+    self.assertEqual(response[0]["created"], 5)
+    self.assertEqual(all_models.Control.query.count(), 5)
+    self.assertEqual(all_models.Event.query.count() - events_count, 4)
+
   def test_add_admin_to_document(self):
     """Test evidence should have current user as admin"""
     control = factories.ControlFactory()
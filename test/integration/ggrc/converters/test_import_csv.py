@@ -32,6 +32,61 @@ class TestBasicCsvImport(TestCase):
           "email": "{}@reciprocitylabs.com".format(person),
       }, "Administrator")
 
+  def test_shared_unique_title(self):
+    """Test title uniqueness check across directive types."""
+    policy = factories.PolicyFactory(title="Shared title")
+    regulation_slug = "regulation-1"
+    response = self.import_data(OrderedDict([
+        ("object_type", "Regulation"),
+        ("Code*", regulation_slug),
+        ("Title", policy.title),
+        ("Admin", "user@example.com"),
+    ]), OrderedDict([
+        ("object_type", "Regulation"),
+        ("Code*", "regulation-2"),
+        ("Title", "Unique title"),
+        ("Admin", "user@example.com"),
+    ]))
+
+    self._check_csv_response(response, {
+        "Regulation": {
+            "row_errors": {
+                errors.DUPLICATE_VALUE.format(
+                    line=3, column_name="title", value="Shared title"),
+            },
+        },
+    })
+    self.assertEqual(response[0]["created"], 1)
+    self.assertIsNone(
+        models.Regulation.query.filter_by(slug=regulation_slug).first())
+
+  def test_swap_unique_title(self):
+    """Test that a title released by a previous row can be imported."""
+    with factories.single_commit():
+      first = factories.PolicyFactory(title="First title")
+      second = factories.PolicyFactory(title="Second title")
+    first_slug, second_slug = first.slug, second.slug
+    response = self.import_data(OrderedDict([
+        ("object_type", "Policy"),
+        ("Code*", first_slug),
+        ("Title", "Third title"),
+    ]), OrderedDict([
+        ("object_type", "Policy"),
+        ("Code*", second_slug),
+        ("Title", "First title"),
+    ]))
+
+    self._check_csv_response(response, {})
+    self.assertEqual(response[0]["updated"], 2)
+    self.assertEqual(
+        models.Policy.query.filter_by(slug=first_slug).one().title,
+        "Third title",
+    )
+    self.assertEqual(
+        models.Policy.query.filter_by(slug=second_slug).one().title,
+        "First title",
+    )
+
   def test_policy_basic_import(self):
     """Test basic policy import."""
     filename = "policy_basic_import.csv"
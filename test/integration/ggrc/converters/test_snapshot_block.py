@@ -18,14 +18,8 @@ class TestSnapshotBlockConverter(TestCase):
   # protected functions.
   # pylint: disable=protected-access
 
-  def test_empty_snapshots(self):
-    """Test snapshots property for empty ids list."""
-    converter = mock.MagicMock()
-    block = SnapshotBlockConverter(converter, [])
-    self.assertEqual(block.snapshots, [])
-
-  def test_snapshots_property(self):
-    """Test snapshots property and snapshot content."""
+  def test_load_snapshots(self):
+    """Test loading of snapshots and snapshot content."""
     with factories.single_commit():
       snapshots = self._create_snapshots(
           factories.AuditFactory(),
@@ -35,10 +29,27 @@ class TestSnapshotBlockConverter(TestCase):
     converter = mock.MagicMock()
     ids = [s.id for s in snapshots]
     block = SnapshotBlockConverter(converter, ids)
-    self.assertEqual(block.snapshots, snapshots)
-    for snapshot in snapshots:
+    loaded = block._load_snapshots(ids)
+    self.assertEqual(loaded, snapshots)
+    for snapshot in loaded:
       self.assertIn("audit", snapshot.content)
 
+  def test_current_cads(self):
+    """Test header uses current custom attribute definitions."""
+    with factories.single_commit():
+      cad = factories.CustomAttributeDefinitionFactory(
+          definition_type="control",
+          title="Old title",
+      )
+      control = factories.ControlFactory()
+      snapshots = self._create_snapshots(factories.AuditFactory(), [control])
+    cad.title = "New title"
+    db.session.commit()
+
+    block = SnapshotBlockConverter(mock.MagicMock(),
+                                   [s.id for s in snapshots])
+    self.assertEqual(block._cad_name_map.values(), ["New title"])
+
   def test_valid_child_types(self):
     """Test child_type property with valid snapshots list."""
     with factories.single_commit():
@@ -120,3 +131,18 @@ class TestSnapshotBlockConverter(TestCase):
         block._attribute_name_map.items(),
         expected_attrs
     )
+
+  @mock.patch.object(SnapshotBlockConverter, "CHUNK_SIZE", 2)
+  def test_chunked_row_data(self):
+    """Test rows of all snapshot chunks are generated in id order."""
+    with factories.single_commit():
+      controls = [factories.ControlFactory() for _ in range(3)]
+      snapshots = self._create_snapshots(factories.AuditFactory(), controls)
+    slugs = [u"*{}".format(control.slug) for control in controls]
+    ids = [snapshot.id for snapshot in snapshots]
+
+    block = SnapshotBlockConverter(mock.MagicMock(), ids[::-1])
+    slug_index = block._attribute_name_map.keys().index("slug")
+    rows = list(block.generate_row_data())
+    self.assertEqual([row[slug_index] for row in rows], slugs)
+    self.assertEqual(len(rows[0]), block.block_width)
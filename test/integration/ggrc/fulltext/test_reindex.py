@@ -3,11 +3,17 @@
 
 """Test for reindex procedure."""
 
+import datetime
+
 import ddt
+import mock
 
+from ggrc import db
 from ggrc import fulltext
 from ggrc.fulltext import mysql
 from ggrc.fulltext import listeners
+from ggrc.fulltext import reindex_queue
+from ggrc.models import all_models
 from integration.ggrc import TestCase, Api
 from integration.ggrc.models import factories
 
@@ -41,3 +47,125 @@ class TestReindex(TestCase):
 
     # Check that all Assessment.archived were properly reindexed
     self.assertEqual(archived_index.count(), obj_count)
+
+  def test_diff_reindex(self):
+    """Test diff reindex writes only changed records."""
+    with factories.single_commit():
+      control = factories.ControlFactory(title="old title")
+    control_id = control.id
+    records = mysql.MysqlRecordProperty.query.filter(
+        mysql.MysqlRecordProperty.type == "Control",
+        mysql.MysqlRecordProperty.key == control_id,
+    )
+    expected = {(r.property, r.subproperty): r.content for r in records}
+    expected[("title", "")] = "new title"
+    db.session.execute(
+        mysql.MysqlRecordProperty.__table__.insert().values(
+            key=control_id,
+            type="Control",
+            tags="",
+            property="obsolete",
+            subproperty="",
+            content="obsolete value",
+        )
+    )
+    control = all_models.Control.query.get(control_id)
+    control.title = "new title"
+    db.session.flush()
+
+    to_insert, to_update, to_delete = all_models.Control.diff_records(
+        [control_id]
+    )
+    self.assertEqual(to_insert, [])
+    self.assertEqual([v["property"] for v in to_update], ["title"])
+    self.assertEqual(to_delete, [(control_id, "obsolete", "")])
+
+    all_models.Control.bulk_record_update_for([control_id], use_diff=True)
+    self.assertEqual(
+        {(r.property, r.subproperty): r.content for r in records},
+        expected,
+    )
+
+  @mock.patch("ggrc.settings.FULLTEXT_DEFERRED_INDEXING", True)
+  def test_deferred_reindex(self):
+    """Test deferred reindex stores objects in queue until it is drained."""
+    with mock.patch("ggrc.fulltext.reindex_queue.schedule_drain"):
+      response = self.api.post(all_models.OrgGroup, {
+          "org_group": {"title": "org_group title", "context": None},
+      })
+    self.assertEqual(response.status_code, 201)
+    records = mysql.MysqlRecordProperty.query.filter(
+        mysql.MysqlRecordProperty.type == "OrgGroup",
+        mysql.MysqlRecordProperty.key == response.json["org_group"]["id"],
+    )
+    self.assertEqual(records.count(), 0)
+    self.assertNotEqual(reindex_queue.get_status()["size"], 0)
+
+    reindex_queue.drain()
+    self.assertNotEqual(records.count(), 0)
+    self.assertEqual(reindex_queue.get_status()["size"], 0)
+
+  def test_drain_claimed_items(self):
+    """Test drain skips items claimed by another drain until lease expires."""
+    with factories.single_commit():
+      claimed_id, free_id = [factories.ControlFactory().id for _ in range(2)]
+    queue_item = reindex_queue.ReindexQueueItem
+    reindex_queue.push({"Control": {claimed_id, free_id}})
+    db.session.execute(queue_item.__table__.update().where(
+        queue_item.object_id == claimed_id,
+    ).values(
+        claimed_by="other drain",
+        claimed_at=datetime.datetime.utcnow(),
+    ))
+    db.session.plain_commit()
+
+    reindex_queue.drain()
+    self.assertEqual(
+        [object_id for object_id, in db.session.query(queue_item.object_id)],
+        [claimed_id],
+    )
+
+    db.session.execute(queue_item.__table__.update().values(
+        claimed_at=datetime.datetime.utcnow() - datetime.timedelta(
+            seconds=reindex_queue.DRAIN_LEASE + 1),
+    ))
+    db.session.plain_commit()
+    reindex_queue.drain()
+    self.assertEqual(reindex_queue.get_status()["size"], 0)
+
+  @mock.patch("ggrc.settings.FULLTEXT_DEFERRED_INDEXING", True)
+  def test_drain_once_per_request(self):
+    """Test deferred reindex drains the queue once after the request."""
+    with mock.patch("ggrc.fulltext.reindex_queue.drain") as drain:
+      response = self.api.post(all_models.OrgGroup, {
+          "org_group": {"title": "org_group title", "context": None},
+      })
+    self.assertEqual(response.status_code, 201)
+    drain.assert_called_once_with()
+
+  @ddt.data(
+      factories.ControlFactory,
+      factories.MarketFactory,
+      factories.ProgramFactory,
+      factories.IssueFactory,
+  )
+  def test_set_based_reindex(self, factory):
+    """Test set based reindex creates the same records for {0}."""
+    with factories.single_commit():
+      obj_ids = [factory(description="").id for _ in range(3)]
+    model = factory._meta.model  # pylint: disable=protected-access
+    self.assertTrue(model.get_plain_column_attrs())
+    records = db.session.query(
+        mysql.MysqlRecordProperty.key,
+        mysql.MysqlRecordProperty.property,
+        mysql.MysqlRecordProperty.subproperty,
+        mysql.MysqlRecordProperty.content,
+    ).filter(
+        mysql.MysqlRecordProperty.type == model.__name__,
+        mysql.MysqlRecordProperty.key.in_(obj_ids),
+    )
+    model.bulk_record_update_for(obj_ids)
+    expected = set(records)
+
+    model.bulk_record_update_for(obj_ids, set_based=True)
+    self.assertEqual(set(records), expected)
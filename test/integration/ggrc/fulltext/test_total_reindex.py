@@ -4,13 +4,17 @@
 """Test for total reindex procedure"""
 
 import ddt
+import mock
 from sqlalchemy import orm
 
 from ggrc import db
 from ggrc import fulltext
+from ggrc import models
+from ggrc import views
 from ggrc.fulltext.mysql import MysqlRecordProperty
 from ggrc.utils import QueryCounter
 from ggrc.fulltext import mysql
+from ggrc.models import maintenance
 
 from integration.ggrc import TestCase
 from integration.ggrc.models import factories as ggrc_factories
@@ -114,6 +118,127 @@ class TestTotalReindex(TestCase):
     ).count()
     self.assertEqual(count, reindexed_count)
 
+  @mock.patch("ggrc.views.REINDEX_SHARD_SIZE", 2)
+  def test_sharded_reindex(self):
+    """Test sharded reindex creates the same records as regular one."""
+    with ggrc_factories.single_commit():
+      for factory in self.INDEXED_MODEL_FACTORIES:
+        for _ in range(5):
+          factory()
+    indexer = fulltext.get_indexer()
+    count = indexer.record_type.query.count()
+    indexer.record_type.query.delete()
+    db.session.commit()
+    self.client.get("/login")
+    response = self.client.post("/admin/reindex?sharded=true")
+
+    self.assert200(response)
+    self.assertEqual(response.json["handled_shards"],
+                     response.json["shards_count"])
+    reindexed_count = indexer.record_type.query.filter(
+        MysqlRecordProperty.type != "AccessControlRole"
+    ).count()
+    self.assertEqual(count, reindexed_count)
+
+  def _schedule_shards(self):
+    """Schedule sharded reindex of 5 controls without running its shards."""
+    with ggrc_factories.single_commit():
+      for _ in range(5):
+        ggrc_factories.ControlFactory()
+    self.client.get("/login")
+    with mock.patch.object(views.background_task,
+                           "create_lightweight_task") as create_task:
+      self.client.post("/admin/reindex?sharded=true")
+    shards = [call[1]["parameters"] for call in create_task.call_args_list
+              if call[1]["name"] == "reindex_shard"]
+    self.assertTrue(shards)
+    return shards[0]["task_id"], shards
+
+  @staticmethod
+  def _run_shard(shard):
+    """Run reindex of the shard and count it in the scheduling task."""
+    views.do_reindex_shard(shard["model"], shard["first_id"],
+                           shard["last_id"])
+    views.track_reindex_shard(shard["task_id"], shard["model"],
+                              shard["first_id"])
+
+  @mock.patch("ggrc.views.REINDEX_SHARD_SIZE", 2)
+  def test_shards_after_task(self):
+    """Test sharded reindex task is finished by its last shard."""
+    task_id, shards = self._schedule_shards()
+    task = models.BackgroundTask.query.get(task_id)
+    self.assertEqual(task.status, "Running")
+    self.assertEqual(task.get_content()["handled_shards"], 0)
+    watermark = maintenance.ReindexWatermark.get_or_create(
+        views.FULLTEXT_WATERMARK)
+    watermark.revision_id = 0
+    db.session.commit()
+
+    for shard in shards:
+      self._run_shard(shard)
+
+    task = models.BackgroundTask.query.get(task_id)
+    self.assertEqual(task.status, "Success")
+    self.assertEqual(task.get_content()["handled_shards"], len(shards))
+    watermark = maintenance.ReindexWatermark.get_or_create(
+        views.FULLTEXT_WATERMARK)
+    self.assertEqual(watermark.revision_id,
+                     task.get_content()["revision_id"])
+
+  @mock.patch("ggrc.views.REINDEX_SHARD_SIZE", 2)
+  def test_repeated_shard(self):
+    """Test shard handled twice is counted once."""
+    task_id, shards = self._schedule_shards()
+    for shard in shards[:-1]:
+      self._run_shard(shard)
+    self._run_shard(shards[0])
+
+    task = models.BackgroundTask.query.get(task_id)
+    self.assertEqual(task.status, "Running")
+    self.assertEqual(task.get_content()["handled_shards"], len(shards) - 1)
+
+    self._run_shard(shards[-1])
+    task = models.BackgroundTask.query.get(task_id)
+    self.assertEqual(task.status, "Success")
+
+  @mock.patch("ggrc.views.REINDEX_SHARD_SIZE", 2)
+  def test_failed_shard(self):
+    """Test failed shard fails the task and keeps the watermark."""
+    task_id, shards = self._schedule_shards()
+    watermark = maintenance.ReindexWatermark.get_or_create(
+        views.FULLTEXT_WATERMARK)
+    watermark.revision_id = 0
+    db.session.commit()
+
+    with mock.patch("ggrc.views.do_reindex_shard",
+                    side_effect=Exception("Shard failed")):
+      views.reindex_shard(**shards[0])
+    for shard in shards[1:]:
+      self._run_shard(shard)
+
+    task = models.BackgroundTask.query.get(task_id)
+    self.assertEqual(task.status, "Failure")
+    self.assertEqual(task.get_content()["failed_keys"], [
+        views.get_reindex_shard_key(shards[0]["model"],
+                                    shards[0]["first_id"]),
+    ])
+    watermark = maintenance.ReindexWatermark.get_or_create(
+        views.FULLTEXT_WATERMARK)
+    self.assertEqual(watermark.revision_id, 0)
+
+  @mock.patch("ggrc.views.REINDEX_SHARD_SIZE", 2)
+  def test_timed_out_shards(self):
+    """Test sharded reindex is failed when shards time out."""
+    task_id, _ = self._schedule_shards()
+    views.fail_timed_out_reindex(task_id)
+    task = models.BackgroundTask.query.get(task_id)
+    self.assertEqual(task.status, "Running")
+
+    with mock.patch("ggrc.views.REINDEX_SHARDS_TIMEOUT", 0):
+      views.fail_timed_out_reindex(task_id)
+    task = models.BackgroundTask.query.get(task_id)
+    self.assertEqual(task.status, "Failure")
+
   COMMIT_INDEX_TEST_CASES = [(f, OBJECT_TEST_COUNT)
                              for f in INDEXED_MODEL_FACTORIES]
 
@@ -147,3 +272,50 @@ class TestTotalReindex(TestCase):
               obj_count=obj_count,
           )
       )
+
+  def test_incremental_reindex(self):
+    """Test incremental reindex handles only objects changed since last run."""
+    with ggrc_factories.single_commit():
+      ggrc_factories.ControlFactory()
+    self.client.get("/login")
+    self.client.post("/admin/reindex")
+
+    with ggrc_factories.single_commit():
+      changed_control_id = ggrc_factories.ControlFactory().id
+    indexer = fulltext.get_indexer()
+    indexer.record_type.query.delete()
+    db.session.commit()
+    self.client.post("/admin/reindex?incremental=true")
+
+    reindexed_keys = {
+        key for key, in db.session.query(MysqlRecordProperty.key).filter(
+            MysqlRecordProperty.type == "Control",
+        )
+    }
+    self.assertEqual(reindexed_keys, {changed_control_id})
+
+  def test_incremental_reindex_margin(self):
+    """Test incremental reindex leaves fresh revisions for the next run."""
+    with ggrc_factories.single_commit():
+      ggrc_factories.ControlFactory()
+    self.client.get("/login")
+    self.client.post("/admin/reindex")
+    watermark_id = maintenance.ReindexWatermark.get_or_create(
+        views.FULLTEXT_WATERMARK).revision_id
+
+    with ggrc_factories.single_commit():
+      ggrc_factories.ControlFactory()
+    with mock.patch("ggrc.settings.REINDEX_WATERMARK_MARGIN", 3600,
+                    create=True):
+      self.client.post("/admin/reindex?incremental=true")
+
+    watermark = maintenance.ReindexWatermark.get_or_create(
+        views.FULLTEXT_WATERMARK)
+    self.assertEqual(watermark.revision_id, watermark_id)
+    task = models.BackgroundTask.query.order_by(
+        models.BackgroundTask.id.desc(),
+    ).first()
+    self.assertEqual(task.status, "Success")
+    self.assertEqual(task.get_content()["handled_revisions"], 0)
+    self.assertEqual(task.get_content()["revision_id"],
+                     watermark.revision_id)
@@ -22,7 +22,9 @@ import mock
 from google.appengine.ext import deferred
 
 from ggrc import db
+from ggrc.converters import base
 from ggrc.models import all_models
+from ggrc.models import import_export
 
 from integration.ggrc import api_helper
 from integration.ggrc.models import factories
@@ -398,6 +400,112 @@ class TestImportExports(TestCase):
     )
     self.assertEqual({"created"}, {a[0] for a in revision_actions})
 
+  def test_import_resume(self):
+    """Test import continues after rows committed by the previous run."""
+    data = "Object type,,,,\n" \
+           "Control,Code*,Title*,Admin*,Assertions*\n" \
+           ",CONTROL-1,Control1,user@example.com,Privacy\n" \
+           ",CONTROL-2,Control2,user@example.com,Privacy\n" \
+           ",CONTROL-3,Control3,user@example.com,Privacy"
+    counts = {
+        "rows": 1,
+        "created": 1,
+        "updated": 0,
+        "ignored": 0,
+        "deleted": 0,
+        "deprecated": 0,
+    }
+
+    user = all_models.Person.query.first()
+    imp_exp = factories.ImportExportFactory(
+        job_type="Import",
+        status="Blocked",
+        created_by=user,
+        created_at=datetime.now(),
+        content=data,
+        checkpoint=json.dumps({
+            "attempts": 1,
+            "block": 0,
+            "rows": 1,
+            "counts": counts,
+            "event_id": None,
+        }),
+        checkpoint_results=json.dumps({
+            "blocks": [],
+            "messages": {"row_warnings": ["warning"], "row_errors": []},
+        }),
+    )
+    imp_exp_id = imp_exp.id
+
+    self.run_full_import(user, imp_exp)
+    db.session.close()
+
+    self.assertEqual(
+        {control.slug for control in all_models.Control.query},
+        {"CONTROL-2", "CONTROL-3"},
+    )
+    imp_exp = all_models.ImportExport.query.get(imp_exp_id)
+    self.assertEqual(imp_exp.status, "Finished")
+    self.assertIsNone(imp_exp.checkpoint)
+    self.assertIsNone(imp_exp.checkpoint_results)
+    results = json.loads(imp_exp.results)
+    self.assertEqual(results[0]["rows"], 3)
+    self.assertEqual(results[0]["created"], 3)
+    self.assertEqual(results[0]["row_warnings"], ["warning"])
+
+  def test_job_revision_ids(self):
+    """Test resumed import collects only revisions of the job events."""
+    user = all_models.Person.query.first()
+    imp_exp = factories.ImportExportFactory(
+        job_type="Import",
+        status="Blocked",
+        created_by=user,
+        created_at=datetime.now(),
+    )
+    control = factories.ControlFactory()
+    revision = all_models.Revision(control, user.id, "modified",
+                                   control.log_json())
+    job_event = factories.EventFactory(
+        modified_by_id=user.id,
+        action="BULK",
+        resource_id=imp_exp.id,
+        resource_type=imp_exp.__class__.__name__,
+        revisions=[revision],
+    )
+    # Changes of the same user outside of the import job
+    factories.ControlFactory()
+
+    converter = base.ImportConverter(dry_run=False, ie_job=imp_exp)
+    converter.first_event_id = job_event.id
+    # pylint: disable=protected-access
+    self.assertEqual(converter._get_job_revision_ids(), [revision.id])
+
+  def test_import_attempts_limit(self):
+    """Test import job fails after too many interrupted runs."""
+    data = "Object type,,,,\n" \
+           "Control,Code*,Title*,Admin*,Assertions*\n" \
+           ",CONTROL-1,Control1,user@example.com,Privacy"
+    user = all_models.Person.query.first()
+    imp_exp = factories.ImportExportFactory(
+        job_type="Import",
+        status="Blocked",
+        created_by=user,
+        created_at=datetime.now(),
+        content=data,
+        checkpoint=json.dumps({
+            "attempts": import_export.MAX_IMPORT_ATTEMPTS,
+        }),
+    )
+    imp_exp_id = imp_exp.id
+
+    self.run_full_import(user, imp_exp)
+    db.session.close()
+
+    self.assertEqual(all_models.Control.query.count(), 0)
+    imp_exp = all_models.ImportExport.query.get(imp_exp_id)
+    self.assertEqual(imp_exp.status, "Failed")
+    self.assertIsNone(imp_exp.checkpoint)
+
   @mock.patch(
       "ggrc.gdrive.file_actions.get_gdrive_file_data",
       new=lambda x: (x, None, '')
@@ -0,0 +1,70 @@
+# Copyright (C) 2018 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+Test /outdated_snapshots endpoint
+"""
+
+from integration.ggrc import TestCase
+from integration.ggrc.api_helper import Api
+from integration.ggrc.models import factories
+
+
+class TestAuditOutdatedSnapshots(TestCase):
+  """Test /outdated_snapshots for Audit"""
+
+  def setUp(self):
+    """Set up for test methods."""
+    super(TestAuditOutdatedSnapshots, self).setUp()
+    self.api = Api()
+
+  def get_outdated_snapshots(self, audit):
+    """Get outdated snapshots of the audit."""
+    response = self.api.client.get("/api/{}/{}/outdated_snapshots".format(
+        audit._inflector.table_plural, audit.id
+    ))
+    self.assert200(response)
+    return response.json
+
+  def test_no_outdated_snapshots(self):
+    """Snapshots of the latest revisions are not outdated"""
+    with factories.single_commit():
+      audit = factories.AuditFactory()
+      control = factories.ControlFactory()
+    self._create_snapshots(audit, [control])
+    self.assertEqual(
+        self.get_outdated_snapshots(audit),
+        {"snapshots": {}, "total": 0},
+    )
+
+  def test_outdated_snapshots(self):
+    """Only snapshots of changed objects are outdated"""
+    with factories.single_commit():
+      audit = factories.AuditFactory()
+      controls = [factories.ControlFactory() for _ in range(2)]
+      objective = factories.ObjectiveFactory()
+    snapshot_ids = {
+        (snapshot.child_type, snapshot.child_id): snapshot.id
+        for snapshot in self._create_snapshots(audit,
+                                               controls + [objective])
+    }
+    control_snapshot_id = snapshot_ids[("Control", controls[0].id)]
+    objective_snapshot_id = snapshot_ids[("Objective", objective.id)]
+    self.api.modify_object(controls[0], {"title": "edited control"})
+    self.api.modify_object(objective, {"title": "edited objective"})
+
+    self.assertEqual(self.get_outdated_snapshots(audit), {
+        "snapshots": {
+            "Control": {"count": 1, "ids": [control_snapshot_id]},
+            "Objective": {"count": 1, "ids": [objective_snapshot_id]},
+        },
+        "total": 2,
+    })
+
+    audit = self.refresh_object(audit)
+    self.api.modify_object(audit, {
+        "snapshots": {
+            "operation": "upsert"
+        }
+    })
+    self.assertEqual(self.get_outdated_snapshots(audit)["total"], 0)
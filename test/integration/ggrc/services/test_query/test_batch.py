@@ -0,0 +1,92 @@
+# Copyright (C) 2018 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for evaluation of several object queries in one /query request."""
+
+import json
+
+import mock
+
+from ggrc.query import custom_operators
+from ggrc.query import pagination
+
+from integration.ggrc import TestCase
+from integration.ggrc.query_helper import WithQueryApi
+from integration.ggrc.models import factories
+
+
+class TestBatchedQueries(TestCase, WithQueryApi):
+  """Tests for shared subexpressions and batched counts."""
+
+  def setUp(self):
+    super(TestBatchedQueries, self).setUp()
+    self.client.get("/login")
+    with factories.single_commit():
+      self.program = factories.ProgramFactory()
+      controls = [factories.ControlFactory() for _ in range(3)]
+      objective = factories.ObjectiveFactory()
+      factories.ControlFactory()
+      for obj in controls[:2] + [objective]:
+        factories.RelationshipFactory(source=self.program, destination=obj)
+    self.control_ids = [control.id for control in controls[:2]]
+    self.objective_ids = [objective.id]
+
+  def _make_relevant_query(self, object_name, type_, limit=None):
+    """Make a query for objects relevant to the program."""
+    return self._make_query_dict_base(
+        object_name,
+        type_=type_,
+        limit=limit,
+        filters={"expression": {
+            "object_name": "Program",
+            "op": {"name": "relevant"},
+            "ids": [self.program.id],
+        }},
+    )
+
+  def _get_results(self, queries):
+    """Post the queries and get their result sets."""
+    response = self._post(queries)
+    self.assert200(response)
+    return [
+        result[query["object_name"]]
+        for result, query in zip(json.loads(response.data), queries)
+    ]
+
+  def test_shared_relevant(self):
+    """Identical relevant filters are evaluated once per request"""
+    queries = [
+        self._make_relevant_query("Control", "ids"),
+        self._make_relevant_query("Control", "count"),
+        self._make_relevant_query("Objective", "ids"),
+    ]
+    with mock.patch.object(
+        custom_operators.relationship_helper,
+        "get_ids_related_to",
+        wraps=custom_operators.relationship_helper.get_ids_related_to,
+    ) as get_ids_related_to:
+      results = self._get_results(queries)
+    self.assertEqual(get_ids_related_to.call_count, 2)
+    self.assertEqual(sorted(results[0]["ids"]), sorted(self.control_ids))
+    self.assertEqual(results[1]["count"], 2)
+    self.assertEqual(results[2]["ids"], self.objective_ids)
+
+  def test_batched_counts(self):
+    """Counts of several object queries are evaluated with one statement"""
+    queries = [
+        self._make_relevant_query("Control", "count"),
+        self._make_relevant_query("Control", "count", limit=[1, 5]),
+        self._make_query_dict("Control", type_="count"),
+        self._make_relevant_query("Objective", "count"),
+    ]
+    with mock.patch.object(
+        pagination,
+        "get_total_counts",
+        wraps=pagination.get_total_counts,
+    ) as get_total_counts:
+      results = self._get_results(queries)
+    get_total_counts.assert_called_once()
+    self.assertEqual(
+        [(result.get("count"), result.get("total")) for result in results],
+        [(2, 2), (1, 2), (4, 4), (1, 1)],
+    )
@@ -0,0 +1,79 @@
+# Copyright (C) 2018 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for cursor pagination of /query api and REST collections."""
+
+import json
+
+import ddt
+
+from integration.ggrc import TestCase
+from integration.ggrc.query_helper import WithQueryApi
+from integration.ggrc.models import factories
+
+
+@ddt.ddt
+class TestCursorPagination(TestCase, WithQueryApi):
+  """Tests for pages requested with continuation tokens."""
+
+  def setUp(self):
+    super(TestCursorPagination, self).setUp()
+    self.client.get("/login")
+    with factories.single_commit():
+      controls = [
+          factories.ControlFactory(title="control {}".format(index % 3))
+          for index in range(7)
+      ]
+    self.control_titles = {control.id: control.title for control in controls}
+
+  def _query_pages(self, order_by, page_size):
+    """Get ids of all controls page by page."""
+    ids = []
+    cursor = None
+    while True:
+      query = self._make_query_dict("Control", type_="ids",
+                                    order_by=order_by)
+      query.update({"cursor": cursor, "page_size": page_size})
+      result = self._get_first_result_set(query, "Control")
+      self.assertNotIn("total", result)
+      self.assertLessEqual(result["count"], page_size)
+      ids.extend(result["ids"])
+      cursor = result["next_cursor"]
+      if cursor is None:
+        return ids
+
+  @ddt.data(True, False)
+  def test_query_pages(self, desc):
+    """Query api pages contain every object once in the requested order"""
+    order_by = [{"name": "title", "desc": desc}]
+    # objects with equal titles are sorted by id
+    expected_ids = sorted(sorted(self.control_titles),
+                          key=self.control_titles.get, reverse=desc)
+    self.assertEqual(self._query_pages(order_by, 2), expected_ids)
+
+  def test_query_total(self):
+    """Total count is returned only if it is requested"""
+    query = self._make_query_dict("Control", type_="ids")
+    query.update({"cursor": None, "page_size": 5, "with_total": True})
+    result = self._get_first_result_set(query, "Control")
+    self.assertEqual(result["total"], 7)
+    self.assertEqual(result["count"], 5)
+
+  def test_query_invalid_cursor(self):
+    """Invalid cursor is rejected"""
+    query = self._make_query_dict("Control", type_="ids")
+    query.update({"cursor": "invalid", "page_size": 5})
+    self.assert400(self._post(query))
+
+  def test_collection_pages(self):
+    """REST collection pages are linked with cursors"""
+    ids = []
+    url = "/api/controls?__cursor=&__page_size=3&__total=1"
+    while url:
+      response = self.client.get(url)
+      self.assert200(response)
+      collection = json.loads(response.data)["controls_collection"]
+      self.assertEqual(collection["paging"]["total"], 7)
+      ids.extend(control["id"] for control in collection["controls"])
+      url = collection["paging"].get("next")
+    self.assertEqual(ids, sorted(self.control_titles, reverse=True))
@@ -0,0 +1,61 @@
+# Copyright (C) 2018 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for /query values limited to requested fields."""
+
+import ddt
+import mock
+
+from ggrc.models import all_models
+
+from integration.ggrc import TestCase
+from integration.ggrc.query_helper import WithQueryApi
+from integration.ggrc.models import factories
+
+
+@ddt.ddt
+class TestQueryFields(TestCase, WithQueryApi):
+  """Tests for field projections of query values."""
+
+  def setUp(self):
+    super(TestQueryFields, self).setUp()
+    self.client.get("/login")
+    with factories.single_commit():
+      for index in range(3):
+        factories.ControlFactory(title="control {}".format(index))
+
+  def _get_values(self, fields, **kwargs):
+    """Get values of controls sorted by title with the fields."""
+    query = self._make_query_dict("Control", type_="values",
+                                  order_by=[{"name": "title"}], **kwargs)
+    if fields:
+      query["fields"] = fields
+    return self._get_first_result_set(query, "Control", "values")
+
+  @ddt.data(
+      (["id", "title", "status"], False),
+      (["type", "slug", "updated_at"], False),
+      (["title", "selfLink"], True),
+      (["title", "display_name"], True),
+      (None, True),
+  )
+  @ddt.unpack
+  def test_projection(self, fields, published):
+    """Fields {0} are published: {1}"""
+    expected = [
+        {field: value.get(field) for field in fields} if fields else value
+        for value in self._get_values(None)
+    ]
+    with mock.patch.object(
+        all_models.Control,
+        "eager_query",
+        wraps=all_models.Control.eager_query,
+    ) as eager_query:
+      values = self._get_values(fields)
+    self.assertEqual(values, expected)
+    self.assertEqual(eager_query.called, published)
+
+  def test_projection_page(self):
+    """Pages of flat projections keep the order and limit"""
+    values = self._get_values(["title"], limit=[1, 3])
+    self.assertEqual(values, [{"title": "control 1"}, {"title": "control 2"}])
@@ -12,7 +12,9 @@ from ggrc import db
 from ggrc import models
 from ggrc.models import all_models
 from ggrc.fulltext.mysql import MysqlRecordProperty as Record
+from ggrc.models.maintenance import ReindexWatermark
 from ggrc.snapshotter.indexer import delete_records
+from ggrc.snapshotter.indexer import SNAPSHOT_WATERMARK
 
 from integration.ggrc.snapshotter import SnapshotterBaseTestCase
 from integration.ggrc.models import factories
@@ -345,6 +347,52 @@ class TestSnapshotIndexing(SnapshotterBaseTestCase):
 
     self.assertEqual(records.count(), 63)
 
+  def test_incremental_reindex(self):
+    """Test incremental reindex handles only changed snapshots"""
+    self._check_csv_response(self._import_file("snapshotter_create.csv"), {})
+    program = db.session.query(models.Program).filter(
+        models.Program.slug == "Prog-13211"
+    ).one()
+    self.create_audit(program)
+    audit = db.session.query(models.Audit).filter(
+        models.Audit.title.like("%Snapshotable audit%")).one()
+    self.client.post("/admin/reindex_snapshots")
+    snapshots = db.session.query(models.Snapshot).all()
+    delete_records({s.id for s in snapshots})
+
+    self.client.post("/admin/reindex_snapshots?incremental=true")
+    self.assertEqual(get_records(audit, snapshots).count(), 0)
+
+    objective = db.session.query(models.Objective).filter(
+        models.Objective.slug == "obj-1"
+    ).one()
+    objective_id = objective.id
+    self.api.modify_object(objective, {"title": "edited objective"})
+    audit = self.refresh_object(audit)
+    self.api.modify_object(audit, {
+        "snapshots": {
+            "operation": "upsert"
+        }
+    })
+    self.client.post("/admin/reindex_snapshots?incremental=true")
+
+    snapshot = db.session.query(models.Snapshot).filter(
+        models.Snapshot.child_type == "Objective",
+        models.Snapshot.child_id == objective_id,
+    ).one()
+    snapshots = db.session.query(models.Snapshot).all()
+    self.assertEqual(get_records(audit, snapshots).count(), 1)
+    self.assert_indexed_fields(snapshot, "title", {
+        "": "edited objective",
+    })
+    watermark = ReindexWatermark.query.filter_by(
+        name=SNAPSHOT_WATERMARK,
+    ).one()
+    self.assertEqual(
+        watermark.revision_id,
+        db.session.query(db.func.max(all_models.Revision.id)).scalar(),
+    )
+
   def assert_indexed_fields(self, obj, search_property, values):
     """Assert index content in full text search table."""
     all_found_records = dict(Record.query.filter(
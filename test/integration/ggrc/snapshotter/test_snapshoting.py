@@ -4,11 +4,16 @@
 """Test for snapshoter"""
 
 import collections
+import json
 
+import mock
 import sqlalchemy as sa
 
 from ggrc import db
+from ggrc import utils
 import ggrc.models as models
+from ggrc.snapshotter import SnapshotGenerator
+from ggrc.snapshotter.helpers import create_json_stub
 from ggrc.snapshotter.rules import Types
 
 from integration.ggrc.models import factories
@@ -591,6 +596,71 @@ class TestSnapshoting(SnapshotterBaseTestCase):
 
     self.assertEqual(missing_types, set())
 
+  @mock.patch.object(SnapshotGenerator, "WRITE_CHUNK_SIZE", 2)
+  def test_snapshoting_in_chunks(self):
+    """Test that snapshots and their revisions are written in chunks."""
+    self._check_csv_response(self._import_file("snapshotter_create.csv"), {})
+    program = db.session.query(models.Program).filter(
+        models.Program.slug == "Prog-13211"
+    ).one()
+
+    self.create_audit(program)
+
+    audit = db.session.query(models.Audit).filter(
+        models.Audit.title.like("%Snapshotable audit%")).first()
+    snapshot_ids = [snapshot_id for snapshot_id, in db.session.query(
+        models.Snapshot.id
+    ).filter(
+        models.Snapshot.parent_type == "Audit",
+        models.Snapshot.parent_id == audit.id,
+    )]
+    self.assertEqual(len(snapshot_ids), len(Types.all) * 3)
+    revisions_count = db.session.query(models.Revision).filter(
+        models.Revision.resource_type == "Snapshot",
+        models.Revision.resource_id.in_(snapshot_ids),
+    ).count()
+    self.assertEqual(revisions_count, len(snapshot_ids))
+
+  def test_snapshot_revision_content(self):
+    """Test content of snapshot revisions written by the database."""
+    program = self.create_object(models.Program, {
+        "title": "Test Program Snapshot 1"
+    })
+    control = self.create_object(models.Control, {
+        "title": "Test Control Snapshot 1"
+    })
+    self.create_mapping(program, control)
+    self.create_audit(program)
+
+    snapshot = db.session.query(models.Snapshot).filter(
+        models.Snapshot.child_type == "Control",
+        models.Snapshot.child_id == control.id,
+    ).one()
+    revision = db.session.query(models.Revision).filter(
+        models.Revision.resource_type == "Snapshot",
+        models.Revision.resource_id == snapshot.id,
+    ).one()
+
+    expected = json.loads(utils.as_json({
+        "id": snapshot.id,
+        "context_id": snapshot.context_id,
+        "created_at": snapshot.created_at,
+        "updated_at": snapshot.updated_at,
+        "parent_type": "Audit",
+        "parent_id": snapshot.parent_id,
+        "child_type": "Control",
+        "child_id": control.id,
+        "revision_id": snapshot.revision_id,
+        "modified_by_id": snapshot.modified_by_id,
+        "display_name": "Snapshot:{} of Control:{} in Audit:{}".format(
+            snapshot.id, control.id, snapshot.parent_id),
+        "modified_by": create_json_stub(
+            "Person", revision.context_id, snapshot.modified_by_id),
+    }))
+    self.assertEqual(revision.action, "created")
+    self.assertEqual(revision.context_id, snapshot.context_id)
+    self.assertEqual(revision.content, expected)
+
   def test_snapshot_update_is_idempotent(self):
     """Test that nothing has changed if there's nothing to update"""
     self._check_csv_response(self._import_file("snapshotter_create.csv"), {})
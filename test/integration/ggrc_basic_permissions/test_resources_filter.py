@@ -0,0 +1,122 @@
+# Copyright (C) 2018 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Test ACL filter of resources available to the user."""
+
+import itertools
+
+import ddt
+import mock
+
+import ggrc_basic_permissions
+from ggrc import db
+from ggrc.access_control.role import get_ac_roles_for
+from ggrc.models import all_models
+from ggrc.rbac.permissions_provider import get_contributing_resource_types
+from integration.ggrc import TestCase
+from integration.ggrc.models import factories
+from integration.ggrc_basic_permissions.models \
+    import factories as rbac_factories
+
+
+PEOPLE = (
+    # name, global role
+    ("reader", "Reader"),
+    ("editor", "Editor"),
+    ("no_access", "Creator"),
+    ("control_admin", "Creator"),
+    ("program_manager", "Creator"),
+    ("auditor", "Creator"),
+)
+
+MODELS = (
+    all_models.Program,
+    all_models.Audit,
+    all_models.Assessment,
+    all_models.Control,
+    all_models.Relationship,
+)
+
+
+@ddt.ddt
+class TestResourcesFilter(TestCase):
+  """Compare ACL resources filter with resources of permissions dict."""
+
+  def setUp(self):
+    super(TestResourcesFilter, self).setUp()
+    roles = {role.name: role for role in all_models.Role.query}
+    with factories.single_commit():
+      self.people = {}
+      for name, role_name in PEOPLE:
+        self.people[name] = person = factories.PersonFactory()
+        rbac_factories.UserRoleFactory(role=roles[role_name], person=person)
+      program = factories.ProgramFactory(access_control_list=[{
+          "ac_role": get_ac_roles_for("Program")["Program Managers"],
+          "person": self.people["program_manager"],
+      }])
+      audit = factories.AuditFactory(program=program, access_control_list=[{
+          "ac_role": get_ac_roles_for("Audit")["Auditors"],
+          "person": self.people["auditor"],
+      }])
+      factories.RelationshipFactory(source=program, destination=audit)
+      assessment = factories.AssessmentFactory(audit=audit)
+      factories.RelationshipFactory(source=audit, destination=assessment)
+      control = factories.ControlFactory(access_control_list=[{
+          "ac_role": get_ac_roles_for("Control")["Admin"],
+          "person": self.people["control_admin"],
+      }])
+      factories.RelationshipFactory(source=program, destination=control)
+      factories.ControlFactory()
+    self.control_id = control.id
+
+  def _get_filtered_ids(self, person, model, action):
+    """Get ids of objects matching the ACL resources filter."""
+    with mock.patch("ggrc_basic_permissions.get_current_user",
+                    return_value=person):
+      resources_filter = ggrc_basic_permissions.UserPermissions(
+      ).resources_filter_for(action, model.__name__, model.id)
+    return {id_ for id_, in db.session.query(model.id).filter(
+        resources_filter
+    )}
+
+  @staticmethod
+  def _get_permitted_ids(person, model, action):
+    """Get ids of objects in resources of permissions dict."""
+    permissions = ggrc_basic_permissions.load_permissions_for(person)
+    resources = set()
+    for resource_type in get_contributing_resource_types(model.__name__):
+      resources.update(permissions.get(action, {}).get(
+          resource_type, {}
+      ).get("resources", set()))
+    return resources
+
+  @ddt.data(*itertools.product(
+      [name for name, _ in PEOPLE],
+      MODELS,
+      ggrc_basic_permissions.ACL_ACTIONS,
+  ))
+  @ddt.unpack
+  def test_same_resources(self, person_name, model, action):
+    """Filter matches permissions of {0} to {2} {1.__name__}"""
+    person = self.people[person_name]
+    self.assertEqual(
+        self._get_filtered_ids(person, model, action),
+        self._get_permitted_ids(person, model, action),
+    )
+
+  def test_propagated_resources(self):
+    """Filter matches objects available through propagated roles"""
+    for name in ("program_manager", "auditor"):
+      person = self.people[name]
+      for model in (all_models.Audit, all_models.Assessment):
+        self.assertTrue(self._get_filtered_ids(person, model, "read"))
+    self.assertEqual(
+        self._get_filtered_ids(self.people["program_manager"],
+                               all_models.Control, "read"),
+        {self.control_id},
+    )
+    self.assertEqual(
+        self._get_filtered_ids(self.people["no_access"],
+                               all_models.Control, "read"),
+        set(),
+    )
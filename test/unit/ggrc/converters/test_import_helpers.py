@@ -112,6 +112,39 @@ class TestSplitArry(unittest.TestCase):
     self.assertEqual(offsets[2], 9)
 
 
+class TestReadCsv(unittest.TestCase):
+  """Tests for reading csv blocks."""
+
+  def test_extract_relevant_data(self):
+    """Test skipping of metadata and empty columns in a block."""
+    block = [
+        [u"Object type", u"", u"", u""],
+        [u"Control", u" Code* ", u"", u"Title "],
+        [u"", u"CONTROL-1", u"", u" Title 1"],
+        [u"", u"CONTROL-2", u"", u""],
+    ]
+    headers, data = import_helper.extract_relevant_data(block)
+    self.assertEqual(headers, [u"Code*", u"Title"])
+    self.assertEqual(data, [
+        [u"CONTROL-1", u"Title 1"],
+        [u"CONTROL-2", u""],
+    ])
+
+  def test_iter_csv_file(self):
+    """Test that csv file is read only up to the current block."""
+    csv_file = iter([
+        "Object type\n",
+        "Control,Code*\n",
+        "Object type\n",
+        "Policy,Code*\n",
+    ])
+    blocks = import_helper.split_blocks(import_helper.iter_csv_file(csv_file))
+    offset, data_block, _ = next(blocks)
+    self.assertEqual(offset, 0)
+    self.assertEqual(data_block, [[u"Object type"], [u"Control", u"Code*"]])
+    self.assertEqual(next(csv_file), "Policy,Code*\n")
+
+
 class TestColumnOrder(unittest.TestCase):
 
   """Tests for colum order function.
@@ -29,26 +29,18 @@ class TestSnapshotBlockConverter(unittest.TestCase):
   def _mock_snapshot_factory(content_list):
     return [mock.MagicMock(content=content) for content in content_list]
 
-  @classmethod
-  def _dummy_cad_snapshots(cls):
-    return cls._mock_snapshot_factory([{
-        "id": 44,
-        "custom_attribute_definitions": [
-            {"id": 1, "title": "CCC"},
-            {"id": 2, "title": "BBB"},
-        ],
-    }, {
-        "id": 45,
-        "custom_attribute_definitions": [
-            {"id": 1, "title": "CCC"},
-            {"id": 3, "title": "AAA"},
-            {"id": 4, "title": "DDD"},
-        ],
-    }])
+  @staticmethod
+  def _dummy_cads():
+    return [
+        {"id": 1, "title": "CCC"},
+        {"id": 2, "title": "BBB"},
+        {"id": 3, "title": "AAA"},
+        {"id": 4, "title": "DDD"},
+    ]
 
   def test_gather_stubs(self):
     """Test _gather_stubs method."""
-    self.block.snapshots = self._mock_snapshot_factory([{
+    snapshots = self._mock_snapshot_factory([{
         "id": 44,
         "owners": [
             {"type": "person", "id": 1},
@@ -69,7 +61,7 @@ class TestSnapshotBlockConverter(unittest.TestCase):
         "type": "other",
         "options": [{"type": "option", "id": 4}],
     }])
-    stubs = self.block._gather_stubs()
+    stubs = self.block._gather_stubs(snapshots)
     self.assertEqual(
         stubs,
         {
@@ -82,7 +74,7 @@ class TestSnapshotBlockConverter(unittest.TestCase):
 
   def test_cad_map(self):
     """Test gathering name map for all custom attribute definitions."""
-    self.block.snapshots = self._dummy_cad_snapshots()
+    self.block._custom_attribute_definitions = self._dummy_cads()
     self.assertEqual(
         self.block._cad_map.items(),
         [
@@ -95,7 +87,7 @@ class TestSnapshotBlockConverter(unittest.TestCase):
 
   def test_cad_name_map(self):
     """Test gathering name map for all custom attribute definitions."""
-    self.block.snapshots = self._dummy_cad_snapshots()
+    self.block._custom_attribute_definitions = self._dummy_cads()
     self.assertEqual(
         self.block._cad_name_map.items(),
         [
@@ -343,14 +335,3 @@ class TestSnapshotBlockConverter(unittest.TestCase):
         self.block._header_list,
         [[], ["AAA", "Audit", "DDD", "BBB", "CCC", "A", "B", "C", "D"]]
     )
-
-  @ddt.data(
-      ([], [[]]),
-      ([1, 2, 3], [[], [], []]),
-  )
-  @ddt.unpack
-  def test_body_list(self, snapshots, block_list):
-    """Test basic CSV body format."""
-    self.block._content_line_list = lambda x: []
-    self.block.snapshots = snapshots
-    self.assertEqual(self.block._body_list, block_list)
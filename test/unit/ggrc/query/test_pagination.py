@@ -0,0 +1,63 @@
+# Copyright (C) 2018 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for pagination helpers of query API."""
+
+import unittest
+
+import ddt
+import mock
+
+from ggrc.query import pagination
+
+
+@ddt.ddt
+class TestGetPageTotalCount(unittest.TestCase):
+  """Tests for total count of limited queries."""
+
+  @ddt.data(
+      ([0, 10], 3, 3),
+      ([0, 10], 0, 0),
+      ([20, 30], 5, 25),
+  )
+  @ddt.unpack
+  def test_not_full_page(self, limit, page_count, total):
+    """Total of a page that is not full is known without counting"""
+    with mock.patch.object(pagination, "get_total_count") as get_total_count:
+      self.assertEqual(
+          pagination.get_page_total_count(mock.Mock(), limit, page_count),
+          total,
+      )
+      self.assertFalse(get_total_count.called)
+
+  @ddt.data(
+      ([0, 10], 10),
+      ([20, 30], 0),
+  )
+  @ddt.unpack
+  def test_counted_page(self, limit, page_count):
+    """Total of a full page or a page after the end is counted"""
+    query = mock.Mock()
+    with mock.patch.object(pagination, "get_total_count",
+                           return_value=42) as get_total_count:
+      self.assertEqual(
+          pagination.get_page_total_count(query, limit, page_count),
+          42,
+      )
+      get_total_count.assert_called_once_with(query)
+
+
+@ddt.ddt
+class TestGetLimitCount(unittest.TestCase):
+  """Tests for the number of objects in a page of the limit."""
+
+  @ddt.data(
+      ([0, 10], 3, 3),
+      ([0, 10], 42, 10),
+      ([20, 30], 25, 5),
+      ([20, 30], 5, 0),
+  )
+  @ddt.unpack
+  def test_limit_count(self, limit, total, count):
+    """Page of the limit contains only objects before the total"""
+    self.assertEqual(pagination.get_limit_count(limit, total), count)
@@ -0,0 +1,73 @@
+# Copyright (C) 2018 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for compiled user permissions."""
+
+import unittest
+
+import ggrc.app  # noqa pylint: disable=unused-import
+from ggrc.rbac.permissions_provider import ADMIN_PERMISSION
+from ggrc.rbac.permissions_provider import CompiledPermissions
+from ggrc.rbac.permissions_provider import Permission
+
+
+class TestCompiledPermissions(unittest.TestCase):
+  """Tests for CompiledPermissions."""
+
+  def setUp(self):
+    self.permissions = CompiledPermissions({
+        "read": {
+            "Control": {
+                "resources": {1, 2},
+                "contexts": [5],
+                "conditions": {
+                    5: [{"condition": "is", "terms": {"value": "x"}}],
+                },
+            },
+            "Market": {},
+        },
+    })
+
+  def test_lookups(self):
+    """Test contexts, resources and conditions lookups."""
+    self.assertEqual(
+        self.permissions.resources_for("read", "Control"), {1, 2})
+    self.assertEqual(self.permissions.contexts_for("read", "Control"), {5})
+    self.assertEqual(self.permissions.contexts_for("update", "Control"),
+                     frozenset())
+    self.assertEqual(
+        self.permissions.conditions_for("read", "Control", 5),
+        (("is", {"value": "x"}),),
+    )
+    self.assertEqual(self.permissions.conditions_for("read", "Control", 1),
+                     ())
+    self.assertIn(("read", "Control"), self.permissions.granted)
+    self.assertNotIn(("read", "Market"), self.permissions.granted)
+
+  def test_match(self):
+    """Test matching of permissions."""
+    self.assertTrue(self.permissions.match(
+        Permission("read", "Control", 1, None)))
+    self.assertTrue(self.permissions.match(
+        Permission("read", "Control", 10, 5)))
+    self.assertFalse(self.permissions.match(
+        Permission("read", "Control", 10, 6)))
+    self.assertFalse(self.permissions.is_admin)
+
+  def test_admin(self):
+    """Test detection of admin permissions."""
+    permissions = CompiledPermissions({
+        ADMIN_PERMISSION.action: {
+            ADMIN_PERMISSION.resource_type: {
+                "contexts": [ADMIN_PERMISSION.context_id],
+            },
+        },
+    })
+    self.assertTrue(permissions.is_admin)
+
+  def test_empty(self):
+    """Test that missing permissions are compiled to empty ones."""
+    permissions = CompiledPermissions(None)
+    self.assertFalse(permissions.is_admin)
+    self.assertEqual(permissions.resources_for("read", "Control"),
+                     frozenset())
@@ -1,6 +1,7 @@
 # Copyright (C) 2018 Google Inc.
 # Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
 
+import threading
 import unittest
 
 from ggrc.utils import structures
@@ -93,3 +94,60 @@ class TestCaseInsensitiveDefDict(unittest.TestCase):
         sorted(self.ci_dict.lower_items()),
         sorted([("hello", "World"), ("foo", "BAR")])
     )
+
+
+class TestLRUCache(unittest.TestCase):
+  """Tests for LRUCache."""
+
+  def setUp(self):
+    self.cache = structures.LRUCache(2)
+
+  def test_eviction(self):
+    """Test that the least recently used entry is dropped."""
+    self.cache.set("a", 1)
+    self.cache.set("b", 2)
+    self.assertEqual(self.cache.get("a"), 1)
+    self.cache.set("c", 3)
+    self.assertIn("a", self.cache)
+    self.assertNotIn("b", self.cache)
+    self.assertIn("c", self.cache)
+    self.assertEqual(len(self.cache), 2)
+
+  def test_stats(self):
+    """Test counting of cache hits and misses."""
+    self.cache.set("a", 1)
+    self.cache.get("a")
+    self.cache.get("a")
+    self.cache.get("b")
+    self.assertEqual(
+        self.cache.stats(),
+        {"size": 1, "hits": 2, "misses": 1},
+    )
+
+  def test_pop_and_clear(self):
+    """Test removing of cache entries."""
+    self.cache.set("a", 1)
+    self.cache.set("b", 2)
+    self.assertEqual(self.cache.pop("a"), 1)
+    self.assertIsNone(self.cache.get("a"))
+    self.cache.clear()
+    self.assertEqual(len(self.cache), 0)
+
+  def test_concurrent_access(self):
+    """Test that hits and misses are counted consistently by threads."""
+    self.cache.set("a", 1)
+
+    def read():
+      for _ in range(1000):
+        self.cache.get("a")
+        self.cache.get("b")
+
+    threads = [threading.Thread(target=read) for _ in range(4)]
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+    self.assertEqual(
+        self.cache.stats(),
+        {"size": 1, "hits": 4000, "misses": 4000},
+    )
@@ -0,0 +1,136 @@
+# Copyright (C) 2018 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for local permissions cache."""
+
+import unittest
+
+import mock
+
+import ggrc_basic_permissions
+from ggrc.cache import utils as cache_utils
+from ggrc.models.cache import Cache
+from ggrc.utils import structures
+
+
+class FakeMemcacheClient(object):
+  """In-memory memcache client."""
+
+  def __init__(self):
+    self.data = {}
+
+  def get(self, key):
+    return self.data.get(key)
+
+  def set(self, key, value, *_):
+    self.data[key] = value
+
+  def add(self, key, value, *_):
+    self.data.setdefault(key, value)
+
+  def incr(self, key, delta=1, initial_value=None):
+    if key not in self.data:
+      self.data[key] = initial_value
+    else:
+      self.data[key] += delta
+
+  def delete_multi(self, keys):
+    for key in keys:
+      self.data.pop(key, None)
+
+
+class TestLocalPermissionsCache(unittest.TestCase):
+  """Tests for local permissions cache in front of memcache."""
+
+  def setUp(self):
+    self.client = FakeMemcacheClient()
+    cache_manager = mock.Mock()
+    cache_manager.cache_object.memcache_client = self.client
+    patchers = [
+        mock.patch("ggrc.settings.MEMCACHE_MECHANISM", True, create=True),
+        mock.patch.object(cache_utils, "get_cache_manager",
+                          return_value=cache_manager),
+        mock.patch.object(ggrc_basic_permissions, "LOCAL_PERMISSIONS_CACHE",
+                          structures.LRUCache(2)),
+    ]
+    for patcher in patchers:
+      patcher.start()
+      self.addCleanup(patcher.stop)
+
+  @staticmethod
+  def _store(user_id):
+    """Store permissions of the user into local cache."""
+    generation, _ = ggrc_basic_permissions.query_local_cache(user_id)
+    permissions = {"read": {"user": user_id}}
+    ggrc_basic_permissions.store_results_into_local_cache(
+        permissions, generation, user_id)
+    return permissions
+
+  def test_local_hit(self):
+    """Stored permissions are returned from local cache."""
+    permissions = self._store(1)
+    _, result = ggrc_basic_permissions.query_local_cache(1)
+    self.assertEqual(result, permissions)
+    self.assertEqual(ggrc_basic_permissions.LOCAL_PERMISSIONS_CACHE.hits, 1)
+
+  def test_clear_permission_cache(self):
+    """Dropping permissions of all users invalidates local cache."""
+    self._store(1)
+    cache_utils.clear_permission_cache()
+    _, result = ggrc_basic_permissions.query_local_cache(1)
+    self.assertIsNone(result)
+
+  def test_clear_users_permission_cache(self):
+    """Dropping permissions of some users invalidates local cache."""
+    self._store(1)
+    cache_utils.clear_users_permission_cache([1])
+    _, result = ggrc_basic_permissions.query_local_cache(1)
+    self.assertIsNone(result)
+
+  def test_clear_without_bump(self):
+    """Writes not changing permission inputs keep local cache."""
+    permissions = self._store(1)
+    cache_utils.clear_permission_cache(bump_generation=False)
+    _, result = ggrc_basic_permissions.query_local_cache(1)
+    self.assertEqual(result, permissions)
+
+  def test_eviction(self):
+    """Least recently used permissions are evicted from local cache."""
+    self._store(1)
+    permissions = self._store(2)
+    self._store(3)
+    _, result = ggrc_basic_permissions.query_local_cache(1)
+    self.assertIsNone(result)
+    _, result = ggrc_basic_permissions.query_local_cache(2)
+    self.assertEqual(result, permissions)
+
+
+class TestPermissionsInputsChanged(unittest.TestCase):
+  """Tests for detection of changed permission inputs."""
+
+  @staticmethod
+  def _modified(new=(), dirty=(), deleted=()):
+    """Build cache of modified objects."""
+    cache = Cache()
+    cache.new = {obj: {} for obj in new}
+    cache.dirty = {obj: {} for obj in dirty}
+    cache.deleted = {obj: {} for obj in deleted}
+    return cache
+
+  def test_plain_object_change(self):
+    """Changed objects without permission inputs do not change permissions."""
+    control = type("Control", (object,), {})()
+    self.assertFalse(cache_utils.permissions_inputs_changed(
+        self._modified(new=[control], dirty=[control])))
+
+  def test_acl_change(self):
+    """New ACL entries change permissions."""
+    acl = type("AccessControlList", (object,), {})()
+    self.assertTrue(cache_utils.permissions_inputs_changed(
+        self._modified(new=[acl])))
+
+  def test_deleted_object(self):
+    """Deleted objects change permissions."""
+    control = type("Control", (object,), {})()
+    self.assertTrue(cache_utils.permissions_inputs_changed(
+        self._modified(deleted=[control])))